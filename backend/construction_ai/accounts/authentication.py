@@ -0,0 +1,102 @@
+"""
+JWT authentication with a per-process user cache.
+
+``JWTAuthentication`` loads the ``User`` row on every request. Here the user
+is kept in a small in-process LRU for ``AUTH_USER_CACHE['TTL_SECONDS']``,
+keyed by user id and the token's ``auth_version`` claim. ``User.auth_version``
+is bumped whenever the role, password or active flag changes (see
+``User.save``) and tokens are issued with the current value, so a
+token minted after such a change never hits an entry loaded before it. Saving
+a user (e.g. through ``UserProfileView``) drops their entries in this process;
+other processes pick up the change within the TTL.
+
+Requests get a copy of the cached user, so views that modify ``request.user``
+never change the shared instance.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+DEFAULTS = {
+    'TTL_SECONDS': 30,
+    'MAX_SIZE': 1024,
+}
+
+VERSION_CLAIM = 'auth_version'
+
+
+def cache_setting(name):
+    return getattr(settings, 'AUTH_USER_CACHE', {}).get(name, DEFAULTS[name])
+
+
+class UserCache:
+    """Bounded LRU of users with a per-entry TTL, shared by the threads of one process"""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return copy.copy(user)
+
+    def set(self, key, user):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + cache_setting('TTL_SECONDS'), copy.copy(user))
+            self._entries.move_to_end(key)
+            while len(self._entries) > cache_setting('MAX_SIZE'):
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        user_id = str(user_id)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        key = (str(user_id), validated_token.get(VERSION_CLAIM))
+        user = user_cache.get(key)
+        if user is None:
+            # Loads the row and runs simplejwt's active/revocation checks
+            user = super().get_user(validated_token)
+            user_cache.set(key, user)
+        return user
+
+
+class VersionedTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Issues tokens carrying the user's auth_version (see CachedJWTAuthentication)"""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token[VERSION_CLAIM] = user.auth_version
+        return token
@@ -12,6 +12,30 @@ class User(AbstractUser):
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='worker')
     phone = models.CharField(max_length=15, blank=True, null=True)
     profile_picture = models.ImageField(upload_to='profile_pictures/', blank=True, null=True)
+    # Thumbnail file names, written in the background by imaging.derivatives
+    profile_picture_variants = models.JSONField(default=dict, blank=True, editable=False)
+    # Bumped when the role, password or active flag changes; issued in tokens (see accounts.authentication)
+    auth_version = models.PositiveIntegerField(default=0, editable=False)
+
+    # Changing any of these must stop cached users loaded for older tokens from being served
+    VERSIONED_FIELDS = ('role', 'password', 'is_active')
+
+    def save(self, *args, **kwargs):
+        """
+        Bump auth_version when a versioned field changed since load (accounts.signals remembers it).
+        Done here rather than in pre_save so a save(update_fields=[...]) writes the new version too.
+        """
+        update_fields = kwargs.get('update_fields')
+        state = getattr(self, '_auth_state', None)
+        if self.pk is not None and state is not None:
+            changed = {field for field, old in zip(self.VERSIONED_FIELDS, state) if getattr(self, field) != old}
+            if update_fields is not None:
+                changed &= set(update_fields)
+            if changed:
+                self.auth_version += 1
+                if update_fields is not None:
+                    kwargs['update_fields'] = {*update_fields, 'auth_version'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.username} ({self.get_role_display()})"
\ No newline at end of file
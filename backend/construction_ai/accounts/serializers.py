@@ -1,12 +1,16 @@
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
+from imaging.fields import ImageVariantsField
 from .models import User
 
 # Add this serializer
 class UserSerializer(serializers.ModelSerializer):
+    profile_picture_variants = ImageVariantsField()
+    
     class Meta:
         model = User
-        fields = ['id', 'username', 'email', 'first_name', 'last_name', 'role', 'profile_picture']
+        fields = ['id', 'username', 'email', 'first_name', 'last_name', 'role', 'profile_picture',
+                  'profile_picture_variants']
         read_only_fields = ['id']
 
 # Your existing serializer
@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .authentication import user_cache
+from .models import User
+
+
+@receiver(post_init, sender=User)
+def remember_auth_state(sender, instance, **kwargs):
+    """What User.save() compares against to decide whether auth_version must be bumped"""
+    instance._auth_state = tuple(instance.__dict__.get(field) for field in User.VERSIONED_FIELDS)
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    """Profile and role changes must not be served from the user cache"""
+    # Fields left out of update_fields weren't written, so they still differ from the row
+    instance._auth_state = tuple(
+        getattr(instance, field) if update_fields is None or field in update_fields else old
+        for field, old in zip(User.VERSIONED_FIELDS, instance._auth_state)
+    )
+    user_cache.invalidate(instance.pk)
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    user_cache.invalidate(instance.pk)
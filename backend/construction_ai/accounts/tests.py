@@ -1,3 +1,79 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import user_cache
+from .models import User
+
+
+class CachedAuthenticationTests(APITestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.user = User.objects.create_user(
+            username='worker', email='worker@example.com', password='s3cret-pass', role='worker'
+        )
+        response = self.client.post(reverse('token_obtain_pair'), {'username': 'worker', 'password': 's3cret-pass'})
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+
+    def test_token_carries_auth_version(self):
+        response = self.client.post(reverse('token_obtain_pair'), {'username': 'worker', 'password': 's3cret-pass'})
+        self.assertEqual(AccessToken(response.data['access'])['auth_version'], 0)
+
+    def test_user_is_loaded_once_per_ttl(self):
+        self.client.get(reverse('user-profile'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('user-profile'))
+        self.assertEqual(response.data['username'], 'worker')
+
+    def test_expired_entries_are_reloaded(self):
+        with mock.patch('accounts.authentication.time.monotonic', return_value=1000):
+            self.client.get(reverse('user-profile'))
+        with override_settings(AUTH_USER_CACHE={'TTL_SECONDS': 30}), \
+                mock.patch('accounts.authentication.time.monotonic', return_value=1031), \
+                self.assertNumQueries(1):
+            self.client.get(reverse('user-profile'))
+
+    def test_profile_update_invalidates_cache(self):
+        self.client.get(reverse('user-profile'))
+        self.client.patch(reverse('user-profile'), {'first_name': 'Asha'})
+
+        response = self.client.get(reverse('user-profile'))
+        self.assertEqual(response.data['first_name'], 'Asha')
+
+    def test_role_change_bumps_version_and_invalidates_cache(self):
+        self.client.get(reverse('user-profile'))
+        user = User.objects.get(pk=self.user.pk)
+        user.role = 'supervisor'
+        user.save()
+
+        self.assertEqual(user.auth_version, 1)
+        response = self.client.get(reverse('user-profile'))
+        self.assertEqual(response.data['role'], 'supervisor')
+
+        user.first_name = 'Asha'
+        user.save()
+        self.assertEqual(User.objects.get(pk=self.user.pk).auth_version, 1)
+
+    def test_partial_saves_write_the_bumped_version(self):
+        self.client.get(reverse('user-profile'))
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = 'Asha'
+        user.save(update_fields=['first_name'])
+        self.assertEqual(User.objects.get(pk=self.user.pk).auth_version, 0)
+
+        user.set_password('new-pass-123')
+        user.save(update_fields=['password'])
+
+        self.assertEqual(User.objects.get(pk=self.user.pk).auth_version, 1)
+        response = self.client.post(reverse('token_obtain_pair'), {'username': 'worker', 'password': 'new-pass-123'})
+        self.assertEqual(AccessToken(response.data['access'])['auth_version'], 1)
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get(reverse('user-profile'))
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        user_cache.invalidate(self.user.pk)
+
+        self.assertEqual(self.client.get(reverse('user-profile')).status_code, 401)
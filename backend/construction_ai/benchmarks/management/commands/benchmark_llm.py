@@ -0,0 +1,60 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+
+from benchmarks.runner import percentile
+from chat.llm import Prompt, complete, get_model
+
+
+class Command(BaseCommand):
+    help = (
+        "Send concurrent prompts through the configured AI_MODEL backend and report latency "
+        "(time to first token and total) and throughput; pair with run_llm_stub to run offline"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prompts', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--projects', type=int, default=8, help="Distinct projects the prompts are spread over")
+        parser.add_argument('--no-stream', action='store_true', help="Use complete() (batched when enabled)")
+
+    def handle(self, *args, **options):
+        model = get_model()
+        projects = [
+            SimpleNamespace(pk=i, title=f'Project {i}', status='in_progress',
+                            start_date=date(2025, 1, 1), end_date=date(2025, 12, 31))
+            for i in range(options['projects'])
+        ]
+        prompts = [
+            Prompt(f'What is the status of task {i}?', projects[i % len(projects)], context='Benchmark context')
+            for i in range(options['prompts'])
+        ]
+
+        def run(prompt):
+            started = time.perf_counter()
+            first = None
+            if options['no_stream']:
+                complete(model, prompt)
+            else:
+                for _ in model.stream(prompt):
+                    first = first or time.perf_counter() - started
+            total = time.perf_counter() - started
+            return first or total, total
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            samples = list(pool.map(run, prompts))
+        elapsed = time.perf_counter() - started
+
+        for label, values in (('first token', [s[0] for s in samples]), ('total', [s[1] for s in samples])):
+            values = sorted(value * 1000 for value in values)
+            self.stdout.write(
+                f"{label:12} p50 {percentile(values, 0.5):8.1f}ms  p95 {percentile(values, 0.95):8.1f}ms  "
+                f"p99 {percentile(values, 0.99):8.1f}ms"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(samples)} prompts in {elapsed:.2f}s ({len(samples) / elapsed:.1f}/s) with {type(model).__name__}"
+        ))
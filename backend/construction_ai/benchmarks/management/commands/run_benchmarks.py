@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks import runner, seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test every GET endpoint of the API router against a running server and report "
+        "p50/p95/p99 latency, throughput and SQL queries per request, compared with the baseline. "
+        "Seed the server's database with seed_benchmark_data first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help="Base URL of the running server")
+        parser.add_argument('--username', default=seed.username('supervisor', 0))
+        parser.add_argument('--password', default=seed.DEFAULT_PASSWORD)
+        parser.add_argument('--requests', type=int, default=100, help="Requests per endpoint")
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--baseline', default=str(runner.BASELINE_PATH))
+        parser.add_argument('--tolerance', type=float, default=0.5,
+                            help="Allowed p95 slowdown over the baseline, as a fraction")
+        parser.add_argument('--write-baseline', action='store_true', help="Save this run as the new baseline")
+
+    def handle(self, *args, **options):
+        try:
+            benchmark = runner.Benchmark(
+                options['url'], options['username'], options['password'],
+                requests=options['requests'], concurrency=options['concurrency'],
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(f"{'endpoint':40} {'status':>6} {'queries':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>8}")
+        results = benchmark.run(on_result=self.report)
+
+        if options['write_baseline']:
+            meta = {key: options[key] for key in ('requests', 'concurrency')}
+            runner.save_baseline(results, meta, options['baseline'])
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {options['baseline']}"))
+            return
+
+        regressions = runner.compare(results, runner.load_baseline(options['baseline']), options['tolerance'])
+        if regressions:
+            raise CommandError("Regressions against the baseline:\n" + "\n".join(regressions))
+        self.stdout.write(self.style.SUCCESS(f"{len(results)} endpoint(s) within the baseline"))
+
+    def report(self, name, result):
+        timings = [result.get(key) for key in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps')]
+        self.stdout.write(f"{name:40} {result['status']:>6} {result['queries']:>7} " + " ".join(
+            f"{value:>8}" if value is not None else f"{'-':>8}" for value in timings
+        ))
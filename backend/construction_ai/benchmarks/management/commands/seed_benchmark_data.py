@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from benchmarks import seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a deterministic synthetic portfolio (users '%s-*') for run_benchmarks. "
+        "Use a scratch database: the data is meant for load testing only." % seed.USERNAME_PREFIX
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--supervisors', type=int, default=2)
+        parser.add_argument('--projects', type=int, default=10, help="Projects per supervisor")
+        parser.add_argument('--workers', type=int, default=20)
+        parser.add_argument('--workers-per-project', type=int, default=5)
+        parser.add_argument('--messages', type=int, default=50, help="Chat messages per project")
+        parser.add_argument('--risks', type=int, default=5, help="Risks per project")
+        parser.add_argument('--timeline-events', type=int, default=6, help="Timeline events per project")
+        parser.add_argument('--updates', type=int, default=3, help="Project updates per project")
+        parser.add_argument('--password', default=seed.DEFAULT_PASSWORD)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--clear', action='store_true', help="Delete previously seeded data first")
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            seed.clear_portfolio()
+        counts = seed.seed_portfolio(
+            supervisors=options['supervisors'], projects=options['projects'], workers=options['workers'],
+            workers_per_project=options['workers_per_project'], messages=options['messages'],
+            risks=options['risks'], timeline_events=options['timeline_events'], updates=options['updates'],
+            password=options['password'], seed=options['seed'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            "Seeded " + ", ".join(f"{count} {name}" for name, count in counts.items())
+        ))
@@ -0,0 +1,180 @@
+"""
+Load test for the REST API.
+
+Every GET route of the API router (list, detail and extra actions) is driven
+with concurrent requests against a running server, authenticated as one
+(seeded) user. For each endpoint the run records p50/p95/p99 latency,
+throughput and the number of SQL queries one request issues; the query count
+is taken in-process with the test client against the same database, after a
+warm-up request, so it reflects steady-state behaviour with caches primed.
+
+Results can be saved as a baseline (``benchmarks/baseline.json`` is
+committed) and later runs compared against it: an endpoint regresses when it
+issues more queries than the baseline, or when its p95 exceeds the baseline's
+by more than the tolerance. Latency depends on the machine, so refresh the
+baseline on the machine that runs the comparison.
+"""
+import json
+import math
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from projects.mixins import ProjectScopedMixin
+
+BASELINE_PATH = Path(__file__).resolve().parent / 'baseline.json'
+
+# url name -> query parameters the endpoint needs, given the sample project
+ENDPOINT_PARAMS = {
+    'message-list': lambda sample: {'chat_room_id': sample['chat_room_id']},
+    'message-detail': lambda sample: {'chat_room_id': sample['chat_room_id']},
+    'projectsupplier-by-material': lambda sample: {'material': 'cement'},
+}
+
+
+def routes():
+    """(url name, viewset, basename, is detail) for every GET route registered on the API router"""
+    from construction_ai.urls import router
+
+    for _, viewset, basename in router.registry:
+        yield f'{basename}-list', viewset, basename, False
+        yield f'{basename}-detail', viewset, basename, True
+        for action in viewset.get_extra_actions():
+            if 'get' in action.mapping:
+                yield f'{basename}-{action.url_name}', viewset, basename, action.detail
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Benchmark:
+    def __init__(self, base_url, username, password, requests=100, concurrency=8):
+        self.base_url = base_url.rstrip('/')
+        self.requests = requests
+        self.concurrency = concurrency
+        self.client = Client(HTTP_HOST='localhost')
+        response = self.client.post(reverse('token_obtain_pair'), {'username': username, 'password': password})
+        if response.status_code != 200:
+            raise ValueError(f"Could not obtain a token for '{username}' (HTTP {response.status_code})")
+        self.headers = {'Authorization': f"Bearer {response.json()['access']}"}
+        self.client.defaults['HTTP_AUTHORIZATION'] = self.headers['Authorization']
+
+    def probe(self, path):
+        """Status, JSON body and query count of one in-process request, after a warm-up"""
+        self.client.get(path)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+            if response.streaming:
+                # Streaming responses query while they are consumed
+                b''.join(response.streaming_content)
+        body = None
+        if not response.streaming and response.get('Content-Type', '').startswith('application/json'):
+            body = response.json()
+        return response.status_code, body, len(queries)
+
+    def first_id(self, path):
+        _, body, _ = self.probe(path)
+        rows = body.get('results', body) if isinstance(body, dict) else body
+        return rows[0]['id'] if rows else None
+
+    def paths(self):
+        """(url name, path) for every route, using ids the benchmark user can see"""
+        sample = {
+            'project_id': self.first_id(reverse('project-list')),
+            'chat_room_id': self.first_id(reverse('chatroom-list')),
+        }
+        ids = {}
+        for name, viewset, basename, detail in routes():
+            if detail and ids.get(basename) is None:
+                continue
+            params = ENDPOINT_PARAMS[name](sample) if name in ENDPOINT_PARAMS else {}
+            if not detail and issubclass(viewset, ProjectScopedMixin):
+                # Scoped lists are empty unless they name a project
+                params['project_id'] = sample['project_id']
+            path = reverse(name, args=[ids[basename]] if detail else [])
+            if params:
+                path = f'{path}?{urlencode(params)}'
+            if name == f'{basename}-list':
+                ids[basename] = self.first_id(path)
+            yield name, path
+
+    def fetch(self, path):
+        request = urllib.request.Request(self.base_url + path, headers=self.headers)
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+                ok = response.status < 400
+        except (urllib.error.URLError, OSError):
+            ok = False
+        return time.perf_counter() - started, ok
+
+    def load(self, path):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            samples = list(pool.map(self.fetch, [path] * self.requests))
+        elapsed = time.perf_counter() - started
+        latencies = sorted(duration * 1000 for duration, _ in samples)
+        return {
+            'requests': len(samples),
+            'errors': sum(1 for _, ok in samples if not ok),
+            'p50_ms': round(percentile(latencies, 0.50), 2),
+            'p95_ms': round(percentile(latencies, 0.95), 2),
+            'p99_ms': round(percentile(latencies, 0.99), 2),
+            'throughput_rps': round(len(samples) / elapsed, 1) if elapsed else None,
+        }
+
+    def run(self, on_result=None):
+        """Benchmark every endpoint; returns {url name: result}"""
+        results = {}
+        for name, path in self.paths():
+            status, _, queries = self.probe(path)
+            result = {'path': path, 'status': status, 'queries': queries}
+            if status < 400:
+                result.update(self.load(path))
+            results[name] = result
+            if on_result:
+                on_result(name, result)
+        return results
+
+
+def load_baseline(path=BASELINE_PATH):
+    path = Path(path)
+    return json.loads(path.read_text())['endpoints'] if path.exists() else {}
+
+
+def save_baseline(results, meta, path=BASELINE_PATH):
+    Path(path).write_text(json.dumps({'meta': meta, 'endpoints': results}, indent=2, sort_keys=True) + '\n')
+
+
+def compare(results, baseline, tolerance=0.5, slack_ms=10.0):
+    """Regressions of `results` against `baseline`, as human-readable lines"""
+    regressions = []
+    for name, result in sorted(results.items()):
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['status'] != base['status']:
+            regressions.append(f"{name}: HTTP {result['status']} (baseline {base['status']})")
+        if result['queries'] > base['queries']:
+            regressions.append(f"{name}: {result['queries']} queries (baseline {base['queries']})")
+        if result.get('errors'):
+            regressions.append(f"{name}: {result['errors']} failed request(s)")
+        if 'p95_ms' in result and 'p95_ms' in base:
+            limit = base['p95_ms'] * (1 + tolerance) + slack_ms
+            if result['p95_ms'] > limit:
+                regressions.append(f"{name}: p95 {result['p95_ms']}ms (baseline {base['p95_ms']}ms)")
+    return regressions
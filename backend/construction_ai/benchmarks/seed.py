@@ -0,0 +1,148 @@
+"""
+Synthetic portfolio for benchmarks.
+
+Seeds supervisors, each with projects carrying suppliers, risks and timeline
+events, a shared pool of workers assigned across projects and chat messages
+in every project room, plus project updates. Everything is derived from a random seed, so the same
+arguments always produce the same data (and the same query counts).
+
+Projects and their children go through ``projects.bulk.import_projects`` so
+counters, chat rooms, search documents, vector indexes and the materials index are provisioned
+as for a real import; assignments, messages and updates are bulk-created and their
+denormalized state is filled in afterwards.
+"""
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from accounts.models import User
+from chat.models import ChatRoom, Message
+from projects import bulk, membership
+from projects.counters import reconcile
+from projects.models import Project, ProjectUpdate, ProjectWorker, RiskAnalysis
+from search import indexing, vectors
+
+USERNAME_PREFIX = 'bench'
+DEFAULT_PASSWORD = 'bench-pass-123'
+
+MATERIALS = ['cement', 'steel rebar', 'ready-mix concrete', 'aggregate', 'timber', 'glass', 'bitumen', 'bricks']
+
+
+def username(kind, index):
+    return f'{USERNAME_PREFIX}-{kind}-{index}'
+
+
+def create_users(kind, count, password):
+    hashed = make_password(password)
+    User.objects.bulk_create([
+        User(username=username(kind, i), email=f'{username(kind, i)}@example.com', role=kind, password=hashed)
+        for i in range(count)
+    ], ignore_conflicts=True)
+    return list(User.objects.filter(username__startswith=f'{USERNAME_PREFIX}-{kind}-').order_by('pk'))
+
+
+def project_record(rng, index, risks, timeline_events):
+    start = date(2025, 1, 1) + timedelta(days=rng.randrange(365))
+    return {
+        'title': f'Benchmark project {index}',
+        'description': f'Synthetic project {index} for load testing',
+        'location': f'Site {rng.randrange(100)}',
+        'start_date': start.isoformat(),
+        'end_date': (start + timedelta(days=rng.randrange(90, 720))).isoformat(),
+        'status': rng.choice(['planning', 'in_progress', 'completed']),
+        'estimated_workers': rng.randrange(5, 50),
+        'budget': rng.randrange(100_000, 10_000_000),
+        'suppliers': [{
+            'name': f'Supplier {rng.randrange(40)}',
+            'materials_provided': ', '.join(rng.sample(MATERIALS, 3)),
+            'reliability_score': round(rng.uniform(50, 100), 1),
+            'lead_time_days': rng.randrange(1, 30),
+        } for _ in range(3)],
+        'risks': [{
+            'title': f'Risk {i}',
+            'description': 'Synthetic risk',
+            'risk_level': rng.choice(RiskAnalysis.RISK_LEVEL_CHOICES)[0],
+            'risk_category': rng.choice(RiskAnalysis.RISK_CATEGORY_CHOICES)[0],
+            'probability': round(rng.random(), 2),
+            'impact': round(rng.uniform(0, 10), 1),
+            'mitigation_plan': 'Monitor weekly',
+            'is_resolved': rng.random() < 0.3,
+        } for i in range(risks)],
+        'timeline_events': [{
+            'key': i,
+            'title': f'Phase {i}',
+            'description': 'Synthetic phase',
+            'start_date': (start + timedelta(days=30 * i)).isoformat(),
+            'end_date': (start + timedelta(days=30 * i + 29)).isoformat(),
+            'completion_percentage': rng.choice([0, 25, 50, 100]),
+            'is_milestone': i % 3 == 2,
+            'dependencies': [i - 1] if i else [],
+        } for i in range(timeline_events)],
+    }
+
+
+def seed_portfolio(supervisors=2, projects=10, workers=20, workers_per_project=5, messages=50,
+                   risks=5, timeline_events=6, updates=3, password=DEFAULT_PASSWORD, seed=0):
+    """Create `projects` projects for each of `supervisors` supervisors; returns the created counts"""
+    rng = random.Random(seed)
+    supervisor_users = create_users('supervisor', supervisors, password)
+    worker_users = create_users('worker', workers, password)
+
+    created = []
+    for supervisor in supervisor_users:
+        records = [project_record(rng, len(created) + i, risks, timeline_events) for i in range(projects)]
+        created.extend(bulk.import_projects(records, supervisor))
+
+    with transaction.atomic():
+        assignments = [
+            ProjectWorker(project=project, worker=worker, role_description='Crew')
+            for project in created
+            for worker in rng.sample(worker_users, min(workers_per_project, len(worker_users)))
+        ]
+        ProjectWorker.objects.bulk_create(assignments)
+
+        rooms = dict(ChatRoom.objects.filter(project__in=created).values_list('project_id', 'pk'))
+        crews = {}
+        for assignment in assignments:
+            crews.setdefault(assignment.project_id, [assignment.project.supervisor]).append(assignment.worker)
+        rows = Message.objects.bulk_create([
+            Message(chat_room_id=rooms[project.pk], sender=rng.choice(crews.get(project.pk, [project.supervisor])),
+                    content=f'Status note {i}: {rng.choice(MATERIALS)} delivery on schedule')
+            for project in created
+            for i in range(messages)
+        ], batch_size=500)
+        posts = ProjectUpdate.objects.bulk_create([
+            ProjectUpdate(project=project, author=project.supervisor, title=f'Week {i} report',
+                          content=f'{rng.choice(MATERIALS).capitalize()} works {rng.randrange(10, 100)}% complete')
+            for project in created
+            for i in range(updates)
+        ], batch_size=500)
+
+        # Bulk writes skip the signals that keep these current
+        seeded = Project.objects.filter(pk__in=[project.pk for project in created])
+        reconcile(seeded)
+        counts = Message.objects.filter(chat_room__project=OuterRef('pk')).order_by().values('chat_room__project')
+        seeded.update(message_count=Coalesce(
+            Subquery(counts.annotate(n=Count('pk')).values('n')), Value(0)
+        ))
+        indexing.index_many(rows + posts)
+        vectors.index_many(rows + posts)
+    membership.invalidate(*[user.pk for user in supervisor_users + worker_users])
+
+    return {
+        'supervisors': len(supervisor_users),
+        'workers': len(worker_users),
+        'projects': len(created),
+        'assignments': len(assignments),
+        'messages': len(rows),
+        'updates': len(posts),
+    }
+
+
+def clear_portfolio():
+    """Delete every seeded user; their projects and rows cascade away"""
+    return User.objects.filter(username__startswith=f'{USERNAME_PREFIX}-').delete()[0]
@@ -0,0 +1,69 @@
+from django.test import LiveServerTestCase, TestCase, override_settings
+
+from chat.models import Message
+from projects.models import Project, ProjectWorker
+from . import runner, seed
+
+
+class SeedTests(TestCase):
+    def test_seeded_portfolio_has_consistent_counters(self):
+        counts = seed.seed_portfolio(supervisors=2, projects=3, workers=4, workers_per_project=2, messages=5)
+
+        self.assertEqual(counts['projects'], 6)
+        self.assertEqual(Message.objects.count(), 30)
+        for project in Project.objects.all():
+            self.assertEqual(project.message_count, 5)
+            self.assertEqual(project.current_worker_count, 2)
+            self.assertEqual(project.timeline_event_count, 6)
+            self.assertTrue(project.chat_room)
+
+    def test_seeding_is_deterministic(self):
+        seed.seed_portfolio(supervisors=1, projects=2, workers=3, messages=2, seed=7)
+        first = list(ProjectWorker.objects.order_by('pk').values_list('worker__username', flat=True))
+        seed.clear_portfolio()
+        seed.seed_portfolio(supervisors=1, projects=2, workers=3, messages=2, seed=7)
+        second = list(ProjectWorker.objects.order_by('pk').values_list('worker__username', flat=True))
+        self.assertEqual(first, second)
+
+
+class CompareTests(TestCase):
+    def test_regressions(self):
+        baseline = {
+            'project-list': {'status': 200, 'queries': 1, 'p95_ms': 20.0},
+            'project-detail': {'status': 200, 'queries': 7, 'p95_ms': 40.0},
+        }
+        results = {
+            'project-list': {'status': 200, 'queries': 2, 'p95_ms': 21.0, 'errors': 0},
+            'project-detail': {'status': 200, 'queries': 7, 'p95_ms': 75.0, 'errors': 0},
+            'project-workspace': {'status': 200, 'queries': 9, 'p95_ms': 90.0, 'errors': 0},
+        }
+        self.assertEqual(runner.compare(results, baseline, tolerance=0.5, slack_ms=10), [
+            'project-detail: p95 75.0ms (baseline 40.0ms)',
+            'project-list: 2 queries (baseline 1)',
+        ])
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(runner.percentile(values, 0.5), 50)
+        self.assertEqual(runner.percentile(values, 0.99), 99)
+        self.assertEqual(runner.percentile([3], 0.95), 3)
+
+
+# Committed seed data would otherwise be embedded into BASE_DIR/vector_index
+@override_settings(VECTOR_INDEX={'ENABLED': False})
+class BenchmarkRunTests(LiveServerTestCase):
+    def test_every_router_endpoint_is_driven(self):
+        seed.seed_portfolio(supervisors=1, projects=2, workers=3, workers_per_project=2, messages=3)
+        benchmark = runner.Benchmark(
+            self.live_server_url, seed.username('supervisor', 0), seed.DEFAULT_PASSWORD, requests=4, concurrency=2
+        )
+        results = benchmark.run()
+
+        list_routes = {name for name, _, _, detail in runner.routes() if not detail}
+        self.assertLessEqual(list_routes, set(results))
+        for name in ('project-list', 'project-detail', 'project-workspace', 'message-list'):
+            self.assertEqual(results[name]['status'], 200, name)
+            self.assertEqual(results[name]['errors'], 0, name)
+            self.assertEqual(results[name]['requests'], 4)
+            self.assertLessEqual(results[name]['p50_ms'], results[name]['p99_ms'])
+        self.assertEqual(results['project-list']['queries'], 1)
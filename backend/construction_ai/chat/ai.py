@@ -0,0 +1,44 @@
+from search import vectors
+from . import answers
+from .context import build_project_context
+from .llm import Prompt, complete, get_model
+
+FALLBACK_RESPONSE = "Sorry, I couldn't process your request due to an error. Please try again later."
+
+
+def build_prompt(user_message, project, history=''):
+    # Project context (fields, risks, timeline, suppliers, updates), cached per content version;
+    # `history` is the room's rolling summary plus its recent messages (see chat.summaries);
+    # the updates, risks, suppliers and messages closest to the question come from the vector index
+    references = [passage.text for passage in vectors.retrieve(project, user_message)]
+    return Prompt(
+        user_message, project, context=build_project_context(project), history=history, references=references
+    )
+
+
+def stream_ai_response(user_message, project, history=''):
+    """Yield the AI response in chunks as the model generates them"""
+    # Repeated questions on an unchanged project are answered from cache (see chat.answers)
+    key = answers.cache_key(project, user_message)
+    cached = answers.lookup(key)
+    if cached is not None:
+        yield cached
+        return
+    # Errors propagate so callers can retry (see chat.jobs) or fall back (see chat.replies)
+    chunks = []
+    for chunk in get_model().stream(build_prompt(user_message, project, history)):
+        chunks.append(chunk)
+        yield chunk
+    answers.store(key, ''.join(chunks))
+
+
+def get_ai_response(user_message, project, history=''):
+    """Generate AI response using LLM with project context and the room's conversation history"""
+    key = answers.cache_key(project, user_message)
+    cached = answers.lookup(key)
+    if cached is not None:
+        return cached
+    # Not streamed, so backends may batch it with other pending prompts (see chat.llm_client)
+    answer = complete(get_model(), build_prompt(user_message, project, history))
+    answers.store(key, answer)
+    return answer
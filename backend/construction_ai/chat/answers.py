@@ -0,0 +1,74 @@
+"""
+Cache of AI answers to repeated questions.
+
+Answers are cached per project under its ``content_version``, a fingerprint
+of the records retrieved for the question from the vector index and a
+normalized form of the question (case, Unicode form, punctuation and spacing
+ignored, so "What's the deadline?" and "what's the deadline" share an entry).
+Any change to the project's data bumps the content version, and a re-indexed
+or newly indexed record that retrieval would now return changes the
+fingerprint, so stale answers are never served; entries for old versions
+simply stop being read and age out. Plain chat messages are left out of the
+fingerprint: every question is indexed as one, so counting them would make
+each ask of a question miss the entry of the ask before.
+
+Entries live in their own cache alias (``AI_ANSWER_CACHE['CACHE_ALIAS']``),
+whose ``TIMEOUT`` and ``MAX_ENTRIES`` bound them; the local-memory backend
+evicts least recently used entries first. Conversation history is not part of
+the key: the cache is for standalone questions about the project, and
+``ENABLED`` turns it off where answers must follow the conversation. Lookups
+are counted in ``ai_answer_cache_requests_total`` (see metrics.registry).
+"""
+import hashlib
+import re
+import unicodedata
+
+from django.conf import settings
+from django.core.cache import caches
+
+from metrics.registry import registry
+from search import vectors
+
+DEFAULTS = {
+    'ENABLED': True,
+    'CACHE_ALIAS': 'ai_answers',
+}
+
+PUNCTUATION = re.compile(r"[^\w\s']+")
+
+
+def answer_cache_setting(name):
+    return getattr(settings, 'AI_ANSWER_CACHE', {}).get(name, DEFAULTS[name])
+
+
+def normalize_question(text):
+    """'What’s  the DEADLINE??' -> what's the deadline"""
+    text = unicodedata.normalize('NFKC', text or '').replace('’', "'").casefold()
+    return ' '.join(PUNCTUATION.sub(' ', text).split())
+
+
+def cache_key(project, question):
+    """None when the cache is off, which spares the retrieval"""
+    if not answer_cache_setting('ENABLED'):
+        return None
+    digest = hashlib.sha256(normalize_question(question).encode()).hexdigest()[:32]
+    records = vectors.fingerprint(vectors.retrieve(project, question, chatter=False))
+    return f'ai-answer:{project.pk}:{project.content_version}:{records}:{digest}'
+
+
+def get_cache():
+    return caches[answer_cache_setting('CACHE_ALIAS')]
+
+
+def lookup(key):
+    """The answer cached under `key` (see cache_key), or None; counts the hit or miss"""
+    if not answer_cache_setting('ENABLED'):
+        return None
+    answer = get_cache().get(key)
+    registry.increment('ai_answer_cache_requests_total', {'result': 'miss' if answer is None else 'hit'})
+    return answer
+
+
+def store(key, answer):
+    if answer_cache_setting('ENABLED') and answer:
+        get_cache().set(key, answer)
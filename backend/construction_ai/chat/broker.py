@@ -0,0 +1,202 @@
+"""
+Fan-out of new chat messages to streaming subscribers.
+
+A broker delivers events (``{"id": <message id>, "data": <serialized message>}``)
+for a chat room to every open stream on that room. The backend is chosen with
+``settings.CHAT_BROKER``:
+
+* ``DatabasePollingBroker`` (the default) is a local stand-in for a shared
+  pub/sub service: one poller per room per process reads new rows from the
+  ``Message`` table and fans them out, so every process sees every message no
+  matter which one wrote it. AI replies are written by ``run_chat_worker``, a
+  separate process, so streams need a broker that works across processes.
+* ``InProcessBroker`` pushes published events straight into subscriber queues.
+  It is the fastest option but only reaches streams served by the same process,
+  so it misses worker replies; use it only where nothing else writes messages.
+"""
+import asyncio
+import logging
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """A single stream's view of a room, used as an async context manager"""
+
+    def __init__(self, broker, room_id, maxsize):
+        self.broker = broker
+        self.room_id = room_id
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.loop = None
+        self.overflowed = False
+
+    async def __aenter__(self):
+        self.loop = asyncio.get_running_loop()
+        await self.broker.add_subscription(self)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.broker.remove_subscription(self)
+
+    def deliver(self, event):
+        """Queue an event; safe to call from any thread"""
+        if self.loop is None or self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A slow client is cut off rather than buffering without bound;
+            # it reconnects and resumes from its last event id.
+            self.overflowed = True
+
+    async def get(self, timeout):
+        """Next event, or None if nothing arrived within `timeout` seconds"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class BaseBroker:
+    queue_size = 500
+
+    def __init__(self, queue_size=None, **options):
+        if queue_size is not None:
+            self.queue_size = queue_size
+        self._rooms = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, room_id):
+        return Subscription(self, room_id, self.queue_size)
+
+    async def add_subscription(self, subscription):
+        with self._lock:
+            self._rooms.setdefault(subscription.room_id, set()).add(subscription)
+
+    async def remove_subscription(self, subscription):
+        with self._lock:
+            subscribers = self._rooms.get(subscription.room_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._rooms[subscription.room_id]
+
+    def subscribers(self, room_id):
+        with self._lock:
+            return list(self._rooms.get(room_id, ()))
+
+    def fan_out(self, room_id, event):
+        for subscription in self.subscribers(room_id):
+            subscription.deliver(event)
+
+    def publish(self, room_id, make_event):
+        """
+        Called after a message is committed. `make_event` builds its event; it is
+        only called by brokers that deliver published events, and only when the
+        room has subscribers, so other writes never pay for serializing.
+        """
+        raise NotImplementedError
+
+
+class InProcessBroker(BaseBroker):
+    """Delivers published events directly to subscribers in this process"""
+
+    def publish(self, room_id, make_event):
+        subscribers = self.subscribers(room_id)
+        if subscribers:
+            event = make_event()
+            for subscription in subscribers:
+                subscription.deliver(event)
+
+
+class DatabasePollingBroker(BaseBroker):
+    """
+    Polls the message table once per room per process and fans out new rows.
+
+    Publishing is a no-op because the committed row itself is the event.
+    """
+    poll_interval = 1.0
+
+    def __init__(self, poll_interval=None, **options):
+        super().__init__(**options)
+        if poll_interval is not None:
+            self.poll_interval = poll_interval
+        self._pollers = {}
+
+    def publish(self, room_id, make_event):
+        pass
+
+    async def add_subscription(self, subscription):
+        await super().add_subscription(subscription)
+        poller = self._pollers.get(subscription.room_id)
+        if poller is None or poller.done():
+            last_id = await sync_to_async(self._latest_id)(subscription.room_id)
+            self._pollers[subscription.room_id] = asyncio.create_task(
+                self._poll(subscription.room_id, last_id)
+            )
+
+    async def remove_subscription(self, subscription):
+        await super().remove_subscription(subscription)
+        if not self.subscribers(subscription.room_id):
+            poller = self._pollers.pop(subscription.room_id, None)
+            if poller is not None:
+                poller.cancel()
+
+    async def _poll(self, room_id, last_id):
+        while self.subscribers(room_id):
+            await asyncio.sleep(self.poll_interval)
+            try:
+                events = await sync_to_async(self._events_after)(room_id, last_id)
+            except Exception:
+                logger.exception("Polling chat room %s failed", room_id)
+                continue
+            for event in events:
+                last_id = event['id']
+                self.fan_out(room_id, event)
+
+    @staticmethod
+    def _latest_id(room_id):
+        from .models import Message
+        return Message.objects.filter(chat_room_id=room_id).order_by('-id').values_list('id', flat=True).first() or 0
+
+    @staticmethod
+    def _events_after(room_id, last_id):
+        return message_events(room_id, last_id)
+
+
+def message_event(message):
+    from .serializers import MessageSerializer
+    return {'id': message.pk, 'data': MessageSerializer(message).data}
+
+
+def message_events(room_id, after_id, limit=None):
+    """Events for messages in a room with an id greater than `after_id`"""
+    from .models import Message
+    messages = Message.objects.filter(chat_room_id=room_id, id__gt=after_id).select_related('sender').order_by('id')
+    if limit is not None:
+        messages = messages[:limit]
+    return [message_event(message) for message in messages]
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Return the process-wide broker configured by settings.CHAT_BROKER"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                config = getattr(settings, 'CHAT_BROKER', {})
+                backend = import_string(config.get('BACKEND', 'chat.broker.DatabasePollingBroker'))
+                _broker = backend(**config.get('OPTIONS', {}))
+    return _broker
@@ -0,0 +1,130 @@
+"""
+Project context for AI prompts.
+
+The context covers the project's own fields plus its open risks, timeline,
+suppliers and recent updates, trimmed to ``AI_CONTEXT['MAX_CHARS']``. Sections
+are added in priority order, so when the budget runs out the least important
+detail is dropped first. The result is cached under the project's
+``content_version``; repeated chat turns on an unchanged project cost no queries.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from projects.models import ProjectSupplier, ProjectTimeline, ProjectUpdate, RiskAnalysis
+
+DEFAULTS = {
+    'MAX_CHARS': 4000,
+    'ITEMS_PER_SECTION': 10,
+    'MAX_FIELD_CHARS': 400,
+    'CACHE_TIMEOUT': 60 * 60,
+}
+
+
+def context_setting(name):
+    return getattr(settings, 'AI_CONTEXT', {}).get(name, DEFAULTS[name])
+
+
+def clip(text, limit=None):
+    """Collapse whitespace and cut `text` to `limit` characters"""
+    limit = limit or context_setting('MAX_FIELD_CHARS')
+    text = ' '.join((text or '').split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + '…'
+
+
+def project_section(project):
+    lines = [
+        f"Project: {project.title}",
+        f"Description: {clip(project.description)}",
+        f"Status: {project.status}",
+        f"Location: {project.location}",
+        f"Timeline: {project.start_date} to {project.end_date}",
+        f"Workers: {project.current_worker_count} assigned of {project.estimated_workers} estimated",
+        f"Budget: {project.budget} (spent {project.current_spending})",
+    ]
+    for label, value in [
+        ("Risk Assessment", project.risk_assessment),
+        ("Mitigation Strategies", project.mitigation_strategies),
+        ("Supply Chain Requirements", project.supply_chain_requirements),
+        ("Resource Allocation", project.resource_allocation),
+        ("Equipment Requirements", project.equipment_requirements),
+        ("Technical Details", project.detailed_description),
+    ]:
+        if value:
+            lines.append(f"{label}: {clip(value)}")
+    return lines
+
+
+def risk_section(project, limit):
+    risks = (
+        RiskAnalysis.objects.filter(project=project, is_resolved=False)
+        .order_by('-exposure', 'id')[:limit]
+    )
+    return [
+        f"- [{risk.risk_level}/{risk.risk_category}] {risk.title} "
+        f"(p={risk.probability:g}, impact={risk.impact:g}): {clip(risk.description, 200)} "
+        f"Mitigation: {clip(risk.mitigation_plan, 200)}"
+        for risk in risks
+    ]
+
+
+def timeline_section(project, limit):
+    events = ProjectTimeline.objects.filter(project=project, completion_percentage__lt=100).order_by('start_date', 'id')[:limit]
+    return [
+        f"- {'Milestone' if event.is_milestone else 'Task'}: {event.title} "
+        f"{event.start_date} to {event.end_date}, {event.completion_percentage}% complete"
+        for event in events
+    ]
+
+
+def supplier_section(project, limit):
+    suppliers = ProjectSupplier.objects.filter(project=project).order_by('-reliability_score', 'lead_time_days')[:limit]
+    return [
+        f"- {supplier.name}: {clip(supplier.materials_provided, 150)} "
+        f"(reliability {supplier.reliability_score:g}, lead time {supplier.lead_time_days} days)"
+        for supplier in suppliers
+    ]
+
+
+def update_section(project, limit):
+    updates = ProjectUpdate.objects.filter(project=project).order_by('-created_at')[:limit]
+    return [
+        f"- {update.created_at:%Y-%m-%d} {update.title}: {clip(update.content, 200)}"
+        for update in updates
+    ]
+
+
+SECTIONS = [
+    (None, project_section),
+    ("Open Risks (highest exposure first)", risk_section),
+    ("Upcoming Timeline", timeline_section),
+    ("Suppliers", supplier_section),
+    ("Recent Updates", update_section),
+]
+
+
+def assemble(project, max_chars, limit):
+    parts = []
+    used = 0
+    for heading, build in SECTIONS:
+        lines = build(project) if heading is None else build(project, limit)
+        if not lines:
+            continue
+        if heading:
+            lines = [f"{heading}:"] + lines
+        for line in lines:
+            if used + len(line) + 1 > max_chars:
+                return '\n'.join(parts)
+            parts.append(line)
+            used += len(line) + 1
+    return '\n'.join(parts)
+
+
+def build_project_context(project, max_chars=None):
+    """Prompt context for `project`, cached per content version"""
+    max_chars = max_chars or context_setting('MAX_CHARS')
+    key = f'project-context:{project.pk}:{project.content_version}:{max_chars}'
+    context = cache.get(key)
+    if context is None:
+        context = assemble(project, max_chars, context_setting('ITEMS_PER_SECTION'))
+        cache.set(key, context, context_setting('CACHE_TIMEOUT'))
+    return context
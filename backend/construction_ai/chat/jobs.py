@@ -0,0 +1,171 @@
+"""
+Database-backed job queue for chat work that must not run inside a request.
+
+Jobs are claimed with a conditional UPDATE (``status='pending'`` -> ``'running'``)
+so several worker processes can drain the queue without row locks, which keeps
+it portable between SQLite and PostgreSQL. Within a chat room jobs of a kind run
+strictly in id order: a job is only eligible while it is the oldest unfinished
+job of its kind in its room, so replies never overtake each other even with many
+workers. Each kind is its own lane, so a slow or retrying ``summarize`` job
+never holds up the room's next reply.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from . import summaries
+from .ai import FALLBACK_RESPONSE, get_ai_response
+from .models import ChatJob, Message
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'CONCURRENCY': 4,
+    'MAX_ATTEMPTS': 3,
+    'RETRY_BACKOFF_SECONDS': 5,
+    'POLL_INTERVAL_SECONDS': 1.0,
+    'LEASE_SECONDS': 300,
+}
+
+
+def worker_setting(name):
+    return getattr(settings, 'CHAT_WORKER', {}).get(name, DEFAULTS[name])
+
+
+def enqueue_ai_reply(message):
+    """Queue an AI reply to `message`; returns the job used as the pending-reply handle"""
+    return ChatJob.objects.create(
+        kind='ai_reply',
+        chat_room_id=message.chat_room_id,
+        message=message,
+        run_after=timezone.now(),
+    )
+
+
+def eligible_jobs(now=None):
+    """Pending jobs that are due and are the oldest unfinished job of their kind in their room"""
+    now = now or timezone.now()
+    oldest_open = (
+        ChatJob.objects.filter(chat_room=OuterRef('chat_room'), kind=OuterRef('kind'), status__in=['pending', 'running'])
+        .order_by('id')
+        .values('id')[:1]
+    )
+    return ChatJob.objects.filter(
+        status='pending', run_after__lte=now, id=Subquery(oldest_open)
+    ).order_by('run_after', 'id')
+
+
+def claim_jobs(worker_id, limit):
+    """Atomically claim up to `limit` eligible jobs for this worker"""
+    claimed = []
+    for job_id in eligible_jobs().values_list('id', flat=True)[:limit]:
+        now = timezone.now()
+        won = ChatJob.objects.filter(id=job_id, status='pending').update(
+            status='running', locked_by=worker_id, locked_at=now, updated_at=now
+        )
+        if won:
+            claimed.append(job_id)
+    return claimed
+
+
+def release_expired_leases():
+    """Return jobs held by crashed workers to the queue"""
+    expired = timezone.now() - timedelta(seconds=worker_setting('LEASE_SECONDS'))
+    return ChatJob.objects.filter(status='running', locked_at__lt=expired).update(
+        status='pending', locked_by='', locked_at=None
+    )
+
+
+def run_job(job_id):
+    """Execute one claimed job, scheduling a retry or failing it on error"""
+    job = ChatJob.objects.select_related('chat_room__project', 'message').get(id=job_id)
+    handler = HANDLERS[job.kind]
+    try:
+        handler(job)
+    except Exception as exc:
+        logger.exception("Chat job %s failed (attempt %s)", job.pk, job.attempts + 1)
+        fail_or_retry(job, exc)
+
+
+def fail_or_retry(job, exc):
+    job.attempts += 1
+    job.last_error = f"{type(exc).__name__}: {exc}"
+    job.locked_by = ''
+    job.locked_at = None
+    if job.attempts >= worker_setting('MAX_ATTEMPTS'):
+        job.status = 'failed'
+        on_failure = FAILURE_HANDLERS.get(job.kind)
+        if on_failure:
+            on_failure(job)
+    else:
+        job.status = 'pending'
+        backoff = worker_setting('RETRY_BACKOFF_SECONDS') * 2 ** (job.attempts - 1)
+        job.run_after = timezone.now() + timedelta(seconds=backoff)
+    job.save()
+
+
+def complete(job, result_message=None):
+    job.status = 'done'
+    job.attempts += 1
+    job.result_message = result_message
+    job.locked_by = ''
+    job.locked_at = None
+    job.save()
+
+
+def handle_ai_reply(job):
+    user_message = job.message
+    project = job.chat_room.project
+    # Summary plus recent tail, never the whole room (see chat.summaries)
+    history = summaries.render_history(job.chat_room, before_id=user_message.pk)
+    ai_response = get_ai_response(user_message.content, project, history=history)
+    with transaction.atomic():
+        reply = Message.objects.create(
+            sender_id=user_message.sender_id,  # Using same sender but marking as AI response
+            chat_room=job.chat_room,
+            content=ai_response,
+            is_ai_response=True
+        )
+        complete(job, reply)
+    summaries.schedule(job.chat_room)
+
+
+def handle_summarize(job):
+    summaries.catch_up(job.chat_room_id)
+    complete(job)
+
+
+def handle_ai_reply_failure(job):
+    """Post the apology the synchronous endpoint used to return"""
+    job.result_message = Message.objects.create(
+        sender_id=job.message.sender_id,
+        chat_room=job.chat_room,
+        content=FALLBACK_RESPONSE,
+        is_ai_response=True
+    )
+
+
+HANDLERS = {
+    'ai_reply': handle_ai_reply,
+    'summarize': handle_summarize,
+}
+
+FAILURE_HANDLERS = {
+    'ai_reply': handle_ai_reply_failure,
+}
+
+
+def drain(worker_id='inline', limit=100):
+    """Claim and run due jobs in this thread until none are eligible (used by tests and --once)"""
+    processed = 0
+    while processed < limit:
+        job_ids = claim_jobs(worker_id, 1)
+        if not job_ids:
+            break
+        run_job(job_ids[0])
+        processed += 1
+    return processed
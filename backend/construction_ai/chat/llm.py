@@ -0,0 +1,100 @@
+"""
+Language model backends for the assistant.
+
+A backend turns a ``Prompt`` into a stream of text chunks: ``stream(prompt)``
+returns an iterator, so callers can forward tokens as they are generated or
+join them into a complete answer. Backends may also offer ``complete(prompt)``
+for callers that only want the whole answer (e.g. to batch prompts; see
+``chat.llm_client``). ``AI_MODEL['BACKEND']`` names the backend
+class and ``AI_MODEL['OPTIONS']`` its keyword arguments; one instance per
+configuration is kept for the life of the process.
+
+``FakeStreamingModel`` is a deterministic local stand-in that needs no network,
+for development, tests and benchmarks; its ``token_delay_seconds`` option
+simulates generation speed.
+"""
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+DEFAULTS = {
+    'BACKEND': 'chat.llm.FakeStreamingModel',
+    'OPTIONS': {},
+}
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def model_setting(name):
+    return getattr(settings, 'AI_MODEL', {}).get(name, DEFAULTS[name])
+
+
+class Prompt:
+    """What the assistant is asked, with the context it answers from"""
+
+    def __init__(self, question, project, context='', history='', references=()):
+        self.question = question
+        self.project = project
+        self.context = context
+        self.history = history
+        # Passages retrieved for this question (see search.vectors)
+        self.references = list(references)
+
+    def render(self):
+        parts = [
+            "You are the assistant for a construction project. Answer from the project "
+            "information and conversation below; say so when they don't cover the question.",
+            "Project information:\n" + self.context,
+        ]
+        if self.references:
+            parts.append("Relevant project records:\n" + '\n'.join(f"- {text}" for text in self.references))
+        if self.history:
+            parts.append(self.history)
+        parts.append(f"Question: {self.question}")
+        return '\n\n'.join(parts)
+
+
+class FakeStreamingModel:
+    """Streams a canned, prompt-dependent answer word by word"""
+
+    def __init__(self, token_delay_seconds=0.0):
+        self.token_delay_seconds = token_delay_seconds
+
+    def answer(self, prompt):
+        project = prompt.project
+        return (
+            f"Based on the project '{project.title}', I can assist with your query.\n\n"
+            f"You asked: {prompt.question}\n\n"
+            f"Here's my analysis: This project is currently in {project.status} phase "
+            f"with a timeline from {project.start_date} to {project.end_date}. "
+            f"I'll analyze this within the context of construction best practices, "
+            f"risk management, and resource optimization."
+        )
+
+    def stream(self, prompt):
+        for token in re.findall(r'\S+\s*|\s+', self.answer(prompt)):
+            if self.token_delay_seconds:
+                time.sleep(self.token_delay_seconds)
+            yield token
+
+
+def get_model():
+    """The configured backend, created once per configuration"""
+    backend, options = model_setting('BACKEND'), model_setting('OPTIONS')
+    key = (backend, repr(sorted(options.items())))
+    with _models_lock:
+        model = _models.get(key)
+        if model is None:
+            model = _models[key] = import_string(backend)(**options)
+    return model
+
+
+def complete(model, prompt):
+    """The whole answer from `model`, through its complete() when it has one"""
+    if hasattr(model, 'complete'):
+        return model.complete(prompt)
+    return ''.join(model.stream(prompt))
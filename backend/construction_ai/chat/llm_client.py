@@ -0,0 +1,246 @@
+"""
+HTTP language model backend.
+
+``OpenAICompatibleModel`` talks to any server implementing the OpenAI-style
+``POST /v1/completions`` endpoint (vLLM, llama.cpp, text-generation-inference,
+the hosted APIs, or ``manage.py run_llm_stub`` offline). Selecting it is a
+matter of settings::
+
+    AI_MODEL = {'BACKEND': 'chat.llm_client.OpenAICompatibleModel', 'OPTIONS': {}}
+
+with connection details in ``LLM_CLIENT`` (``OPTIONS`` overrides any of them).
+
+One instance lives per process (see ``chat.llm.get_model``). It holds a
+keep-alive ``requests.Session`` whose pool is sized to ``POOL_SIZE``, so
+prompts reuse warm connections. Every call has separate connect and read
+timeouts. Connection errors, timeouts, 429 and 5xx responses are retried
+``MAX_RETRIES`` times with exponential backoff and jitter; a stream is only
+retried before its first token has been forwarded.
+
+Calls take a slot from a global cap (``MAX_CONCURRENCY``) and from their
+project's cap (``MAX_PER_PROJECT``), so one busy project can't starve the
+others. A caller that can't get a slot within ``QUEUE_TIMEOUT`` gets
+``LLMBusy``, which the reply job retries later.
+
+With ``BATCHING`` on, complete (non-streamed) prompts that arrive within
+``BATCH_WINDOW_MS`` of each other are sent together as one request with a
+list ``prompt``, up to ``MAX_BATCH_SIZE`` at a time. This is only for servers
+that accept list prompts.
+"""
+import json
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+DEFAULTS = {
+    'BASE_URL': 'http://127.0.0.1:8089',
+    'MODEL': 'stub',
+    'API_KEY': '',
+    'MAX_TOKENS': 512,
+    'CONNECT_TIMEOUT': 3.05,
+    'READ_TIMEOUT': 60,
+    'MAX_RETRIES': 2,
+    'BACKOFF_SECONDS': 0.5,
+    'POOL_SIZE': 16,
+    'MAX_CONCURRENCY': 8,
+    'MAX_PER_PROJECT': 2,
+    'QUEUE_TIMEOUT': 30,
+    'BATCHING': False,
+    'BATCH_WINDOW_MS': 10,
+    'MAX_BATCH_SIZE': 8,
+}
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """The model server could not produce an answer"""
+
+
+class LLMBusy(LLMError):
+    """No concurrency slot became free within QUEUE_TIMEOUT"""
+
+
+class ConcurrencyLimiter:
+    """A global semaphore plus one per project, acquired together"""
+
+    def __init__(self, global_limit, per_key_limit):
+        self.global_slots = threading.BoundedSemaphore(global_limit)
+        self.per_key_limit = per_key_limit
+        self.key_slots = {}
+        self.lock = threading.Lock()
+
+    def semaphore(self, key):
+        with self.lock:
+            if key not in self.key_slots:
+                self.key_slots[key] = threading.BoundedSemaphore(self.per_key_limit)
+            return self.key_slots[key]
+
+    def acquire(self, key, timeout, use_global=True):
+        """Take the key's slot (and a global one); returns a release callable or raises LLMBusy"""
+        deadline = time.monotonic() + timeout
+        held = []
+        for semaphore in ([self.semaphore(key)] if key is not None else []) + ([self.global_slots] if use_global else []):
+            if not semaphore.acquire(timeout=max(0, deadline - time.monotonic())):
+                for taken in held:
+                    taken.release()
+                raise LLMBusy(f"No model slot free within {timeout}s")
+            held.append(semaphore)
+
+        def release():
+            for semaphore in held:
+                semaphore.release()
+        return release
+
+
+class MicroBatcher:
+    """Collects prompts for a short window and sends them as one request"""
+
+    def __init__(self, send, window_seconds, max_size):
+        self.send = send
+        self.window_seconds = window_seconds
+        self.max_size = max_size
+        self.pending = []
+        self.timer = None
+        self.lock = threading.Lock()
+
+    def submit(self, text):
+        future = Future()
+        with self.lock:
+            self.pending.append((text, future))
+            batch = self.take() if len(self.pending) >= self.max_size else None
+            if batch is None and self.timer is None:
+                self.timer = threading.Timer(self.window_seconds, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+        if batch:
+            self.run(batch)
+        return future
+
+    def take(self):
+        batch, self.pending = self.pending, []
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        return batch
+
+    def flush(self):
+        with self.lock:
+            batch = self.take()
+        if batch:
+            self.run(batch)
+
+    def run(self, batch):
+        try:
+            texts = self.send([text for text, _ in batch])
+            if len(texts) != len(batch):
+                # Can't tell which answer belongs to which prompt, and no caller may wait forever
+                raise LLMError(f"Model answered {len(texts)} completions for {len(batch)} prompts")
+        except Exception as exc:
+            for _, future in batch:
+                future.set_exception(exc)
+        else:
+            for (_, future), text in zip(batch, texts):
+                future.set_result(text)
+
+
+class OpenAICompatibleModel:
+    def __init__(self, **options):
+        self.options = {**DEFAULTS, **getattr(settings, 'LLM_CLIENT', {}), **options}
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.options['POOL_SIZE'], max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if self.options['API_KEY']:
+            self.session.headers['Authorization'] = f"Bearer {self.options['API_KEY']}"
+        self.limiter = ConcurrencyLimiter(self.options['MAX_CONCURRENCY'], self.options['MAX_PER_PROJECT'])
+        self.batcher = MicroBatcher(
+            self.send_batch, self.options['BATCH_WINDOW_MS'] / 1000, self.options['MAX_BATCH_SIZE']
+        ) if self.options['BATCHING'] else None
+
+    @property
+    def url(self):
+        return self.options['BASE_URL'].rstrip('/') + '/v1/completions'
+
+    @property
+    def timeout(self):
+        return (self.options['CONNECT_TIMEOUT'], self.options['READ_TIMEOUT'])
+
+    def payload(self, prompt, stream):
+        return {'model': self.options['MODEL'], 'prompt': prompt, 'max_tokens': self.options['MAX_TOKENS'], 'stream': stream}
+
+    def backoff(self, attempt):
+        base = self.options['BACKOFF_SECONDS'] * 2 ** attempt
+        time.sleep(base + random.uniform(0, base / 2))
+
+    def post(self, payload, stream=False):
+        """POST with retries on connection errors, timeouts, 429 and 5xx; returns the open response"""
+        for attempt in range(self.options['MAX_RETRIES'] + 1):
+            last = attempt == self.options['MAX_RETRIES']
+            try:
+                response = self.session.post(self.url, json=payload, stream=stream, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as exc:
+                if last:
+                    raise LLMError(f"Model server unreachable: {exc}") from exc
+            else:
+                if response.status_code < 400:
+                    return response
+                response.close()
+                if response.status_code not in RETRY_STATUSES or last:
+                    raise LLMError(f"Model server answered HTTP {response.status_code}")
+            self.backoff(attempt)
+
+    def send_batch(self, texts):
+        """Complete several prompts in one request (global slot only; callers hold their project's)"""
+        release = self.limiter.acquire(None, self.options['QUEUE_TIMEOUT'])
+        try:
+            response = self.post(self.payload(texts if len(texts) > 1 else texts[0], stream=False))
+            try:
+                choices = sorted(response.json()['choices'], key=lambda choice: choice.get('index', 0))
+                return [choice['text'] for choice in choices]
+            except (ValueError, KeyError, TypeError, AttributeError) as exc:
+                raise LLMError("Malformed completion response") from exc
+        finally:
+            release()
+
+    def complete(self, prompt):
+        """The whole answer at once; batched with concurrent prompts when BATCHING is on"""
+        project_id = getattr(prompt.project, 'pk', None)
+        if self.batcher is None:
+            return ''.join(self.stream(prompt))
+        release = self.limiter.acquire(project_id, self.options['QUEUE_TIMEOUT'], use_global=False)
+        try:
+            future = self.batcher.submit(prompt.render())
+            wait = self.options['QUEUE_TIMEOUT'] + self.options['READ_TIMEOUT'] * (self.options['MAX_RETRIES'] + 1)
+            return future.result(timeout=wait)
+        finally:
+            release()
+
+    def stream(self, prompt):
+        project_id = getattr(prompt.project, 'pk', None)
+        release = self.limiter.acquire(project_id, self.options['QUEUE_TIMEOUT'])
+        try:
+            response = self.post(self.payload(prompt.render(), stream=True), stream=True)
+            with response:
+                try:
+                    done = False
+                    # Read to the end even after [DONE] so the connection goes back to the pool
+                    for line in response.iter_lines(decode_unicode=True):
+                        if done or not line.startswith('data: '):
+                            continue
+                        data = line[len('data: '):]
+                        if data == '[DONE]':
+                            done = True
+                            continue
+                        text = json.loads(data)['choices'][0].get('text', '')
+                        if text:
+                            yield text
+                except (requests.RequestException, ValueError, KeyError) as exc:
+                    raise LLMError(f"Model stream broke off: {exc}") from exc
+        finally:
+            release()
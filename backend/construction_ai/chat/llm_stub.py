@@ -0,0 +1,102 @@
+"""
+Local stand-in for an OpenAI-compatible completions server.
+
+Serves ``POST /v1/completions`` with deterministic answers, so the HTTP client
+(``chat.llm_client``) can be exercised and benchmarked without a model or a
+network. ``latency`` is added to every request (time to first token),
+``token_delay`` between streamed tokens. ``fail_next`` makes the next N
+requests answer 503, for exercising retries. List prompts are answered in one
+response, like servers that batch.
+
+Keep-alive (HTTP/1.1) is supported; streamed answers use chunked transfer
+encoding so connections are reused for them as well.
+"""
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def stub_answer(prompt):
+    question = prompt.rsplit('Question:', 1)[-1].strip()
+    return f"Stub answer to '{question}' from {len(prompt.split())} words of prompt."
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        with server.lock:
+            server.requests.append({'client_port': self.client_address[1], 'body': body})
+            failing = server.fail_next > 0
+            server.fail_next -= failing
+
+        if self.path != '/v1/completions':
+            return self.reply(404, {'error': 'not found'})
+        if failing:
+            return self.reply(503, {'error': 'overloaded'})
+        time.sleep(server.latency)
+
+        prompts = body.get('prompt', '')
+        if isinstance(prompts, list):
+            answers = [stub_answer(prompt) for prompt in prompts]
+            return self.reply(200, {'choices': [{'index': i, 'text': text} for i, text in enumerate(answers)]})
+        answer = stub_answer(prompts)
+        if not body.get('stream'):
+            return self.reply(200, {'choices': [{'index': 0, 'text': answer}]})
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for token in answer.split(' '):
+            time.sleep(server.token_delay)
+            self.write_chunk(f"data: {json.dumps({'choices': [{'index': 0, 'text': token + ' '}]})}\n\n")
+        self.write_chunk("data: [DONE]\n\n")
+        self.wfile.write(b'0\r\n\r\n')
+
+    def write_chunk(self, text):
+        data = text.encode()
+        self.wfile.write(f'{len(data):x}\r\n'.encode() + data + b'\r\n')
+        self.wfile.flush()
+
+    def reply(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that time out or stop reading mid-stream are expected here
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+
+def make_server(host='127.0.0.1', port=8089, latency=0.0, token_delay=0.0):
+    """A stub server (port 0 picks a free one); call serve_forever() or use start()"""
+    server = StubServer((host, port), StubHandler)
+    server.latency = latency
+    server.token_delay = token_delay
+    server.fail_next = 0
+    server.requests = []
+    server.lock = threading.Lock()
+    return server
+
+
+def start(**kwargs):
+    """Run a stub server in a background thread; returns it (stop with shutdown())"""
+    server = make_server(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,53 @@
+import os
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from chat import jobs
+
+
+class Command(BaseCommand):
+    help = "Drain the chat job queue (AI replies) with a pool of worker threads"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=jobs.worker_setting('CONCURRENCY'),
+                            help="Number of jobs to run in parallel")
+        parser.add_argument('--poll-interval', type=float, default=jobs.worker_setting('POLL_INTERVAL_SECONDS'),
+                            help="Seconds to sleep when the queue is empty")
+        parser.add_argument('--once', action='store_true',
+                            help="Exit once no eligible jobs are left instead of polling forever")
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.stdout.write(f"Chat worker {worker_id} started with concurrency {concurrency}")
+
+        running = set()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            try:
+                while True:
+                    jobs.release_expired_leases()
+                    free = concurrency - len(running)
+                    job_ids = jobs.claim_jobs(worker_id, free) if free else []
+                    for job_id in job_ids:
+                        running.add(pool.submit(self.run, job_id))
+
+                    if running:
+                        # Wake up as soon as a slot frees up or the poll interval passes
+                        _, running = wait(running, timeout=options['poll_interval'], return_when=FIRST_COMPLETED)
+                        running = set(running)
+                    elif options['once']:
+                        break
+                    else:
+                        time.sleep(options['poll_interval'])
+            except KeyboardInterrupt:
+                self.stdout.write("Stopping chat worker, waiting for running jobs")
+
+    def run(self, job_id):
+        try:
+            jobs.run_job(job_id)
+        finally:
+            close_old_connections()
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from chat import llm_stub
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve a local OpenAI-compatible completions stub for offline development and benchmarks "
+        "(point LLM_CLIENT['BASE_URL'] at it)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8089)
+        parser.add_argument('--latency-ms', type=float, default=200, help="Added to every request")
+        parser.add_argument('--token-delay-ms', type=float, default=20, help="Between streamed tokens")
+
+    def handle(self, *args, **options):
+        server = llm_stub.make_server(
+            options['host'], options['port'],
+            latency=options['latency_ms'] / 1000, token_delay=options['token_delay_ms'] / 1000,
+        )
+        self.stdout.write(f"LLM stub listening on http://{options['host']}:{server.server_port}/v1/completions")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F
+
+from chat import summaries
+from chat.models import ChatRoom
+
+
+class Command(BaseCommand):
+    help = (
+        "Fold older messages of chat rooms into their rolling summaries (see chat.summaries). "
+        "Run it once after the summary migration to backfill existing rooms."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('room_ids', nargs='*', type=int, help="Only summarize these rooms")
+
+    def handle(self, *args, **options):
+        rooms = ChatRoom.objects.all()
+        if options['room_ids']:
+            rooms = rooms.filter(pk__in=options['room_ids'])
+        else:
+            # Rooms with more unsummarized messages than the verbatim tail
+            rooms = rooms.annotate(backlog=F('project__message_count') - F('summarized_count')).filter(
+                backlog__gt=summaries.summary_setting('RECENT_MESSAGES')
+            )
+        total = 0
+        room_ids = list(rooms.order_by('pk').values_list('pk', flat=True))
+        for room_id in room_ids:
+            total += summaries.catch_up(room_id)
+        self.stdout.write(self.style.SUCCESS(f"Folded {total} message(s) into the summaries of {len(room_ids)} room(s)"))
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 16:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0003_message_room_created_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChatJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('ai_reply', 'AI Reply')], default='ai_reply', max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('run_after', models.DateTimeField(help_text='Earliest time the job may run (pushed back on retry)')),
+                ('locked_by', models.CharField(blank=True, default='', max_length=100)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('chat_room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='jobs', to='chat.chatroom')),
+                ('message', models.ForeignKey(blank=True, help_text='Message that triggered the job', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='jobs', to='chat.message')),
+                ('result_message', models.ForeignKey(blank=True, help_text='Message produced by the job', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='chat.message')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='chat_job_status_idx'), models.Index(fields=['chat_room', 'status'], name='chat_job_room_status_idx')],
+            },
+        ),
+    ]
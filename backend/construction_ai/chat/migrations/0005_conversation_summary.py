@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0004_chatjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatroom',
+            name='summarized_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='summary',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='summary_updated_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='summary_watermark',
+            field=models.PositiveBigIntegerField(default=0, editable=False, help_text='Id of the newest message folded into the summary'),
+        ),
+        migrations.AlterField(
+            model_name='chatjob',
+            name='kind',
+            field=models.CharField(choices=[('ai_reply', 'AI Reply'), ('summarize', 'Summarize Conversation')], default='ai_reply', max_length=20),
+        ),
+    ]
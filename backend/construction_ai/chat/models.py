@@ -5,6 +5,11 @@ from projects.models import Project
 class ChatRoom(models.Model):
     project = models.OneToOneField(Project, on_delete=models.CASCADE, related_name='chat_room')
     created_at = models.DateTimeField(auto_now_add=True)
+    # Rolling summary of older messages for AI prompts, maintained by chat.summaries
+    summary = models.TextField(blank=True, default='', editable=False)
+    summary_watermark = models.PositiveBigIntegerField(default=0, editable=False, help_text="Id of the newest message folded into the summary")
+    summarized_count = models.PositiveIntegerField(default=0, editable=False)
+    summary_updated_at = models.DateTimeField(null=True, blank=True, editable=False)
     
     def __str__(self):
         return f"Chat for {self.project.title}"
@@ -19,6 +24,47 @@ class Message(models.Model):
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Supports keyset pagination of a room's history on (created_at, id)
+            models.Index(fields=['chat_room', 'created_at', 'id'], name='chat_msg_room_created_idx'),
+        ]
     
     def __str__(self):
-        return f"{self.sender.username}: {self.content[:50]}"
\ No newline at end of file
+        return f"{self.sender.username}: {self.content[:50]}"
+
+class ChatJob(models.Model):
+    """Durable background job for chat work (drained by `manage.py run_chat_worker`)"""
+    KIND_CHOICES = (
+        ('ai_reply', 'AI Reply'),
+        ('summarize', 'Summarize Conversation'),
+    )
+    
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+    
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='ai_reply')
+    chat_room = models.ForeignKey(ChatRoom, on_delete=models.CASCADE, related_name='jobs')
+    message = models.ForeignKey(Message, on_delete=models.CASCADE, null=True, blank=True, related_name='jobs', help_text="Message that triggered the job")
+    result_message = models.ForeignKey(Message, on_delete=models.SET_NULL, null=True, blank=True, related_name='+', help_text="Message produced by the job")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    run_after = models.DateTimeField(help_text="Earliest time the job may run (pushed back on retry)")
+    locked_by = models.CharField(max_length=100, blank=True, default='')
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='chat_job_status_idx'),
+            models.Index(fields=['chat_room', 'status'], name='chat_job_room_status_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.status})"
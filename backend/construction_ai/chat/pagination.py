@@ -0,0 +1,100 @@
+import base64
+from collections import OrderedDict
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def encode_cursor(message):
+    """Opaque cursor for a message position: base64("<created_at>|<id>")"""
+    raw = f"{message.created_at.isoformat()}|{message.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(pk)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise ValidationError({"detail": "Invalid cursor"})
+
+
+class MessageCursorPagination(BasePagination):
+    """
+    Keyset pagination over (created_at, id).
+
+    Without a cursor the newest page is returned. `before=<cursor>` walks back
+    through older history and `after=<cursor>` fetches anything newer (used for
+    polling). Each page is returned oldest-first so it can be rendered directly.
+    """
+    page_size = 50
+    max_page_size = 200
+    page_size_query_param = 'limit'
+    before_query_param = 'before'
+    after_query_param = 'after'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        before = request.query_params.get(self.before_query_param)
+        after = request.query_params.get(self.after_query_param)
+        if before and after:
+            raise ValidationError({"detail": "Use either 'before' or 'after', not both"})
+
+        if after:
+            created_at, pk = decode_cursor(after)
+            queryset = queryset.filter(
+                Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk)
+            ).order_by('created_at', 'pk')
+            rows = list(queryset[:page_size + 1])
+            self.has_newer = len(rows) > page_size
+            page = rows[:page_size]
+            # We came from an older position, so there is always older history
+            self.has_older = True
+        else:
+            if before:
+                created_at, pk = decode_cursor(before)
+                queryset = queryset.filter(
+                    Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk)
+                )
+            rows = list(queryset.order_by('-created_at', '-pk')[:page_size + 1])
+            self.has_older = len(rows) > page_size
+            page = rows[:page_size][::-1]
+            self.has_newer = bool(before)
+
+        self.page = page
+        return page
+
+    def get_paginated_response(self, data):
+        before_cursor = encode_cursor(self.page[0]) if self.page and self.has_older else None
+        # The newest cursor is always returned so clients can poll with ?after=
+        after_cursor = encode_cursor(self.page[-1]) if self.page else self.request.query_params.get(self.after_query_param)
+        return Response(OrderedDict([
+            ('before', before_cursor),
+            ('after', after_cursor),
+            ('has_older', self.has_older),
+            ('has_newer', self.has_newer),
+            ('previous', self.get_link(self.before_query_param, before_cursor)),
+            ('next', self.get_link(self.after_query_param, after_cursor) if self.has_newer else None),
+            ('results', data),
+        ]))
+
+    def get_link(self, param, cursor):
+        if not cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.before_query_param)
+        url = remove_query_param(url, self.after_query_param)
+        return replace_query_param(url, param, cursor)
@@ -0,0 +1,62 @@
+"""
+AI replies streamed token by token.
+
+``stream_reply`` is the body of a ``text/event-stream`` response. It sends the
+saved question as a ``message`` event, then a ``token`` event per chunk while
+the model generates, then ``done`` carrying the persisted reply. The reply is
+written once, only when generation finishes, and it reaches other room members
+through the room stream as usual.
+
+If the model fails, an ``error`` event is sent. If the client disconnects
+(the server closes the generator), the model stream is closed. In both cases
+the question is handed to the reply job queue, so the room still gets a
+complete answer from the chat worker.
+"""
+import json
+import logging
+
+from . import summaries
+from .ai import stream_ai_response
+from .jobs import enqueue_ai_reply
+from .models import Message
+from .serializers import ChatJobSerializer, MessageSerializer
+
+logger = logging.getLogger(__name__)
+
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def stream_reply(user_message, chat_room, context=None):
+    """SSE events for the AI reply to `user_message`; `chat_room` must have its project loaded"""
+    project = chat_room.project
+    history = summaries.render_history(chat_room, before_id=user_message.pk)
+    tokens = stream_ai_response(user_message.content, project, history=history)
+    chunks = []
+    try:
+        yield format_event('message', MessageSerializer(user_message, context=context).data)
+        for chunk in tokens:
+            chunks.append(chunk)
+            yield format_event('token', {'text': chunk})
+    except GeneratorExit:
+        tokens.close()
+        enqueue_ai_reply(user_message)
+        raise
+    except Exception:
+        logger.exception("Streaming the reply to message %s failed", user_message.pk)
+        job = enqueue_ai_reply(user_message)
+        yield format_event('error', {
+            'detail': "The reply could not be streamed; it will be posted to the room instead.",
+            'pending_reply': ChatJobSerializer(job, context=context).data,
+        })
+        return
+
+    reply = Message.objects.create(
+        sender_id=user_message.sender_id,  # Same convention as the reply job
+        chat_room=chat_room,
+        content=''.join(chunks),
+        is_ai_response=True
+    )
+    summaries.schedule(chat_room)
+    yield format_event('done', MessageSerializer(reply, context=context).data)
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import ChatRoom, Message
+from .models import ChatJob, ChatRoom, Message
 from accounts.models import User
 from projects.serializers import UserSerializer
 
@@ -18,12 +18,20 @@ class MessageSerializer(serializers.ModelSerializer):
             'id', 'chat_room', 'sender', 'sender_id', 'content', 
             'is_ai_response', 'is_update', 'created_at'
         ]
-        read_only_fields = ['is_ai_response']
+        read_only_fields = ['chat_room', 'is_ai_response']
 
 class ChatRoomSerializer(serializers.ModelSerializer):
-    messages = MessageSerializer(many=True, read_only=True)
+    # History is fetched page by page from the messages endpoint, never embedded here
     project_title = serializers.CharField(source='project.title', read_only=True)
     
     class Meta:
         model = ChatRoom
-        fields = ['id', 'project', 'project_title', 'messages', 'created_at']
\ No newline at end of file
+        fields = ['id', 'project', 'project_title', 'created_at']
+
+class ChatJobSerializer(serializers.ModelSerializer):
+    reply = MessageSerializer(source='result_message', read_only=True)
+    
+    class Meta:
+        model = ChatJob
+        fields = ['id', 'kind', 'chat_room', 'message', 'status', 'attempts', 'reply', 'created_at', 'updated_at']
+        read_only_fields = fields
@@ -1,10 +1,36 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from projects.models import Project
-from .models import ChatRoom
+from projects.signals import projects_imported
+from .broker import get_broker, message_event
+from .models import ChatRoom, Message
 
 @receiver(post_save, sender=Project)
-def create_chat_room(sender, instance, created, **kwargs):
-    """Create a ChatRoom if one doesn't exist for this project"""
-    from chat.models import ChatRoom
-    ChatRoom.objects.get_or_create(project=instance)
\ No newline at end of file
+def create_chat_room(sender, instance, created, raw=False, **kwargs):
+    """Create the project's ChatRoom when the project is first saved"""
+    if created and not raw:
+        ChatRoom.objects.create(project=instance)
+
+@receiver(projects_imported)
+def create_imported_chat_rooms(sender, projects, **kwargs):
+    """Bulk imports bypass post_save, so provision their rooms in one batch"""
+    ChatRoom.objects.bulk_create([ChatRoom(project=project) for project in projects])
+
+@receiver(post_save, sender=Message)
+def publish_message(sender, instance, created, **kwargs):
+    """Push new messages to open chat streams once they are committed"""
+    if created:
+        # Serialized only if the broker delivers it to someone (see BaseBroker.publish)
+        transaction.on_commit(lambda: get_broker().publish(instance.chat_room_id, lambda: message_event(instance)))
+
+@receiver(post_save, sender=Message)
+def count_message(sender, instance, created, **kwargs):
+    """Keep Project.message_count current with an atomic F() update"""
+    if created:
+        Project.objects.filter(chat_room__id=instance.chat_room_id).update(message_count=F('message_count') + 1)
+
+@receiver(post_delete, sender=Message)
+def uncount_message(sender, instance, **kwargs):
+    Project.objects.filter(chat_room__id=instance.chat_room_id).update(message_count=F('message_count') - 1)
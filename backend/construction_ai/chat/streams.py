@@ -0,0 +1,139 @@
+"""
+Server-Sent Events endpoint that pushes new chat messages to the browser.
+
+Streams are long-lived, so this view is async and must be served by the ASGI
+application (``construction_ai.asgi:application``) under an ASGI server such as
+uvicorn or daphne.
+
+EventSource can't send an Authorization header, and access tokens must not end
+up in URLs (access logs, proxies, browser history). Browsers therefore first
+POST for a stream ticket (``ChatRoomViewSet.stream_ticket``): a signed value
+naming the user and the room that expires after ``CHAT_STREAM_TICKET_SECONDS``
+and is accepted once (tracked in the default cache, which must be shared when
+several processes serve streams). It travels as ``?ticket=``; a reconnecting
+client asks for a new one. Other clients may still send the bearer header.
+
+``last_event_id`` (or the ``Last-Event-ID`` header) replays what was posted
+after that message, so a client connecting after its initial page load passes
+the newest id it fetched; ``0`` replays the room from the start.
+"""
+import json
+import secrets
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from accounts.authentication import CachedJWTAuthentication
+from accounts.models import User
+from projects.membership import get_user_membership
+from .broker import get_broker, message_events
+from .models import ChatRoom
+
+TICKET_SALT = 'chat.streams.ticket'
+
+
+def ticket_max_age():
+    return getattr(settings, 'CHAT_STREAM_TICKET_SECONDS', 30)
+
+
+def issue_ticket(user, room_id):
+    """A short-lived ticket letting `user` open one stream of `room_id`"""
+    return signing.dumps({'user': user.pk, 'room': room_id, 'nonce': secrets.token_urlsafe(12)}, salt=TICKET_SALT)
+
+
+def redeem_ticket(ticket, room_id):
+    """The ticket's user, or None when it is invalid, expired, for another room or already used"""
+    try:
+        payload = signing.loads(ticket, salt=TICKET_SALT, max_age=ticket_max_age())
+    except signing.BadSignature:
+        return None
+    if payload['room'] != room_id:
+        return None
+    # Single use: only the first redemption can add the nonce
+    if not cache.add(f"chat-stream-ticket:{payload['nonce']}", True, ticket_max_age()):
+        return None
+    return User.objects.filter(pk=payload['user'], is_active=True).first()
+
+
+def _token_user(request):
+    """Authenticate a bearer token from the Authorization header"""
+    authenticator = CachedJWTAuthentication()
+    header = authenticator.get_header(request)
+    raw_token = authenticator.get_raw_token(header) if header else None
+    if not raw_token:
+        return None
+    validated = authenticator.get_validated_token(raw_token)
+    return authenticator.get_user(validated)
+
+
+def _stream_user(request, room_id):
+    ticket = request.GET.get('ticket')
+    return redeem_ticket(ticket, room_id) if ticket else _token_user(request)
+
+
+def _can_access(user, room_id):
+    project_id = ChatRoom.objects.filter(id=room_id).values_list('project_id', flat=True).first()
+    return project_id is not None and get_user_membership(user).can_view(project_id)
+
+
+def _last_event_id(request):
+    """The id to replay after, or None to only send new messages"""
+    value = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def format_event(event):
+    return f"id: {event['id']}\nevent: message\ndata: {json.dumps(event['data'])}\n\n"
+
+
+async def message_stream(request, room_id):
+    """Stream new messages for a chat room, resuming after Last-Event-ID"""
+    user = await request.auser()
+    if not user.is_authenticated:
+        try:
+            user = await sync_to_async(_stream_user)(request, room_id)
+        except (InvalidToken, TokenError, AuthenticationFailed):
+            user = None
+    if user is None or not user.is_authenticated:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+    if not await sync_to_async(_can_access)(user, room_id):
+        return JsonResponse({"detail": "You don't have permission to view this chat"}, status=403)
+
+    last_id = _last_event_id(request)
+    heartbeat = getattr(settings, 'CHAT_STREAM_HEARTBEAT_SECONDS', 15)
+    backlog_limit = getattr(settings, 'CHAT_STREAM_BACKLOG_LIMIT', 200)
+
+    async def events():
+        nonlocal last_id
+        async with get_broker().subscribe(room_id) as subscription:
+            # Subscribe before replaying so nothing committed in between is lost
+            yield "retry: 3000\n\n"
+            while last_id is not None:
+                backlog = await sync_to_async(message_events)(room_id, last_id, backlog_limit)
+                for event in backlog:
+                    last_id = event['id']
+                    yield format_event(event)
+                if len(backlog) < backlog_limit:
+                    break
+            last_id = last_id or 0
+            while not subscription.overflowed:
+                event = await subscription.get(timeout=heartbeat)
+                if event is None:
+                    yield ": keep-alive\n\n"
+                elif event['id'] > last_id:
+                    last_id = event['id']
+                    yield format_event(event)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,149 @@
+"""
+Rolling conversation summaries for AI prompts.
+
+Each ``ChatRoom`` carries a summary of its older messages and a watermark: the
+id of the newest message folded into it. A prompt is built from the summary
+plus the recent tail (messages after the watermark, at most
+``CHAT_SUMMARY['RECENT_MESSAGES']``), so a turn costs the same whether the
+room holds fifty messages or fifty thousand.
+
+Summaries advance in the background: after an AI reply, if more than
+``RECENT_MESSAGES + REFRESH_AFTER`` messages sit past the watermark (an indexed
+count of the rows after it, which stops at that threshold), a ``summarize``
+job is queued on the room. The job folds messages into the
+summary ``BATCH_SIZE`` at a time, always leaving the newest
+``RECENT_MESSAGES`` verbatim. Each batch advances the watermark with a
+conditional UPDATE, so overlapping refreshes never fold a message twice.
+``manage.py summarize_chat_rooms`` backfills existing rooms.
+
+The summarizer is pluggable (``SUMMARIZER``, a dotted path to a callable
+taking the previous summary and a batch of messages). The default is
+extractive: it keeps one clipped line per message and drops the oldest
+chatter first once ``MAX_CHARS`` is reached, keeping project updates longest.
+"""
+from django.conf import settings
+from django.db.models import F, Subquery
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .context import clip
+from .models import ChatJob, ChatRoom, Message
+
+DEFAULTS = {
+    'RECENT_MESSAGES': 20,
+    'REFRESH_AFTER': 50,
+    'BATCH_SIZE': 200,
+    'MAX_CHARS': 3000,
+    'SUMMARIZER': 'chat.summaries.extractive_summary',
+}
+
+UPDATE_MARK = '[update] '
+
+
+def summary_setting(name):
+    return getattr(settings, 'CHAT_SUMMARY', {}).get(name, DEFAULTS[name])
+
+
+def speaker(message):
+    return "Assistant" if message.is_ai_response else message.sender.username
+
+
+def message_line(message):
+    line = f"{speaker(message)}: {clip(message.content, 160)}"
+    return UPDATE_MARK + line if message.is_update else line
+
+
+def extractive_summary(previous, messages):
+    """Previous summary plus one line per message, trimmed to MAX_CHARS oldest-chatter first"""
+    lines = [line for line in previous.split('\n') if line] + [message_line(message) for message in messages]
+    budget = summary_setting('MAX_CHARS')
+    size = sum(len(line) + 1 for line in lines)
+    for keep_updates in (True, False):
+        index = 0
+        while size > budget and index < len(lines):
+            if keep_updates and lines[index].startswith(UPDATE_MARK):
+                index += 1
+                continue
+            size -= len(lines.pop(index)) + 1
+    return '\n'.join(lines)
+
+
+def get_summarizer():
+    return import_string(summary_setting('SUMMARIZER'))
+
+
+def refresh(room_id):
+    """Fold the next batch of older messages into the room's summary; returns how many were folded"""
+    room = ChatRoom.objects.filter(pk=room_id).values('summary', 'summary_watermark').first()
+    if room is None:
+        return 0
+    # Everything up to the newest message outside the verbatim tail may be folded
+    keep = summary_setting('RECENT_MESSAGES')
+    cutoff = (
+        Message.objects.filter(chat_room_id=room_id).order_by('-id')
+        .values_list('id', flat=True)[keep:keep + 1].first()
+    )
+    if cutoff is None or cutoff <= room['summary_watermark']:
+        return 0
+    batch = list(
+        Message.objects.filter(chat_room_id=room_id, id__gt=room['summary_watermark'], id__lte=cutoff)
+        .select_related('sender').order_by('id')[:summary_setting('BATCH_SIZE')]
+    )
+    summary = get_summarizer()(room['summary'], batch)
+    updated = ChatRoom.objects.filter(pk=room_id, summary_watermark=room['summary_watermark']).update(
+        summary=summary,
+        summary_watermark=batch[-1].pk,
+        summarized_count=F('summarized_count') + len(batch),
+        summary_updated_at=timezone.now(),
+    )
+    return len(batch) if updated else 0
+
+
+def catch_up(room_id):
+    """Refresh until only the verbatim tail is left; returns the number of messages folded"""
+    folded = 0
+    while True:
+        count = refresh(room_id)
+        if not count:
+            return folded
+        folded += count
+
+
+def backlog(room_id, limit):
+    """Messages past the room's current watermark, counting no further than `limit`"""
+    watermark = ChatRoom.objects.filter(pk=room_id).values('summary_watermark')
+    return Message.objects.filter(chat_room_id=room_id, id__gt=Subquery(watermark)).order_by()[:limit].count()
+
+
+def needs_refresh(room):
+    threshold = summary_setting('RECENT_MESSAGES') + summary_setting('REFRESH_AFTER')
+    return backlog(room.pk, threshold + 1) > threshold
+
+
+def schedule(room):
+    """Queue a summarize job for a room that has outgrown its summary, unless one is queued"""
+    if not needs_refresh(room):
+        return None
+    if ChatJob.objects.filter(chat_room=room, kind='summarize', status__in=['pending', 'running']).exists():
+        return None
+    return ChatJob.objects.create(kind='summarize', chat_room=room, run_after=timezone.now())
+
+
+def conversation(room, before_id=None):
+    """(summary, recent messages oldest-first) to prompt with, optionally only messages before `before_id`"""
+    tail = Message.objects.filter(chat_room=room, id__gt=room.summary_watermark).select_related('sender')
+    if before_id is not None:
+        tail = tail.filter(id__lt=before_id)
+    recent = list(tail.order_by('-id')[:summary_setting('RECENT_MESSAGES')])[::-1]
+    return room.summary, recent
+
+
+def render_history(room, before_id=None):
+    """Conversation history as prompt text: the summary followed by the recent messages"""
+    summary, recent = conversation(room, before_id)
+    parts = []
+    if summary:
+        parts += ["Earlier conversation (summary):", summary]
+    if recent:
+        parts += ["Recent messages:"] + [f"- {speaker(message)}: {message.content}" for message in recent]
+    return '\n'.join(parts)
@@ -1,3 +1,591 @@
-from django.test import TestCase
+import io
+import json
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from rest_framework.test import APITestCase
+
+from accounts.models import User
+from projects.models import Project, ProjectUpdate, RiskAnalysis
+from metrics.registry import registry
+from . import answers, jobs, llm_stub, summaries
+from .ai import FALLBACK_RESPONSE, get_ai_response
+from .broker import DatabasePollingBroker, InProcessBroker
+from .context import build_project_context
+from .llm import Prompt
+from .llm_client import LLMBusy, LLMError, MicroBatcher, OpenAICompatibleModel
+from .models import ChatJob, ChatRoom, Message
+
+
+def make_user(username, role):
+    return User.objects.create_user(username=username, email=f'{username}@example.com', role=role)
+
+
+def make_project(supervisor, title='Tower'):
+    return Project.objects.create(
+        title=title, description='Test project', location='Site A',
+        start_date=date(2025, 1, 1), end_date=date(2025, 12, 31), supervisor=supervisor
+    )
+
+
+class MessagePaginationTests(APITestCase):
+    def setUp(self):
+        self.supervisor = make_user('supervisor', 'supervisor')
+        self.client.force_authenticate(self.supervisor)
+        self.room = ChatRoom.objects.get(project=make_project(self.supervisor))
+        self.messages = [
+            Message.objects.create(chat_room=self.room, sender=self.supervisor, content=f'm{i}')
+            for i in range(7)
+        ]
+
+    def get_page(self, **params):
+        params.setdefault('chat_room_id', self.room.pk)
+        response = self.client.get('/api/messages/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_pages_walk_back_through_history(self):
+        page = self.get_page(limit=3)
+        self.assertEqual([m['content'] for m in page['results']], ['m4', 'm5', 'm6'])
+        self.assertTrue(page['has_older'])
+
+        page = self.get_page(limit=3, before=page['before'])
+        self.assertEqual([m['content'] for m in page['results']], ['m1', 'm2', 'm3'])
+
+        page = self.get_page(limit=3, before=page['before'])
+        self.assertEqual([m['content'] for m in page['results']], ['m0'])
+        self.assertFalse(page['has_older'])
+        self.assertIsNone(page['before'])
+
+    def test_after_returns_only_newer_messages(self):
+        cursor = self.get_page(limit=2)['after']
+        Message.objects.create(chat_room=self.room, sender=self.supervisor, content='new')
+
+        page = self.get_page(after=cursor)
+        self.assertEqual([m['content'] for m in page['results']], ['new'])
+
+        # Polling again with the returned cursor yields nothing new
+        page = self.get_page(after=page['after'])
+        self.assertEqual(page['results'], [])
+
+    def test_is_update_filter_pages_through_older_updates(self):
+        for i in range(3):
+            Message.objects.create(chat_room=self.room, sender=self.supervisor, content=f'u{i}', is_update=True)
+            for _ in range(4):
+                Message.objects.create(chat_room=self.room, sender=self.supervisor, content='chatter')
+
+        page = self.get_page(limit=2, is_update='true')
+        self.assertEqual([m['content'] for m in page['results']], ['u1', 'u2'])
+        page = self.get_page(limit=2, is_update='true', before=page['before'])
+        self.assertEqual([m['content'] for m in page['results']], ['u0'])
+        self.assertFalse(page['has_older'])
+
+    def test_room_action_is_paginated(self):
+        response = self.client.get(f'/api/chat-rooms/{self.room.pk}/messages/', {'limit': 5})
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_room_listing_does_not_embed_history(self):
+        response = self.client.get('/api/chat-rooms/')
+        self.assertNotIn('messages', response.data[0])
+
+
+class InProcessBrokerTests(SimpleTestCase):
+    async def test_fans_out_to_subscribers_of_the_room(self):
+        broker = InProcessBroker()
+        async with broker.subscribe(1) as first, broker.subscribe(1) as second, broker.subscribe(2) as other:
+            make_event = mock.Mock(return_value={'id': 10, 'data': {}})
+            broker.publish(1, make_event)
+            self.assertEqual((await first.get(timeout=1))['id'], 10)
+            self.assertEqual((await second.get(timeout=1))['id'], 10)
+            self.assertIsNone(await other.get(timeout=0.01))
+        self.assertEqual(make_event.call_count, 1)
+        self.assertEqual(broker.subscribers(1), [])
+
+    def test_events_are_only_built_for_subscribed_rooms(self):
+        make_event = mock.Mock()
+        InProcessBroker().publish(1, make_event)
+        DatabasePollingBroker().publish(1, make_event)
+        make_event.assert_not_called()
+
+
+# Committed messages would otherwise be embedded into BASE_DIR/vector_index
+@override_settings(VECTOR_INDEX={'ENABLED': False})
+class MessageStreamTests(TransactionTestCase):
+    async def test_stream_resumes_after_last_event_id(self):
+        supervisor = await User.objects.acreate(
+            username='supervisor', email='supervisor@example.com', role='supervisor'
+        )
+        project = await sync_to_async(make_project)(supervisor)
+        room = await ChatRoom.objects.aget(project=project)
+        seen, *missed = [
+            await Message.objects.acreate(chat_room=room, sender=supervisor, content=f'm{i}')
+            for i in range(3)
+        ]
+        await self.async_client.aforce_login(supervisor)
+
+        response = await self.async_client.get(
+            f'/api/chat-rooms/{room.pk}/stream/', headers={'Last-Event-ID': str(seen.pk)}
+        )
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = response.streaming_content
+        self.assertTrue((await anext(chunks)).startswith(b'retry:'))
+        for message in missed:
+            self.assertIn(f'id: {message.pk}\n'.encode(), await anext(chunks))
+        await chunks.aclose()
+
+    async def test_ticket_opens_one_stream_of_its_room(self):
+        supervisor = await User.objects.acreate(username='s', email='s@example.com', role='supervisor')
+        project = await sync_to_async(make_project)(supervisor)
+        room = await ChatRoom.objects.aget(project=project)
+        other = await ChatRoom.objects.aget(project=await sync_to_async(make_project)(supervisor, 'Bridge'))
+        first = await Message.objects.acreate(chat_room=room, sender=supervisor, content='first')
+        await self.async_client.aforce_login(supervisor)
+        ticket = (await self.async_client.post(f'/api/chat-rooms/{room.pk}/stream-ticket/')).json()['ticket']
+        await self.async_client.alogout()
+
+        self.assertEqual((await self.async_client.get(f'/api/chat-rooms/{other.pk}/stream/?ticket={ticket}')).status_code, 401)
+        # last_event_id=0 replays the room from the start
+        response = await self.async_client.get(f'/api/chat-rooms/{room.pk}/stream/?ticket={ticket}&last_event_id=0')
+        self.assertEqual(response.status_code, 200)
+        chunks = response.streaming_content
+        await anext(chunks)
+        self.assertIn(f'id: {first.pk}\n'.encode(), await anext(chunks))
+        await chunks.aclose()
+
+        self.assertEqual((await self.async_client.get(f'/api/chat-rooms/{room.pk}/stream/?ticket={ticket}')).status_code, 401)
+        self.assertEqual((await self.async_client.get(f'/api/chat-rooms/{room.pk}/stream/?ticket=forged')).status_code, 401)
+
+    async def test_stream_rejects_non_members(self):
+        supervisor = await User.objects.acreate(username='s', email='s@example.com', role='supervisor')
+        outsider = await User.objects.acreate(username='w', email='w@example.com', role='worker')
+        room = await ChatRoom.objects.aget(project=await sync_to_async(make_project)(supervisor))
+        await self.async_client.aforce_login(outsider)
+
+        response = await self.async_client.get(f'/api/chat-rooms/{room.pk}/stream/')
+        self.assertEqual(response.status_code, 403)
+
+
+@override_settings(VECTOR_INDEX={'ENABLED': False})
+class WorkerReplyDeliveryTests(TransactionTestCase):
+    async def test_reply_written_by_the_worker_reaches_a_stream_subscriber(self):
+        await sync_to_async(caches['ai_answers'].clear)()
+        supervisor = await User.objects.acreate(username='s', email='s@example.com', role='supervisor')
+        room = await ChatRoom.objects.aget(project=await sync_to_async(make_project)(supervisor))
+        message = await Message.objects.acreate(chat_room=room, sender=supervisor, content='Deadline?')
+        await sync_to_async(jobs.enqueue_ai_reply)(message)
+        # The stream's process has its own broker; the worker publishes to another one
+        broker = import_string(settings.CHAT_BROKER['BACKEND'])(poll_interval=0.05)
+
+        async with broker.subscribe(room.pk) as subscription:
+            await sync_to_async(call_command)('run_chat_worker', '--once', '--poll-interval=0.05', stdout=io.StringIO())
+            event = await subscription.get(timeout=5)
+
+        self.assertIsNotNone(event)
+        self.assertTrue(event['data']['is_ai_response'])
+
+
+class AIReplyQueueTests(APITestCase):
+    def setUp(self):
+        caches['ai_answers'].clear()
+        self.supervisor = make_user('supervisor', 'supervisor')
+        self.client.force_authenticate(self.supervisor)
+        self.room = ChatRoom.objects.get(project=make_project(self.supervisor))
+
+    def post(self, content):
+        response = self.client.post('/api/messages/', {'chat_room_id': self.room.pk, 'content': content})
+        self.assertEqual(response.status_code, 201)
+        return response.data
+
+    def test_post_returns_pending_handle_and_worker_posts_reply(self):
+        data = self.post('When is the deadline?')
+        self.assertEqual(data['pending_reply']['status'], 'pending')
+        self.assertFalse(Message.objects.filter(is_ai_response=True).exists())
+
+        self.assertEqual(jobs.drain(), 1)
+
+        handle = self.client.get(f"/api/ai-replies/{data['pending_reply']['id']}/").data
+        self.assertEqual(handle['status'], 'done')
+        self.assertIn('When is the deadline?', handle['reply']['content'])
+
+    def test_jobs_in_a_room_run_in_order(self):
+        first = self.post('first')['pending_reply']['id']
+        second = self.post('second')['pending_reply']['id']
+
+        # Only the oldest unfinished job of the room can be claimed
+        self.assertEqual(jobs.claim_jobs('w1', 10), [first])
+        self.assertEqual(jobs.claim_jobs('w2', 10), [])
+        jobs.run_job(first)
+        self.assertEqual(jobs.claim_jobs('w2', 10), [second])
+
+    def test_summaries_do_not_hold_up_replies(self):
+        summarize = ChatJob.objects.create(kind='summarize', chat_room=self.room, run_after=timezone.now())
+        ChatJob.objects.filter(pk=summarize.pk).update(status='running', locked_by='w1', locked_at=timezone.now())
+        reply = self.post('status?')['pending_reply']['id']
+
+        self.assertEqual(jobs.claim_jobs('w2', 10), [reply])
+
+    @override_settings(CHAT_WORKER={'MAX_ATTEMPTS': 2, 'RETRY_BACKOFF_SECONDS': 0})
+    def test_failing_jobs_are_retried_then_apologise(self):
+        job_id = self.post('hello')['pending_reply']['id']
+
+        with mock.patch('chat.jobs.get_ai_response', side_effect=RuntimeError('LLM down')), \
+                self.assertLogs('chat.jobs', level='ERROR'):
+            jobs.drain()
+
+        job = ChatJob.objects.get(id=job_id)
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+        self.assertEqual(job.result_message.content, FALLBACK_RESPONSE)
+
+
+class ProjectContextTests(APITestCase):
+    def setUp(self):
+        self.supervisor = make_user('supervisor', 'supervisor')
+        self.project = make_project(self.supervisor)
+
+    def fresh_project(self):
+        return Project.objects.get(pk=self.project.pk)
+
+    def test_context_is_cached_until_project_content_changes(self):
+        project = self.fresh_project()
+        context = build_project_context(project)
+        self.assertIn('Project: Tower', context)
+        with self.assertNumQueries(0):
+            self.assertEqual(build_project_context(project), context)
+
+        RiskAnalysis.objects.create(
+            project=self.project, title='Crane failure', description='Old crane', risk_level='high',
+            probability=0.5, impact=8, mitigation_plan='Inspect weekly'
+        )
+        project = self.fresh_project()
+        self.assertGreater(project.content_version, 0)
+        self.assertIn('Crane failure', build_project_context(project))
+
+    def test_context_respects_size_budget(self):
+        for i in range(30):
+            ProjectUpdate.objects.create(project=self.project, author=self.supervisor, title=f'Update {i}', content='x' * 300)
+        context = build_project_context(self.fresh_project(), max_chars=600)
+        self.assertLessEqual(len(context), 600)
+        self.assertTrue(context.startswith('Project: Tower'))
+
+
+@override_settings(CHAT_SUMMARY={'RECENT_MESSAGES': 3, 'REFRESH_AFTER': 2, 'BATCH_SIZE': 4, 'MAX_CHARS': 3000})
+class ConversationSummaryTests(APITestCase):
+    def setUp(self):
+        self.supervisor = make_user('supervisor', 'supervisor')
+        self.room = ChatRoom.objects.get(project=make_project(self.supervisor))
+
+    def say(self, count, start=0):
+        return [
+            Message.objects.create(chat_room=self.room, sender=self.supervisor, content=f'message {i}')
+            for i in range(start, start + count)
+        ]
+
+    def test_refresh_folds_batches_and_keeps_the_recent_tail(self):
+        messages = self.say(10)
+
+        self.assertEqual(summaries.refresh(self.room.pk), 4)
+        self.assertEqual(summaries.catch_up(self.room.pk), 3)
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.summary_watermark, messages[6].pk)
+        self.assertEqual(self.room.summarized_count, 7)
+        self.assertIn('supervisor: message 6', self.room.summary)
+        self.assertNotIn('message 7', self.room.summary)
+
+        summary, recent = summaries.conversation(self.room)
+        self.assertEqual([message.content for message in recent], ['message 7', 'message 8', 'message 9'])
+
+    def test_prompt_history_costs_one_query_regardless_of_room_size(self):
+        self.say(40)
+        summaries.catch_up(self.room.pk)
+        self.room.refresh_from_db()
+
+        with self.assertNumQueries(1):
+            history = summaries.render_history(self.room)
+        self.assertTrue(history.startswith('Earlier conversation (summary):'))
+        self.assertEqual(history.count('\n- '), 3)
+
+    @override_settings(CHAT_SUMMARY={'MAX_CHARS': 60})
+    def test_extractive_summary_drops_chatter_before_updates(self):
+        messages = self.say(3)
+        messages[0].is_update = True
+        messages[0].content = 'deck poured'
+        summary = summaries.extractive_summary('', messages + self.say(3, start=3))
+
+        self.assertLessEqual(len(summary), 60)
+        self.assertTrue(summary.startswith('[update] supervisor: deck poured'))
+        self.assertIn('message 5', summary)
+
+    def test_ai_replies_queue_a_summarize_job_as_the_room_grows(self):
+        self.say(5)
+        self.client.force_authenticate(self.supervisor)
+        self.client.post('/api/messages/', {'chat_room_id': self.room.pk, 'content': 'status?'})
+
+        self.assertEqual(jobs.drain(), 2)
+        self.assertEqual(ChatJob.objects.get(kind='summarize').status, 'done')
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.summarized_count, 4)
+        # Only AI replies are listed as reply handles
+        self.assertEqual(len(self.client.get('/api/ai-replies/').data), 1)
+
+    def test_schedule_counts_the_messages_past_the_watermark(self):
+        self.say(5)
+        self.assertIsNone(summaries.schedule(self.room))
+        self.say(1, start=5)
+        # However stale the caller's copy of the room or its project is
+        stale = ChatRoom.objects.get(pk=self.room.pk)
+        with self.assertNumQueries(3):
+            self.assertIsNotNone(summaries.schedule(stale))
+
+        summaries.catch_up(self.room.pk)
+        ChatJob.objects.all().delete()
+        # Three verbatim messages left, plus two new ones: not past the threshold yet
+        self.say(2, start=6)
+        self.assertIsNone(summaries.schedule(stale))
+
+    def test_backfill_command(self):
+        self.say(12)
+        call_command('summarize_chat_rooms', stdout=mock.Mock())
+
+        self.room.refresh_from_db()
+        self.assertEqual(self.room.summarized_count, 9)
+
+
+def parse_events(chunks):
+    events = []
+    for block in b''.join(chunks).decode().split('\n\n'):
+        if block:
+            event, data = block.split('\n', 1)
+            events.append((event[len('event: '):], json.loads(data[len('data: '):])))
+    return events
+
+
+class StreamingReplyTests(APITestCase):
+    def setUp(self):
+        caches['ai_answers'].clear()
+        self.supervisor = make_user('supervisor', 'supervisor')
+        self.client.force_authenticate(self.supervisor)
+        self.room = ChatRoom.objects.get(project=make_project(self.supervisor))
+
+    def stream(self, content):
+        response = self.client.post('/api/messages/stream/', {'chat_room_id': self.room.pk, 'content': content})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        return response
+
+    def test_tokens_are_streamed_and_the_reply_persisted_at_the_end(self):
+        response = self.stream('When is the deadline?')
+        chunks = iter(response.streaming_content)
+        events = parse_events([next(chunks), next(chunks)])
+        self.assertEqual([event for event, _ in events], ['message', 'token'])
+        # Nothing is written until generation finishes
+        self.assertFalse(Message.objects.filter(is_ai_response=True).exists())
+
+        events += parse_events(chunks)
+        tokens = [data['text'] for event, data in events if event == 'token']
+        self.assertGreater(len(tokens), 10)
+        event, reply = events[-1]
+        self.assertEqual(event, 'done')
+        self.assertEqual(reply['content'], Message.objects.get(is_ai_response=True).content)
+        self.assertEqual(reply['content'], ''.join(tokens))
+        self.assertIn('When is the deadline?', reply['content'])
+
+    def test_model_failure_falls_back_to_the_reply_queue(self):
+        def failing(*args, **kwargs):
+            yield 'Based'
+            raise RuntimeError('LLM down')
+
+        with mock.patch('chat.replies.stream_ai_response', failing), self.assertLogs('chat.replies', 'ERROR'):
+            events = parse_events(self.stream('hello').streaming_content)
+
+        event, data = events[-1]
+        self.assertEqual(event, 'error')
+        self.assertEqual(data['pending_reply']['status'], 'pending')
+        self.assertEqual(jobs.drain(), 1)
+        self.assertTrue(Message.objects.filter(is_ai_response=True).exists())
+
+    def test_disconnect_hands_the_reply_to_the_worker(self):
+        response = self.stream('hello')
+        chunks = iter(response.streaming_content)
+        next(chunks)
+        next(chunks)
+        response.close()
+
+        self.assertFalse(Message.objects.filter(is_ai_response=True).exists())
+        self.assertEqual(ChatJob.objects.get().status, 'pending')
+        jobs.drain()
+        self.assertEqual(Message.objects.filter(is_ai_response=True).count(), 1)
+
+    def test_non_members_cannot_stream(self):
+        self.client.force_authenticate(make_user('outsider', 'worker'))
+        response = self.client.post('/api/messages/stream/', {'chat_room_id': self.room.pk, 'content': 'hi'})
+        self.assertEqual(response.status_code, 403)
+
+
+class AnswerCacheTests(APITestCase):
+    def setUp(self):
+        caches['ai_answers'].clear()
+        registry.clear()
+        # Project contexts are cached per (pk, version), which other tests reuse
+        self.addCleanup(caches['default'].clear)
+        self.supervisor = make_user('supervisor', 'supervisor')
+        self.project = make_project(self.supervisor)
+
+    def lookups(self, result):
+        return registry.value('ai_answer_cache_requests_total', {'result': result})
+
+    def test_normalized_repeats_are_answered_from_cache(self):
+        self.assertEqual(answers.normalize_question(' What’s  the DEADLINE?? '), "what's the deadline")
+        first = get_ai_response("What's the deadline?", self.project)
+
+        with mock.patch('chat.ai.get_model') as get_model:
+            self.assertEqual(get_ai_response('what’s the  deadline', self.project), first)
+        get_model.assert_not_called()
+        self.assertEqual((self.lookups('hit'), self.lookups('miss')), (1, 1))
+
+    def test_project_changes_invalidate_answers(self):
+        get_ai_response('Who supplies rebar?', self.project)
+        RiskAnalysis.objects.create(
+            project=self.project, title='Delay', description='', risk_level='high', mitigation_plan='Buffer'
+        )
+        self.project.refresh_from_db()
+
+        get_ai_response('Who supplies rebar?', self.project)
+        self.assertEqual((self.lookups('hit'), self.lookups('miss')), (0, 2))
+
+    def test_indexed_chat_updates_invalidate_answers(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        room = ChatRoom.objects.get(project=self.project)
+        with self.settings(VECTOR_INDEX={'ROOT': root}):
+            get_ai_response('Who supplies rebar?', self.project)
+            with self.captureOnCommitCallbacks(execute=True):
+                Message.objects.create(chat_room=room, sender=self.supervisor, content='Who supplies rebar?')
+            # Questions are indexed too, but don't change what the answer is built on
+            get_ai_response('Who supplies rebar?', self.project)
+
+            version = Project.objects.get(pk=self.project.pk).content_version
+            with self.captureOnCommitCallbacks(execute=True):
+                Message.objects.create(
+                    chat_room=room, sender=self.supervisor, content='Acme supplies rebar from now on', is_update=True
+                )
+            # Retrieval picks the update up, though the project itself is unchanged
+            self.assertEqual(Project.objects.get(pk=self.project.pk).content_version, version)
+            get_ai_response('Who supplies rebar?', self.project)
+        self.assertEqual((self.lookups('hit'), self.lookups('miss')), (1, 2))
+
+    def ask_through_the_api(self, path):
+        """Ask the same question twice the way the chat does, with the vector index on"""
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        self.client.force_authenticate(self.supervisor)
+        room = ChatRoom.objects.get(project=self.project)
+        with self.settings(VECTOR_INDEX={'ROOT': root}), \
+                mock.patch('chat.ai.get_model', side_effect=import_string('chat.llm.get_model')) as get_model:
+            for _ in range(2):
+                with self.captureOnCommitCallbacks(execute=True):
+                    response = self.client.post(path, {'chat_room_id': room.pk, 'content': 'What is the deadline?'})
+                    self.assertIn(response.status_code, (200, 201))
+                    if path.endswith('stream/'):
+                        self.assertEqual(parse_events(response.streaming_content)[-1][0], 'done')
+                jobs.drain()
+        self.assertEqual(get_model.call_count, 1)
+        self.assertEqual((self.lookups('hit'), self.lookups('miss')), (1, 1))
+        self.assertEqual(Message.objects.filter(chat_room=room, is_ai_response=True).count(), 2)
+
+    def test_queued_replies_answer_repeats_from_cache(self):
+        self.ask_through_the_api('/api/messages/')
+
+    def test_streamed_replies_answer_repeats_from_cache(self):
+        self.ask_through_the_api('/api/messages/stream/')
+
+    @override_settings(AI_ANSWER_CACHE={'ENABLED': False})
+    def test_cache_can_be_disabled(self):
+        get_ai_response('Status?', self.project)
+        get_ai_response('Status?', self.project)
+        self.assertEqual(self.lookups('hit') + self.lookups('miss'), 0)
+
+
+class LLMClientTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = llm_stub.start(port=0)
+        cls.addClassCleanup(cls.server.shutdown)
+
+    def setUp(self):
+        self.server.requests.clear()
+        self.server.fail_next = 0
+        self.server.latency = 0
+
+    def model(self, **options):
+        return OpenAICompatibleModel(**{
+            'BASE_URL': f'http://127.0.0.1:{self.server.server_port}', 'BACKOFF_SECONDS': 0, 'QUEUE_TIMEOUT': 1,
+            **options,
+        })
+
+    def prompt(self, question, project_id=1):
+        return Prompt(question, mock.Mock(pk=project_id), context='Tower')
+
+    def test_streams_tokens_over_a_kept_alive_connection(self):
+        model = self.model()
+        tokens = list(model.stream(self.prompt('deadline?')))
+        self.assertGreater(len(tokens), 3)
+        self.assertTrue(''.join(tokens).startswith("Stub answer to 'deadline?'"))
+
+        model.complete(self.prompt('again?'))
+        ports = {request['client_port'] for request in self.server.requests}
+        self.assertEqual(len(ports), 1)
+
+    def test_retries_server_errors_with_backoff(self):
+        self.server.fail_next = 2
+        self.assertIn('retry?', self.model(MAX_RETRIES=2).complete(self.prompt('retry?')))
+        self.assertEqual(len(self.server.requests), 3)
+
+        self.server.fail_next = 1
+        with self.assertRaises(LLMError):
+            self.model(MAX_RETRIES=0).complete(self.prompt('retry?'))
+
+    def test_read_timeout(self):
+        self.server.latency = 0.5
+        with self.assertRaises(LLMError):
+            self.model(READ_TIMEOUT=0.1, MAX_RETRIES=0).complete(self.prompt('slow?'))
+
+    def test_per_project_concurrency_cap(self):
+        model = self.model(MAX_PER_PROJECT=1, QUEUE_TIMEOUT=0.05)
+        stream = model.stream(self.prompt('first', project_id=7))
+        next(stream)  # Holds project 7's only slot until the stream finishes
+
+        with self.assertRaises(LLMBusy):
+            model.complete(self.prompt('second', project_id=7))
+        self.assertIn('other', model.complete(self.prompt('other', project_id=8)))
+        list(stream)
+        self.assertIn('third', model.complete(self.prompt('third', project_id=7)))
+
+    def test_concurrent_prompts_are_micro_batched(self):
+        model = self.model(BATCHING=True, BATCH_WINDOW_MS=200, MAX_BATCH_SIZE=4)
+        questions = [f'question {i}' for i in range(4)]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            answers = list(pool.map(lambda i: model.complete(self.prompt(questions[i], project_id=i)), range(4)))
+
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(len(self.server.requests[0]['body']['prompt']), 4)
+        for question, answer in zip(questions, answers):
+            self.assertIn(question, answer)
+
+    def test_a_short_batch_answer_fails_every_prompt(self):
+        batcher = MicroBatcher(lambda texts: texts[:-1], window_seconds=60, max_size=2)
+        futures = [batcher.submit('first'), batcher.submit('second')]
+
+        for future in futures:
+            with self.assertRaises(LLMError):
+                future.result(timeout=1)
@@ -1,10 +1,15 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-import requests
-from .models import ChatRoom, Message
-from .serializers import ChatRoomSerializer, MessageSerializer
-from projects.models import Project, ProjectWorker
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from .jobs import enqueue_ai_reply
+from .models import ChatJob, ChatRoom, Message
+from .pagination import MessageCursorPagination
+from .replies import stream_reply
+from .serializers import ChatJobSerializer, ChatRoomSerializer, MessageSerializer
+from .streams import issue_ticket, ticket_max_age
+from projects.membership import get_membership
 
 class ChatRoomViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = ChatRoomSerializer
@@ -12,115 +17,116 @@ class ChatRoomViewSet(viewsets.ReadOnlyModelViewSet):
     
     def get_queryset(self):
         """Return chat rooms the user has access to"""
-        user = self.request.user
-        if user.role == 'supervisor':
-            return ChatRoom.objects.filter(project__supervisor=user)
-        else:  # worker
-            return ChatRoom.objects.filter(project__project_workers__worker=user)
+        membership = get_membership(self.request)
+        return ChatRoom.objects.filter(project_id__in=membership.viewable).select_related('project')
 
     @action(detail=True, methods=['get'])
     def messages(self, request, pk=None):
-        """Get messages for a specific chat room"""
+        """Get a page of messages for a specific chat room (see MessageCursorPagination)"""
         chat_room = self.get_object()
-        messages = Message.objects.filter(chat_room=chat_room)
-        serializer = MessageSerializer(messages, many=True)
-        return Response(serializer.data)
+        messages = Message.objects.filter(chat_room=chat_room).select_related('sender')
+        paginator = MessageCursorPagination()
+        page = paginator.paginate_queryset(messages, request, view=self)
+        serializer = MessageSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=['post'], url_path='stream-ticket')
+    def stream_ticket(self, request, pk=None):
+        """A single-use ticket for opening the room's message stream (see chat.streams)"""
+        chat_room = self.get_object()
+        return Response({'ticket': issue_ticket(request.user, chat_room.pk), 'expires_in': ticket_max_age()})
 
 class MessageViewSet(viewsets.ModelViewSet):
     serializer_class = MessageSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = MessageCursorPagination
     http_method_names = ['get', 'post']
     
     def get_queryset(self):
         """Return messages for a specific chat room"""
         chat_room_id = self.request.query_params.get('chat_room_id')
-        if chat_room_id:
-            # Check if user has access to this chat room
-            user = self.request.user
-            try:
-                chat_room = ChatRoom.objects.get(id=chat_room_id)
-                project = chat_room.project
-                
-                if (user.role == 'supervisor' and project.supervisor == user) or \
-                   (user.role == 'worker' and ProjectWorker.objects.filter(project=project, worker=user).exists()):
-                    return Message.objects.filter(chat_room_id=chat_room_id)
-            except ChatRoom.DoesNotExist:
-                pass
-        return Message.objects.none()
+        if not chat_room_id:
+            return Message.objects.none()
+        # Only rooms of projects the user belongs to (resolved without extra queries)
+        membership = get_membership(self.request)
+        queryset = Message.objects.filter(
+            chat_room_id=chat_room_id,
+            chat_room__project_id__in=membership.viewable
+        ).select_related('sender')
+        # ?is_update=true pages through project updates only (the Updates tab)
+        is_update = self.request.query_params.get('is_update')
+        if is_update is not None:
+            queryset = queryset.filter(is_update=is_update.lower() in ('1', 'true'))
+        return queryset
     
-    def create(self, request, *args, **kwargs):
-        """Create a message and generate AI response"""
+    def save_message(self, request, queue_reply):
+        """Validate and save the posted message; returns (chat room, message) or an error Response"""
         chat_room_id = request.data.get('chat_room_id')
         if not chat_room_id:
             return Response({"detail": "chat_room_id is required"}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            chat_room = ChatRoom.objects.get(id=chat_room_id)
-            project = chat_room.project
-            
-            # Check permissions
-            user = request.user
-            if not ((user.role == 'supervisor' and project.supervisor == user) or 
-                   (user.role == 'worker' and ProjectWorker.objects.filter(project=project, worker=user).exists())):
-                return Response({"detail": "You don't have permission to chat in this project"}, 
-                               status=status.HTTP_403_FORBIDDEN)
-            
-            # Create serializer with request data
-            serializer = self.get_serializer(data=request.data)
-            serializer.is_valid(raise_exception=True)
-            
-            # Save the message
-            user_message = serializer.save(sender=request.user, chat_room=chat_room)
-            
-            # Check if this is marked as an update
-            is_update = request.data.get('is_update', False)
-            if is_update and user.role == 'supervisor':
-                user_message.is_update = True
-                user_message.save(update_fields=['is_update'])
-            
-            # Process with LLM and create AI response
-            ai_response = self.get_ai_response(user_message.content, project)
-            Message.objects.create(
-                sender=request.user,  # Using same sender but marking as AI response
-                chat_room=chat_room,
-                content=ai_response,
-                is_ai_response=True
-            )
-            
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
-            
+            chat_room = ChatRoom.objects.select_related('project').get(id=chat_room_id)
         except ChatRoom.DoesNotExist:
             return Response({"detail": "Chat room not found"}, status=status.HTTP_404_NOT_FOUND)
-    
-    def get_ai_response(self, user_message, project):
-        """Generate AI response using LLM with project context"""
-        # Collect project context for better AI responses
-        project_context = (
-            f"Project: {project.title}\n"
-            f"Description: {project.description}\n"
-            f"Status: {project.status}\n"
-            f"Location: {project.location}\n"
-            f"Timeline: {project.start_date} to {project.end_date}\n"
-        )
         
-        if project.risk_assessment:
-            project_context += f"Risk Assessment: {project.risk_assessment}\n"
-            
-        if project.mitigation_strategies:
-            project_context += f"Mitigation Strategies: {project.mitigation_strategies}\n"
+        # Check permissions
+        user = request.user
+        if not get_membership(request).can_view(chat_room.project_id):
+            return Response({"detail": "You don't have permission to chat in this project"}, 
+                           status=status.HTTP_403_FORBIDDEN)
         
-        try:
-            # This is a placeholder - you'll need to implement the actual LLM integration
-            # In a real implementation, send the user message and project context to your LLM service
-            
-            # Example with GPT-like response formatting:
-            return (
-                f"Based on the project '{project.title}', I can assist with your query.\n\n"
-                f"You asked: {user_message}\n\n"
-                f"Here's my analysis: This project is currently in {project.status} phase "
-                f"with a timeline from {project.start_date} to {project.end_date}. "
-                f"I'll analyze this within the context of construction best practices, "
-                f"risk management, and resource optimization."
+        # Create serializer with request data
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        with transaction.atomic():
+            # Save the message (only supervisors may flag it as a project update)
+            is_update = serializer.validated_data.get('is_update', False)
+            user_message = serializer.save(
+                sender=request.user,
+                chat_room=chat_room,
+                is_update=is_update and user.role == 'supervisor'
             )
-        except Exception as e:
-            return f"Sorry, I couldn't process your request due to an error. Please try again later."
\ No newline at end of file
+            
+            # The AI reply is generated by the chat worker and pushed to the
+            # room's stream; the job is the client's handle to track it
+            if queue_reply:
+                user_message.pending_reply = enqueue_ai_reply(user_message)
+        return chat_room, user_message
+    
+    def create(self, request, *args, **kwargs):
+        """Create a message and queue the AI response"""
+        result = self.save_message(request, queue_reply=True)
+        if isinstance(result, Response):
+            return result
+        _, user_message = result
+        data = dict(self.get_serializer(user_message).data)
+        data['pending_reply'] = ChatJobSerializer(user_message.pending_reply).data
+        return Response(data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['post'])
+    def stream(self, request):
+        """Create a message and stream the AI response as Server-Sent Events (see chat.replies)"""
+        result = self.save_message(request, queue_reply=False)
+        if isinstance(result, Response):
+            return result
+        chat_room, user_message = result
+        response = StreamingHttpResponse(
+            stream_reply(user_message, chat_room, context=self.get_serializer_context()),
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+class ChatJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Status of pending AI replies (the handle returned when posting a message)"""
+    serializer_class = ChatJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        membership = get_membership(self.request)
+        return ChatJob.objects.filter(
+            kind='ai_reply', chat_room__project_id__in=membership.viewable
+        ).select_related('result_message__sender')
@@ -2,6 +2,9 @@
 ASGI config for construction_ai project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with an ASGI server (e.g. ``uvicorn construction_ai.asgi:application``)
+so the chat streaming endpoint can hold connections open without tying up a
+worker thread per client.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
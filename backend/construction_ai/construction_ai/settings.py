@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -44,9 +45,15 @@ INSTALLED_APPS = [
     'accounts',
     'projects',
     'chat',
+    'search',
+    'imaging',
+    'benchmarks',
+    'metrics',
 ]
 
 MIDDLEWARE = [
+    # First, so its latency and query counts cover the rest of the stack
+    'metrics.middleware.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -79,14 +86,48 @@ WSGI_APPLICATION = 'construction_ai.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
-
-DATABASES = {
-    'default': {
-        # Make sure this is standard sqlite3, NOT spatialite
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Selected with DB_ENGINE=sqlite (default) or DB_ENGINE=postgres; see the DB_* variables below.
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'construction_ai'),
+            'USER': os.environ.get('DB_USER', 'postgres'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            # Persistent connections, checked before reuse so a restarted server doesn't break requests
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 5)),
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            # Make sure this is standard sqlite3, NOT spatialite
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                # WAL lets readers (e.g. SSE streams) run alongside the chat worker's writes;
+                # IMMEDIATE transactions take the write lock up front instead of failing mid-transaction.
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA temp_store=MEMORY;'
+                    'PRAGMA cache_size=-20000;'
+                    'PRAGMA mmap_size=134217728;'
+                ),
+                'transaction_mode': 'IMMEDIATE',
+                # Seconds to wait for a lock held by another process
+                'timeout': int(os.environ.get('DB_TIMEOUT', 20)),
+            },
+        }
     }
-}
 
 
 # Password validation
@@ -108,11 +149,15 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Bearer tokens are checked first so API clients never pay for session and CSRF
+# handling; API_ONLY_AUTH=1 drops session authentication (browsable API/admin
+# logins) altogether.
+AUTHENTICATION_CLASSES = ['accounts.authentication.CachedJWTAuthentication']
+if os.environ.get('API_ONLY_AUTH', '0') != '1':
+    AUTHENTICATION_CLASSES.append('rest_framework.authentication.SessionAuthentication')
+
 REST_FRAMEWORK = {
-    'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.SessionAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-    ],
+    'DEFAULT_AUTHENTICATION_CLASSES': AUTHENTICATION_CLASSES,
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
@@ -121,6 +166,130 @@ REST_FRAMEWORK = {
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
+    'TOKEN_OBTAIN_SERIALIZER': 'accounts.authentication.VersionedTokenObtainPairSerializer',
+}
+
+# Request metrics, scraped from /metrics/ (see metrics.middleware)
+REQUEST_METRICS = {
+    'ENABLED': os.environ.get('REQUEST_METRICS', '1') == '1',
+    'SLOW_REQUEST_MS': int(os.environ.get('SLOW_REQUEST_MS', 500)),
+    'WORST_QUERIES': 5,
+    'ALLOWED_IPS': ('127.0.0.1', '::1'),
+}
+
+# Per-process cache of token-authenticated users (see accounts.authentication)
+AUTH_USER_CACHE = {
+    'TTL_SECONDS': int(os.environ.get('AUTH_USER_CACHE_TTL', 30)),
+    'MAX_SIZE': 1024,
+}
+
+# Caches
+# The default local-memory cache is per process; point this at a shared backend
+# (e.g. Redis or Memcached) when running several processes so invalidations
+# reach all of them.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # AI answers to repeated questions (see chat.answers); evicted least recently used first
+    'ai_answers': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'ai-answers',
+        'TIMEOUT': 60 * 60 * 6,
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
+
+# Seconds a user's resolved project memberships stay cached (see projects.membership)
+PROJECT_MEMBERSHIP_CACHE_TIMEOUT = 300
+
+# Chat streaming (Server-Sent Events, served by the ASGI application)
+# AI replies are written by the chat worker process, so streams need a cross-process broker
+# (see chat.broker); InProcessBroker only reaches streams of the process that wrote the message
+CHAT_BROKER = {
+    'BACKEND': os.environ.get('CHAT_BROKER', 'chat.broker.DatabasePollingBroker'),
+    'OPTIONS': {'poll_interval': float(os.environ.get('CHAT_BROKER_POLL_SECONDS', 1.0))},
+}
+CHAT_STREAM_HEARTBEAT_SECONDS = 15
+CHAT_STREAM_BACKLOG_LIMIT = 200
+# Lifetime of the single-use tickets browsers open streams with (see chat.streams)
+CHAT_STREAM_TICKET_SECONDS = 30
+
+# Background chat jobs (AI replies), drained by `python manage.py run_chat_worker`
+CHAT_WORKER = {
+    'CONCURRENCY': 4,
+    'MAX_ATTEMPTS': 3,
+    'RETRY_BACKOFF_SECONDS': 5,
+    'POLL_INTERVAL_SECONDS': 1.0,
+    'LEASE_SECONDS': 300,
+}
+
+# Seconds a computed critical path stays cached (keyed by content version, see projects.schedule)
+CRITICAL_PATH_CACHE_TIMEOUT = 60 * 60
+
+# Project workspace endpoint (see projects.workspace)
+PROJECT_WORKSPACE = {
+    'SECTION_LIMIT': 50,
+    'MAX_SECTION_LIMIT': 200,
+    'SNAPSHOT_ATTEMPTS': 3,
+}
+
+# AI prompt context (see chat.context)
+AI_CONTEXT = {
+    'MAX_CHARS': 4000,
+    'ITEMS_PER_SECTION': 10,
+    'MAX_FIELD_CHARS': 400,
+    'CACHE_TIMEOUT': 60 * 60,
+}
+
+# Language model behind the assistant (see chat.llm)
+AI_MODEL = {
+    'BACKEND': os.environ.get('AI_MODEL_BACKEND', 'chat.llm.FakeStreamingModel'),
+    'OPTIONS': {},
+}
+
+# HTTP model server used by chat.llm_client.OpenAICompatibleModel
+# (AI_MODEL_BACKEND=chat.llm_client.OpenAICompatibleModel; `manage.py run_llm_stub` serves one offline)
+LLM_CLIENT = {
+    'BASE_URL': os.environ.get('LLM_BASE_URL', 'http://127.0.0.1:8089'),
+    'MODEL': os.environ.get('LLM_MODEL', 'stub'),
+    'API_KEY': os.environ.get('LLM_API_KEY', ''),
+    'MAX_TOKENS': 512,
+    'CONNECT_TIMEOUT': 3.05,
+    'READ_TIMEOUT': int(os.environ.get('LLM_READ_TIMEOUT', 60)),
+    'MAX_RETRIES': 2,
+    'BACKOFF_SECONDS': 0.5,
+    'POOL_SIZE': 16,
+    'MAX_CONCURRENCY': int(os.environ.get('LLM_MAX_CONCURRENCY', 8)),
+    'MAX_PER_PROJECT': 2,
+    'QUEUE_TIMEOUT': 30,
+    'BATCHING': os.environ.get('LLM_BATCHING', '0') == '1',
+    'BATCH_WINDOW_MS': 10,
+    'MAX_BATCH_SIZE': 8,
+}
+
+# Cache of AI answers keyed by project content version and normalized question (see chat.answers)
+AI_ANSWER_CACHE = {
+    'ENABLED': os.environ.get('AI_ANSWER_CACHE', '1') == '1',
+    'CACHE_ALIAS': 'ai_answers',
+}
+
+# Per-project passage embeddings retrieved into AI prompts (see search.vectors)
+VECTOR_INDEX = {
+    'ENABLED': os.environ.get('VECTOR_INDEX', '1') == '1',
+    'ROOT': os.environ.get('VECTOR_INDEX_ROOT', BASE_DIR / 'vector_index'),
+    'EMBEDDER': 'search.embeddings.HashingEmbedder',
+    'EMBEDDER_OPTIONS': {'dim': 256},
+    'TOP_K': 5,
+}
+
+# Rolling per-room conversation summaries for AI prompts (see chat.summaries)
+CHAT_SUMMARY = {
+    'RECENT_MESSAGES': 20,
+    'REFRESH_AFTER': 50,
+    'BATCH_SIZE': 200,
+    'MAX_CHARS': 3000,
+    'SUMMARIZER': 'chat.summaries.extractive_summary',
 }
 
 # Internationalization
@@ -157,6 +326,18 @@ AUTH_USER_MODEL = 'accounts.User'
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
+# Serve MEDIA_ROOT from Django (imaging.views.serve_media); leave it to the web server in production
+SERVE_MEDIA = DEBUG
+
+# Thumbnail/preview variants of uploaded images (see imaging.derivatives)
+IMAGE_DERIVATIVES = {
+    'WORKERS': 2,
+    'QUALITY': 82,
+    # Cache-Control max-age for derivatives served by imaging.views.serve_media (content-addressed)
+    'MEDIA_MAX_AGE': 60 * 60 * 24 * 365,
+    # ... and for every other media file, which may be replaced under the same name
+    'ORIGINAL_MAX_AGE': 60,
+}
 
 LANGUAGE_CODE = 'en-us'
 
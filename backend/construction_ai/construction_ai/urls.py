@@ -1,16 +1,21 @@
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from django.conf import settings
-from django.conf.urls.static import static
 
 from accounts.views import RegisterView, UserProfileView
 from projects.views import (
     ProjectViewSet, ProjectUpdateViewSet, ProjectWorkerViewSet,
     ProjectSupplierViewSet, ProjectTimelineViewSet, RiskAnalysisViewSet
 )
-from chat.views import ChatRoomViewSet, MessageViewSet
+from chat.views import ChatJobViewSet, ChatRoomViewSet, MessageViewSet
+from chat.streams import message_stream
+from search.views import SearchView
+from imaging.views import serve_media
+from metrics.views import metrics_view
 
 router = DefaultRouter()
 router.register(r'projects', ProjectViewSet)
@@ -21,9 +26,13 @@ router.register(r'project-timeline', ProjectTimelineViewSet)
 router.register(r'project-risks', RiskAnalysisViewSet)
 router.register(r'chat-rooms', ChatRoomViewSet, basename='chatroom')
 router.register(r'messages', MessageViewSet, basename='message')
+router.register(r'ai-replies', ChatJobViewSet, basename='ai-reply')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('metrics/', metrics_view, name='metrics'),
+    path('api/chat-rooms/<int:room_id>/stream/', message_stream, name='chatroom-stream'),
+    path('api/search/', SearchView.as_view(), name='search'),
     path('api/', include(router.urls)),
     path('api/auth/', include('rest_framework.urls')),
     
@@ -36,5 +45,7 @@ urlpatterns = [
     path('api/profile/', UserProfileView.as_view(), name='user-profile'),
 ]
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+if settings.SERVE_MEDIA:
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media),
+    ]
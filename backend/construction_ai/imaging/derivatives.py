@@ -0,0 +1,168 @@
+"""
+Thumbnail and preview derivatives for uploaded images.
+
+Each registered image field gets a set of resized JPEG variants written next to
+the original under ``<upload dir>/derivatives/``. The variant file names are
+stored on the row in a JSON field (``{'source': <original name>, 'thumb': ...}``)
+so serializers can expose them without touching storage. Recording the source
+name lets stale variants be detected after the original is replaced.
+
+Generation never runs inside a request: the post_save receiver schedules it on
+a small in-process thread pool once the transaction commits, and the
+``generate_image_derivatives`` command backfills anything that was missed.
+Derivative names embed a digest of the original, so they never change content
+and can be served with a long cache lifetime.
+"""
+import hashlib
+import io
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from PIL import Image, ImageOps
+
+from accounts.models import User
+from projects.models import ProjectUpdate
+from projects.versioning import bump_content_version
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'WORKERS': 2,
+    'QUALITY': 82,
+    'MEDIA_MAX_AGE': 60 * 60 * 24 * 365,
+    'ORIGINAL_MAX_AGE': 60,
+}
+
+# model -> (image field, variants field, {variant name: bounding box})
+SOURCES = {
+    ProjectUpdate: ('image', 'image_variants', {'thumb': (320, 320), 'preview': (1280, 1280)}),
+    User: ('profile_picture', 'profile_picture_variants', {'thumb': (128, 128)}),
+}
+
+_executor = None
+
+
+def imaging_setting(name):
+    return getattr(settings, 'IMAGE_DERIVATIVES', {}).get(name, DEFAULTS[name])
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=imaging_setting('WORKERS'), thread_name_prefix='image-derivatives'
+        )
+    return _executor
+
+
+def is_current(instance):
+    """True when the stored variants were generated from the current image"""
+    image_field, variants_field, _ = SOURCES[type(instance)]
+    image = getattr(instance, image_field)
+    variants = getattr(instance, variants_field) or {}
+    if not image:
+        return not variants
+    return variants.get('source') == image.name
+
+
+def derivative_name(source_name, digest, variant):
+    directory, filename = posixpath.split(source_name)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(directory, 'derivatives', f'{stem}.{digest}.{variant}.jpg')
+
+
+def render(data, size, quality):
+    """Resize image bytes to fit inside `size`, returned as JPEG bytes"""
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(size, Image.LANCZOS)
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        output = io.BytesIO()
+        image.save(output, 'JPEG', quality=quality, optimize=True, progressive=True)
+    return output.getvalue()
+
+
+def generate(instance):
+    """Write the variants for the instance's current image and record them on the row"""
+    model = type(instance)
+    image_field, variants_field, sizes = SOURCES[model]
+    image = getattr(instance, image_field)
+    previous = getattr(instance, variants_field) or {}
+
+    variants = {}
+    if image:
+        with image.storage.open(image.name, 'rb') as source:
+            data = source.read()
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        quality = imaging_setting('QUALITY')
+        variants['source'] = image.name
+        for variant, size in sizes.items():
+            name = derivative_name(image.name, digest, variant)
+            if not image.storage.exists(name):
+                name = image.storage.save(name, ContentFile(render(data, size, quality)))
+            variants[variant] = name
+
+    # Only record the variants if the image wasn't replaced while we were working;
+    # a plain UPDATE keeps post_save (and this pipeline) from firing again
+    rows = model.objects.filter(pk=instance.pk)
+    if image:
+        rows = rows.filter(**{image_field: image.name})
+    else:
+        rows = rows.filter(Q(**{image_field: ''}) | Q(**{f'{image_field}__isnull': True}))
+    if rows.update(**{variants_field: variants}) and model is ProjectUpdate:
+        # Variants are part of the update's representation (see projects.conditional)
+        bump_content_version(instance.project_id)
+    setattr(instance, variants_field, variants)
+    remove_stale(image.storage, previous, variants)
+    return variants
+
+
+def remove_stale(storage, previous, current):
+    keep = set(current.values())
+    for variant, name in previous.items():
+        if variant != 'source' and name not in keep:
+            storage.delete(name)
+
+
+def with_images(model):
+    image_field = SOURCES[model][0]
+    return model.objects.exclude(**{image_field: ''}).exclude(**{f'{image_field}__isnull': True})
+
+
+def process(model, pk, force=False):
+    """Generate variants for one row in a worker thread; returns whether any were written"""
+    try:
+        instance = model.objects.filter(pk=pk).first()
+        if instance is not None and (force or not is_current(instance)):
+            generate(instance)
+            return True
+    except Exception:
+        logger.exception("Generating image derivatives for %s %s failed", model.__name__, pk)
+    finally:
+        close_old_connections()
+    return False
+
+
+def schedule(instance):
+    """Generate variants in the background once the current transaction commits"""
+    if is_current(instance):
+        return
+    model, pk = type(instance), instance.pk
+    transaction.on_commit(lambda: get_executor().submit(process, model, pk))
+
+
+def backfill(workers=None, force=False):
+    """Generate missing or stale variants for existing media in parallel; returns the number processed"""
+    jobs = [
+        (model, pk)
+        for model in SOURCES
+        for pk in with_images(model).order_by('pk').values_list('pk', flat=True)
+    ]
+    with ThreadPoolExecutor(max_workers=workers or imaging_setting('WORKERS')) as pool:
+        return sum(pool.map(lambda job: process(*job, force=force), jobs))
@@ -0,0 +1,21 @@
+from django.core.files.storage import default_storage
+from rest_framework import serializers
+
+
+class ImageVariantsField(serializers.Field):
+    """Read-only ``{variant: url}`` for a variants JSON field (see imaging.derivatives)"""
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, variants):
+        request = self.context.get('request')
+        urls = {}
+        for variant, name in (variants or {}).items():
+            if variant == 'source':
+                continue
+            url = default_storage.url(name)
+            # Absolute, like DRF's ImageField, so variants can replace the original URL
+            urls[variant] = request.build_absolute_uri(url) if request is not None else url
+        return urls
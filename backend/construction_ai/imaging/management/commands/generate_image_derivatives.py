@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from imaging.derivatives import backfill, imaging_setting
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate thumbnail/preview variants for update images and profile pictures that "
+        "are missing them or were made from an older image. Run it once after the imaging "
+        "migration and whenever the variant sizes change (with --force)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=imaging_setting('WORKERS'),
+                            help="Number of images to process in parallel")
+        parser.add_argument('--force', action='store_true',
+                            help="Regenerate variants even if they are up to date")
+
+    def handle(self, *args, **options):
+        total = backfill(workers=max(1, options['workers']), force=options['force'])
+        self.stdout.write(self.style.SUCCESS(f"Generated variants for {total} image(s)"))
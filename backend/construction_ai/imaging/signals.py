@@ -0,0 +1,20 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import User
+from projects.models import ProjectUpdate
+from . import derivatives
+
+@receiver(post_save, sender=ProjectUpdate)
+@receiver(post_save, sender=User)
+def image_saved(sender, instance, **kwargs):
+    """Regenerate variants after the image was uploaded, replaced or cleared"""
+    derivatives.schedule(instance)
+
+@receiver(post_delete, sender=ProjectUpdate)
+@receiver(post_delete, sender=User)
+def image_owner_deleted(sender, instance, **kwargs):
+    """Variants belong to the row; the original stays, as Django never deletes uploaded files"""
+    image_field, variants_field, _ = derivatives.SOURCES[sender]
+    image = getattr(instance, image_field)
+    derivatives.remove_stale(image.storage, getattr(instance, variants_field) or {}, {})
@@ -0,0 +1,148 @@
+import io
+import shutil
+import tempfile
+from datetime import date
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework.test import APITestCase
+
+from accounts.models import User
+from projects.models import Project, ProjectUpdate
+from . import derivatives
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_user(username, role):
+    return User.objects.create_user(username=username, email=f'{username}@example.com', role=role)
+
+
+def photo(name='site.jpg', size=(2000, 1500)):
+    output = io.BytesIO()
+    Image.new('RGB', size, 'orange').save(output, 'JPEG')
+    return SimpleUploadedFile(name, output.getvalue(), content_type='image/jpeg')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, SERVE_MEDIA=True, VECTOR_INDEX={'ENABLED': False})
+class ImageDerivativeTests(APITestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.supervisor = make_user('supervisor', 'supervisor')
+        self.project = Project.objects.create(
+            title='Bridge', description='Test project', location='Site A',
+            start_date=date(2025, 1, 1), end_date=date(2025, 12, 31), supervisor=self.supervisor
+        )
+        self.client.force_authenticate(self.supervisor)
+
+    def test_upload_schedules_generation_after_commit(self):
+        with mock.patch('imaging.derivatives.get_executor') as get_executor, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('projectupdate-list'), {
+                'project': self.project.pk, 'title': 'Deck', 'content': 'Poured', 'image': photo()
+            }, format='multipart')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['image_variants'], {})
+        get_executor.return_value.submit.assert_called_once_with(
+            derivatives.process, ProjectUpdate, response.data['id']
+        )
+
+    def test_variants_are_resized_and_exposed(self):
+        update = ProjectUpdate.objects.create(
+            project=self.project, author=self.supervisor, title='Deck', content='', image=photo()
+        )
+        self.assertTrue(derivatives.process(ProjectUpdate, update.pk))
+
+        update.refresh_from_db()
+        self.assertEqual(update.image_variants['source'], update.image.name)
+        with default_storage.open(update.image_variants['thumb']) as thumb:
+            self.assertEqual(Image.open(thumb).size, (320, 240))
+        with default_storage.open(update.image_variants['preview']) as preview:
+            self.assertEqual(Image.open(preview).size, (1280, 960))
+        # Up to date, so nothing left to do
+        self.assertFalse(derivatives.process(ProjectUpdate, update.pk))
+
+        response = self.client.get(reverse('projectupdate-detail', args=[update.pk]))
+        self.assertEqual(set(response.data['image_variants']), {'thumb', 'preview'})
+        self.assertTrue(response.data['image_variants']['thumb'].startswith('http://testserver/media/'))
+
+    def test_replacing_the_image_removes_old_variants(self):
+        update = ProjectUpdate.objects.create(
+            project=self.project, author=self.supervisor, title='Deck', content='', image=photo()
+        )
+        old = derivatives.generate(update)
+
+        update.image = photo('other.jpg', (800, 800))
+        update.save()
+        derivatives.process(ProjectUpdate, update.pk)
+
+        update.refresh_from_db()
+        self.assertEqual(update.image_variants['source'], update.image.name)
+        self.assertFalse(default_storage.exists(old['thumb']))
+        self.assertTrue(default_storage.exists(update.image_variants['thumb']))
+
+    def test_backfill_command_processes_stale_images(self):
+        update = ProjectUpdate.objects.create(
+            project=self.project, author=self.supervisor, title='Deck', content='', image=photo()
+        )
+        self.supervisor.profile_picture = photo('avatar.jpg', (600, 600))
+        self.supervisor.save()
+
+        # Threads don't share the test transaction, so run the pool's jobs inline
+        with mock.patch('imaging.derivatives.ThreadPoolExecutor') as pool:
+            pool.return_value.__enter__.return_value.map = map
+            call_command('generate_image_derivatives', stdout=io.StringIO())
+
+        update.refresh_from_db()
+        self.supervisor.refresh_from_db()
+        self.assertIn('preview', update.image_variants)
+        self.assertEqual(set(self.supervisor.profile_picture_variants), {'source', 'thumb'})
+
+    def test_media_serving_supports_validators_and_ranges(self):
+        update = ProjectUpdate.objects.create(
+            project=self.project, author=self.supervisor, title='Deck', content='', image=photo()
+        )
+        variants = derivatives.generate(update)
+        url = f"/media/{variants['thumb']}"
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        body = b''.join(response.streaming_content)
+        self.assertEqual(len(body), int(response['Content-Length']))
+
+        revalidated = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+
+        partial = self.client.get(url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial['Content-Range'], f'bytes 10-19/{len(body)}')
+        self.assertEqual(b''.join(partial.streaming_content), body[10:20])
+
+        stale = self.client.get(url, HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(stale.status_code, 200)
+
+        unsatisfiable = self.client.get(url, HTTP_RANGE=f'bytes={len(body)}-')
+        self.assertEqual(unsatisfiable.status_code, 416)
+
+    def test_originals_are_cached_briefly_and_revalidated(self):
+        update = ProjectUpdate.objects.create(
+            project=self.project, author=self.supervisor, title='Deck', content='', image=photo()
+        )
+        response = self.client.get(f"/media/{update.image.name}")
+
+        self.assertEqual(response['Cache-Control'], 'public, max-age=60')
+        revalidated = self.client.get(f"/media/{update.image.name}", HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertEqual(revalidated['Cache-Control'], 'public, max-age=60')
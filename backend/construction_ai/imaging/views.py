@@ -0,0 +1,128 @@
+"""
+Media file serving with validators, byte ranges and long cache lifetimes.
+
+A drop-in for ``django.views.static.serve`` for deployments where Django serves
+MEDIA_ROOT itself (development, or behind a caching proxy). Responses carry an
+``ETag``/``Last-Modified`` pair so clients revalidate with a 304, honour a
+single ``Range`` (resumed downloads, seeking). Derivative names embed a digest
+of their source, so derivatives are cacheable for
+``IMAGE_DERIVATIVES['MEDIA_MAX_AGE']`` seconds and marked ``immutable``. Any
+other file may be replaced under the same name, so it is cached for only
+``ORIGINAL_MAX_AGE`` seconds and then revalidated against its ``ETag``.
+"""
+import mimetypes
+import posixpath
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+from .derivatives import imaging_setting
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def file_etag(stat):
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def parse_range(header, size):
+    """(start, end) inclusive for a single satisfiable byte range, None to serve everything, or 'invalid'"""
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        # Multiple ranges or another unit: serving the whole file is allowed
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return 'invalid'
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return 'invalid'
+    return start, end
+
+
+def read_range(path, start, length):
+    with open(path, 'rb') as handle:
+        handle.seek(start)
+        while length > 0:
+            chunk = handle.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def if_range_matches(request, etag, mtime):
+    """A stale If-Range means the client's partial copy is outdated, so send the whole file"""
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    since = parse_http_date_safe(if_range)
+    return since is not None and int(mtime) <= since
+
+
+@require_safe
+def serve_media(request, path):
+    normalized = posixpath.normpath(path).lstrip('/')
+    try:
+        fullpath = Path(safe_join(settings.MEDIA_ROOT, normalized))
+    except SuspiciousFileOperation:
+        raise Http404("File not found")
+    if not fullpath.is_file():
+        raise Http404("File not found")
+
+    stat = fullpath.stat()
+    etag = file_etag(stat)
+    last_modified = http_date(stat.st_mtime)
+    if '/derivatives/' in f'/{normalized}':
+        cache_control = f"public, max-age={imaging_setting('MEDIA_MAX_AGE')}, immutable"
+    else:
+        cache_control = f"public, max-age={imaging_setting('ORIGINAL_MAX_AGE')}"
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if not_modified is not None:
+        not_modified['Cache-Control'] = cache_control
+        return not_modified
+
+    content_type, encoding = mimetypes.guess_type(str(fullpath))
+    content_type = content_type or 'application/octet-stream'
+    byte_range = None
+    if request.headers.get('Range') and if_range_matches(request, etag, stat.st_mtime):
+        byte_range = parse_range(request.headers['Range'], stat.st_size)
+
+    if byte_range == 'invalid':
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+    elif byte_range is not None:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(read_range(fullpath, start, length), status=206,
+                                         content_type=content_type)
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        response['Content-Length'] = str(length)
+    else:
+        response = FileResponse(fullpath.open('rb'), content_type=content_type)
+        response['Content-Length'] = str(stat.st_size)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = last_modified
+    response['Cache-Control'] = cache_control
+    return response
@@ -0,0 +1,143 @@
+"""
+Per-request latency and SQL instrumentation.
+
+``RequestMetricsMiddleware`` wraps every query the request runs on the
+default connection (``connection.execute_wrapper``, so it works with
+``DEBUG`` off), then records latency, query count, SQL time and response size
+in ``metrics.registry`` labelled by the resolved view: ``ProjectViewSet.list``,
+``MessageViewSet.create``, ``UserProfileView.get`` or a plain function's
+name. Requests slower than ``REQUEST_METRICS['SLOW_REQUEST_MS']`` are logged
+to ``metrics.slow_requests`` as one JSON object carrying the worst queries.
+
+Streamed bodies are produced after the middleware returns, so their queries
+and size are not included; async views (the chat stream) run their queries in
+other threads and only their latency is recorded.
+"""
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+
+from .registry import registry
+
+slow_logger = logging.getLogger('metrics.slow_requests')
+
+DEFAULTS = {
+    'ENABLED': True,
+    'SLOW_REQUEST_MS': 500,
+    'WORST_QUERIES': 5,
+    'MAX_SQL_LENGTH': 500,
+    # Clients allowed to scrape /metrics/ without a staff login
+    'ALLOWED_IPS': ('127.0.0.1', '::1'),
+}
+
+
+def metrics_setting(name):
+    return getattr(settings, 'REQUEST_METRICS', {}).get(name, DEFAULTS[name])
+
+
+def view_label(request):
+    """'<View class>.<action>' for the view the request resolved to"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    view = match.func
+    cls = getattr(view, 'cls', None) or getattr(view, 'view_class', None)
+    if cls is None:
+        return getattr(view, '__name__', match.view_name or 'unknown')
+    method = request.method.lower()
+    # ViewSet.as_view() records the method -> action mapping it was routed with
+    action = (getattr(view, 'actions', None) or {}).get(method, method)
+    return f'{cls.__name__}.{action}'
+
+
+class QueryRecorder:
+    """execute_wrapper that times every query; keeps only the slowest few"""
+
+    def __init__(self, keep):
+        self.keep = keep
+        self.count = 0
+        self.duration = 0.0
+        self.worst = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+            if len(self.worst) < self.keep or elapsed > self.worst[-1][0]:
+                self.worst.append((elapsed, sql))
+                self.worst.sort(key=lambda entry: -entry[0])
+                del self.worst[self.keep:]
+
+
+def response_size(response):
+    if response.streaming:
+        return None
+    return len(response.content)
+
+
+def record(request, response, elapsed, queries=None):
+    labels = {'view': view_label(request), 'method': request.method, 'status': str(response.status_code)}
+    registry.observe('http_request_duration_seconds', labels, elapsed)
+    if queries is not None:
+        registry.observe('http_request_db_queries', labels, queries.count)
+        registry.observe('http_request_db_duration_seconds', labels, queries.duration)
+    size = response_size(response)
+    if size is not None:
+        registry.observe('http_response_size_bytes', labels, size)
+
+    if elapsed * 1000 >= metrics_setting('SLOW_REQUEST_MS'):
+        limit = metrics_setting('MAX_SQL_LENGTH')
+        slow_logger.warning(json.dumps({
+            'event': 'slow_request',
+            'view': labels['view'],
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(elapsed * 1000, 1),
+            'queries': queries.count if queries else None,
+            'sql_ms': round(queries.duration * 1000, 1) if queries else None,
+            'response_bytes': size,
+            'worst_queries': [
+                {'ms': round(duration * 1000, 2), 'sql': sql[:limit]}
+                for duration, sql in (queries.worst if queries else [])
+            ],
+        }))
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = metrics_setting('ENABLED')
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+        queries = QueryRecorder(metrics_setting('WORST_QUERIES'))
+        started = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        record(request, response, time.perf_counter() - started, queries)
+        return response
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        record(request, response, time.perf_counter() - started)
+        return response
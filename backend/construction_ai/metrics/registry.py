@@ -0,0 +1,122 @@
+"""
+In-process histograms and counters rendered in the Prometheus text format.
+
+Each worker process keeps its own registry, so scrape every process (or put
+one process behind the metrics endpoint) rather than a load balancer; counts
+restart from zero when a process restarts, which Prometheus' ``rate()``
+already tolerates.
+"""
+import threading
+from bisect import bisect_left
+
+# name -> (help text, bucket upper bounds)
+HISTOGRAMS = {
+    'http_request_duration_seconds': (
+        "Time spent handling the request",
+        (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+    ),
+    'http_request_db_queries': (
+        "SQL queries issued while handling the request",
+        (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+    ),
+    'http_request_db_duration_seconds': (
+        "Time spent in SQL while handling the request",
+        (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+    ),
+    'http_response_size_bytes': (
+        "Size of the response body (streamed responses are not counted)",
+        (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+    ),
+}
+
+# name -> help text
+COUNTERS = {
+    'ai_answer_cache_requests_total': "AI answer cache lookups by result (hit or miss)",
+}
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def cumulative(self):
+        """(upper bound, observations <= bound) pairs ending with +Inf"""
+        total = 0
+        for bound, count in zip(list(self.buckets) + ['+Inf'], self.counts):
+            total += count
+            yield bound, total
+
+
+class Registry:
+    def __init__(self):
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name, labels, amount=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def value(self, name, labels):
+        return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def observe(self, name, labels, value):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(HISTOGRAMS[name][1])
+            histogram.observe(value)
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def render(self):
+        """The registry in the Prometheus text exposition format"""
+        with self._lock:
+            snapshot = sorted(
+                (key, list(histogram.cumulative()), histogram.sum)
+                for key, histogram in self._histograms.items()
+            )
+            counters = sorted(self._counters.items())
+        lines = []
+        for name, (help_text, _) in HISTOGRAMS.items():
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+            for (metric, labels), buckets, total in snapshot:
+                if metric != name:
+                    continue
+                for bound, count in buckets:
+                    lines.append(f'{name}_bucket{format_labels(labels + (("le", format_value(bound)),))} {count}')
+                lines.append(f'{name}_sum{format_labels(labels)} {format_value(total)}')
+                lines.append(f'{name}_count{format_labels(labels)} {buckets[-1][1]}')
+        for name, help_text in COUNTERS.items():
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+            lines += [
+                f'{name}{format_labels(labels)} {count}'
+                for (metric, labels), count in counters if metric == name
+            ]
+        return '\n'.join(lines) + '\n'
+
+
+def format_value(value):
+    return value if isinstance(value, str) else repr(float(value))
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def format_labels(labels):
+    return '{' + ','.join(f'{key}="{escape(value)}"' for key, value in labels) + '}' if labels else ''
+
+
+registry = Registry()
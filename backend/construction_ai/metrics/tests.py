@@ -0,0 +1,66 @@
+import json
+from datetime import date
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from accounts.models import User
+from .registry import Registry, registry
+
+
+class RegistryTests(TestCase):
+    def test_render_prometheus_text(self):
+        metrics = Registry()
+        metrics.observe('http_request_db_queries', {'view': 'ProjectViewSet.list'}, 3)
+        metrics.observe('http_request_db_queries', {'view': 'ProjectViewSet.list'}, 40)
+
+        text = metrics.render()
+        self.assertIn('# TYPE http_request_db_queries histogram', text)
+        self.assertIn('http_request_db_queries_bucket{view="ProjectViewSet.list",le="3.0"} 1', text)
+        self.assertIn('http_request_db_queries_bucket{view="ProjectViewSet.list",le="+Inf"} 2', text)
+        self.assertIn('http_request_db_queries_sum{view="ProjectViewSet.list"} 43.0', text)
+        self.assertIn('http_request_db_queries_count{view="ProjectViewSet.list"} 2', text)
+
+
+class RequestMetricsTests(APITestCase):
+    def setUp(self):
+        registry.clear()
+        self.supervisor = User.objects.create_user(username='supervisor', email='s@example.com', role='supervisor')
+        self.client.force_authenticate(self.supervisor)
+
+    def create_project(self):
+        return self.client.post(reverse('project-list'), {
+            'title': 'Bridge', 'description': 'Test project', 'location': 'Site A',
+            'start_date': date(2025, 1, 1), 'end_date': date(2025, 12, 31),
+        })
+
+    def test_requests_are_labelled_by_viewset_action(self):
+        self.assertEqual(self.create_project().status_code, 201)
+        self.client.get(reverse('project-list'))
+
+        text = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn(
+            'http_request_duration_seconds_count{method="POST",status="201",view="ProjectViewSet.create"} 1', text
+        )
+        self.assertIn('http_request_db_queries_count{method="GET",status="200",view="ProjectViewSet.list"} 1', text)
+        self.assertIn('http_response_size_bytes_count{method="GET",status="200",view="ProjectViewSet.list"} 1', text)
+
+    @override_settings(REQUEST_METRICS={'SLOW_REQUEST_MS': 0, 'WORST_QUERIES': 2})
+    def test_slow_requests_are_logged_with_worst_queries(self):
+        with self.assertLogs('metrics.slow_requests', 'WARNING') as logs:
+            self.create_project()
+
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual(entry['view'], 'ProjectViewSet.create')
+        self.assertEqual(entry['status'], 201)
+        self.assertGreater(entry['queries'], 2)
+        self.assertEqual(len(entry['worst_queries']), 2)
+        self.assertGreaterEqual(entry['worst_queries'][0]['ms'], entry['worst_queries'][1]['ms'])
+
+    def test_metrics_endpoint_is_restricted(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.8').status_code, 403)
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
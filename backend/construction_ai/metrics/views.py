@@ -0,0 +1,14 @@
+from django.http import HttpResponse, HttpResponseForbidden
+
+from .middleware import metrics_setting
+from .registry import registry
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint; open to ALLOWED_IPS and staff users"""
+    user = getattr(request, 'user', None)
+    if request.META.get('REMOTE_ADDR') not in metrics_setting('ALLOWED_IPS') and not (user and user.is_staff):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
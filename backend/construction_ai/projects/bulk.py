@@ -0,0 +1,267 @@
+"""
+Bulk project import and streaming export.
+
+The interchange format is one JSON object per project with optional nested
+``suppliers``, ``risks`` and ``timeline_events`` lists. Timeline events may
+carry a ``key`` and a list of ``dependencies`` (keys of other events in the
+same project). The CSV form flattens this to one row per record: a ``type``
+column (``project``, ``supplier``, ``risk`` or ``timeline_event``) and a ``ref``
+column tying child rows to their project row; dependencies are ``;``-separated.
+
+Imports validate every row first, then write chunks of projects with
+``bulk_create`` inside one transaction per chunk. Because bulk_create skips
+``post_save``, counters are filled in up front and ``projects_imported`` is sent
+so other apps (e.g. chat rooms) can provision their rows in one batch.
+"""
+import csv
+import io
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from . import membership
+from .counters import is_completed_milestone, is_open_risk
+from .models import Project, ProjectSupplier, ProjectTimeline, RiskAnalysis
+from .signals import projects_imported
+
+PROJECT_FIELDS = [
+    'title', 'description', 'detailed_description', 'risk_assessment', 'mitigation_strategies',
+    'supply_chain_requirements', 'resource_allocation', 'equipment_requirements', 'location',
+    'latitude', 'longitude', 'start_date', 'end_date', 'status', 'estimated_workers', 'budget',
+    'current_spending',
+]
+SUPPLIER_FIELDS = [
+    'name', 'contact_person', 'contact_email', 'contact_phone', 'materials_provided',
+    'reliability_score', 'lead_time_days',
+]
+RISK_FIELDS = [
+    'title', 'description', 'risk_level', 'risk_category', 'probability', 'impact',
+    'mitigation_plan', 'contingency_plan', 'is_resolved', 'resolved_date',
+]
+TIMELINE_FIELDS = [
+    'title', 'description', 'start_date', 'end_date', 'completion_percentage', 'is_milestone',
+]
+
+# nested key -> (model, fields, CSV record type)
+CHILDREN = {
+    'suppliers': (ProjectSupplier, SUPPLIER_FIELDS, 'supplier'),
+    'risks': (RiskAnalysis, RISK_FIELDS, 'risk'),
+    'timeline_events': (ProjectTimeline, TIMELINE_FIELDS, 'timeline_event'),
+}
+RECORD_TYPES = {kind: key for key, (_, _, kind) in CHILDREN.items()}
+CSV_COLUMNS = ['type', 'ref', 'key', 'dependencies'] + list(dict.fromkeys(
+    PROJECT_FIELDS + SUPPLIER_FIELDS + RISK_FIELDS + TIMELINE_FIELDS
+))
+
+DEFAULT_CHUNK_SIZE = 200
+
+
+class BulkImportError(ValidationError):
+    """Raised with a list of "<location>: <message>" strings when rows are invalid"""
+
+
+# Parsing
+
+def parse_json(data):
+    if isinstance(data, (bytes, str)):
+        data = json.loads(data)
+    if isinstance(data, dict):
+        data = data.get('projects', [])
+    if not isinstance(data, list):
+        raise BulkImportError(["Expected a list of projects or {\"projects\": [...]}"])
+    return data
+
+
+def parse_csv(text):
+    if isinstance(text, bytes):
+        text = text.decode('utf-8-sig')
+    projects = {}
+    order = []
+    errors = []
+    for line, row in enumerate(csv.DictReader(io.StringIO(text)), start=2):
+        record_type = (row.pop('type', '') or '').strip()
+        ref = (row.pop('ref', '') or '').strip()
+        values = {name: value for name, value in row.items() if name and value not in (None, '')}
+        if record_type == 'project':
+            projects[ref] = dict(values, suppliers=[], risks=[], timeline_events=[])
+            order.append(ref)
+            continue
+        nested = RECORD_TYPES.get(record_type)
+        if nested is None:
+            errors.append(f"line {line}: unknown record type '{record_type}'")
+        elif ref not in projects:
+            errors.append(f"line {line}: no project row with ref '{ref}' above it")
+        else:
+            if 'dependencies' in values:
+                values['dependencies'] = [key.strip() for key in values['dependencies'].split(';') if key.strip()]
+            projects[ref][nested].append(values)
+    if errors:
+        raise BulkImportError(errors)
+    return [projects[ref] for ref in order]
+
+
+def parse(data, fmt):
+    """Parse a JSON or CSV payload into a list of project records"""
+    parsers = {'csv': parse_csv, 'json': parse_json}
+    if fmt not in parsers:
+        raise BulkImportError([f"Unsupported format '{fmt}'"])
+    try:
+        return parsers[fmt](data)
+    except (ValueError, csv.Error) as exc:
+        raise BulkImportError([f"Could not parse {fmt}: {exc}"])
+
+
+# Validation
+
+def build_instance(model, fields, values, location, errors, **extra):
+    """Validate `values` into an unsaved instance; blank values fall back to model defaults"""
+    # Assign after construction so full_clean() converts CSV strings before anything reads them
+    instance = model(**extra)
+    for name in fields:
+        if name in values and values[name] not in (None, ''):
+            setattr(instance, name, values[name])
+    try:
+        instance.full_clean(exclude=['project', 'supervisor', 'responsible_person'], validate_unique=False)
+    except ValidationError as exc:
+        for field, messages in exc.message_dict.items():
+            errors.append(f"{location} {field}: {' '.join(messages)}")
+    return instance
+
+
+def build_graph(records, supervisor):
+    """Turn parsed records into unsaved instances, collecting every validation error"""
+    errors = []
+    graph = []
+    for index, record in enumerate(records):
+        location = f"project[{index}]"
+        if not isinstance(record, dict):
+            errors.append(f"{location}: expected an object")
+            continue
+        project = build_instance(Project, PROJECT_FIELDS, record, location, errors, supervisor=supervisor)
+        children = {}
+        for key, (model, fields, _) in CHILDREN.items():
+            children[key] = [
+                build_instance(model, fields, values, f"{location}.{key}[{i}]", errors)
+                for i, values in enumerate(record.get(key) or [])
+            ]
+
+        events = record.get('timeline_events') or []
+        keys = [str(values.get('key', i)) for i, values in enumerate(events)]
+        dependencies = []
+        for i, values in enumerate(events):
+            for dependency in values.get('dependencies') or []:
+                if str(dependency) not in keys:
+                    errors.append(f"{location}.timeline_events[{i}] dependencies: unknown key '{dependency}'")
+                else:
+                    dependencies.append((i, keys.index(str(dependency))))
+
+        project.supplier_count = len(children['suppliers'])
+        project.timeline_event_count = len(children['timeline_events'])
+        project.completed_milestone_count = sum(map(is_completed_milestone, children['timeline_events']))
+        project.open_risk_count = sum(map(is_open_risk, children['risks']))
+        graph.append((project, children, dependencies))
+    if errors:
+        raise BulkImportError(errors)
+    return graph
+
+
+# Writing
+
+def write_chunk(graph):
+    projects = Project.objects.bulk_create([project for project, _, _ in graph])
+    for key in CHILDREN:
+        rows = []
+        for project, children, _ in graph:
+            for child in children[key]:
+                child.project = project
+                rows.append(child)
+        CHILDREN[key][0].objects.bulk_create(rows)
+
+    Dependency = ProjectTimeline.dependencies.through
+    Dependency.objects.bulk_create([
+        Dependency(
+            from_projecttimeline_id=children['timeline_events'][event].pk,
+            to_projecttimeline_id=children['timeline_events'][depends_on].pk,
+        )
+        for _, children, dependencies in graph
+        for event, depends_on in dependencies
+    ])
+    children = {key: [child for _, rows, _ in graph for child in rows[key]] for key in CHILDREN}
+    projects_imported.send(sender=Project, projects=projects, children=children)
+    return projects
+
+
+def import_projects(records, supervisor, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Validate and create projects with their children; returns the created projects"""
+    graph = build_graph(records, supervisor)
+    created = []
+    for start in range(0, len(graph), chunk_size):
+        with transaction.atomic():
+            created.extend(write_chunk(graph[start:start + chunk_size]))
+    membership.invalidate(supervisor.pk)
+    return created
+
+
+# Export
+
+def export_queryset(queryset):
+    return queryset.order_by('pk').prefetch_related(
+        'suppliers', 'risks', 'timeline_events__dependencies'
+    )
+
+
+def project_record(project):
+    record = {name: getattr(project, name) for name in PROJECT_FIELDS}
+    record['suppliers'] = [{name: getattr(row, name) for name in SUPPLIER_FIELDS} for row in project.suppliers.all()]
+    record['risks'] = [{name: getattr(row, name) for name in RISK_FIELDS} for row in project.risks.all()]
+    record['timeline_events'] = [
+        dict(
+            {name: getattr(row, name) for name in TIMELINE_FIELDS},
+            key=str(row.pk),
+            dependencies=[str(dependency.pk) for dependency in row.dependencies.all()],
+        )
+        for row in project.timeline_events.all()
+    ]
+    return record
+
+
+def iter_records(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    for project in export_queryset(queryset).iterator(chunk_size=chunk_size):
+        yield project_record(project)
+
+
+def export_json(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield a JSON document ({"projects": [...]}) piece by piece"""
+    yield '{"projects": ['
+    for index, record in enumerate(iter_records(queryset, chunk_size)):
+        yield (',' if index else '') + '\n' + json.dumps(record, cls=DjangoJSONEncoder)
+    yield '\n]}\n'
+
+
+class _Echo:
+    """File-like object whose write() returns the line instead of buffering it"""
+    def write(self, value):
+        return value
+
+
+def export_csv(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield CSV lines, one row per project and per child record"""
+    writer = csv.DictWriter(_Echo(), fieldnames=CSV_COLUMNS)
+    yield writer.writeheader()
+    for index, record in enumerate(iter_records(queryset, chunk_size)):
+        ref = str(index)
+        children = {key: record.pop(key) for key in CHILDREN}
+        yield writer.writerow(dict(record, type='project', ref=ref))
+        for key, (_, _, kind) in CHILDREN.items():
+            for child in children[key]:
+                if 'dependencies' in child:
+                    child['dependencies'] = ';'.join(child['dependencies'])
+                yield writer.writerow(dict(child, type=kind, ref=ref))
+
+
+EXPORTERS = {
+    'json': (export_json, 'application/json'),
+    'csv': (export_csv, 'text/csv'),
+}
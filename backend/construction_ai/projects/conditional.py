@@ -0,0 +1,63 @@
+"""
+Conditional GET for project resources.
+
+A project's detail view and its ``?project_id=`` sub-resource lists only
+change when the project's content version does (see ``projects.versioning``),
+so the version and ``content_modified_at`` serve as ``ETag`` and
+``Last-Modified``. Revalidating costs one primary-key lookup of those two
+columns; when the client's copy is current it gets a ``304`` before any rows
+are loaded or serialized. Permission checks run first, so a user who lost
+access never learns the project changed.
+
+Nested user fields (names, avatars) are not covered by the version; they are
+refreshed with the next change to the project.
+"""
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .models import Project
+
+
+class Validators:
+    def __init__(self, project_id, version, modified_at):
+        self.etag = f'W/"project-{project_id}-{version}"'
+        self.last_modified = int(modified_at.timestamp())
+
+    @classmethod
+    def of(cls, project):
+        return cls(project.pk, project.content_version, project.content_modified_at)
+
+
+def project_validators(project_id):
+    """Validators for the project's current content, or None if it doesn't exist"""
+    row = Project.objects.filter(pk=project_id).values_list('content_version', 'content_modified_at').first()
+    return Validators(project_id, *row) if row else None
+
+
+def is_conditional(request):
+    return 'If-None-Match' in request.headers or 'If-Modified-Since' in request.headers
+
+
+def not_modified(request, validators):
+    """A 304 response if the client's cached copy is current, else None"""
+    if validators is None or request.method not in ('GET', 'HEAD'):
+        return None
+    return get_conditional_response(request, etag=validators.etag, last_modified=validators.last_modified)
+
+
+def add_validators(response, validators):
+    if validators is not None and response.status_code == 200:
+        response['ETag'] = validators.etag
+        response['Last-Modified'] = http_date(validators.last_modified)
+        # Per-user data: cache only in the client, and always revalidate
+        response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def respond(request, project_id, render):
+    """304 if the client's copy of the project is current, else `render()` with validators attached"""
+    validators = project_validators(project_id)
+    cached = not_modified(request, validators)
+    if cached is not None:
+        return cached
+    return add_validators(render(), validators)
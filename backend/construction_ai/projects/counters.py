@@ -0,0 +1,147 @@
+"""
+Denormalized per-project counters.
+
+Counters on ``Project`` are maintained with atomic ``F()`` updates from model
+signals, so concurrent writers never lose increments and list pages never
+aggregate. Conditional counters (open risks, completed milestones) compare the
+state an instance was loaded with against its saved state, so e.g. resolving a
+risk decrements ``open_risk_count`` exactly once. ``manage.py reconcile_counters``
+repairs any drift (e.g. after raw SQL or ``QuerySet.update`` bypassed signals).
+"""
+from collections import defaultdict
+
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import (
+    Project, ProjectWorker, ProjectUpdate, ProjectSupplier,
+    ProjectTimeline, RiskAnalysis
+)
+
+
+def is_open_risk(risk):
+    return not risk.is_resolved
+
+
+def is_completed_milestone(event):
+    return event.is_milestone and (event.completion_percentage or 0) >= 100
+
+
+# model -> {counter field: predicate deciding whether a row is counted (None = always)}
+COUNTERS = {
+    ProjectWorker: {'current_worker_count': None},
+    ProjectSupplier: {'supplier_count': None},
+    ProjectTimeline: {'timeline_event_count': None, 'completed_milestone_count': is_completed_milestone},
+    RiskAnalysis: {'open_risk_count': is_open_risk},
+    ProjectUpdate: {'update_count': None},
+}
+
+# counter field -> filters selecting the counted rows, used when reconciling
+COUNTED_ROWS = {
+    'current_worker_count': (ProjectWorker, {}),
+    'supplier_count': (ProjectSupplier, {}),
+    'timeline_event_count': (ProjectTimeline, {}),
+    'completed_milestone_count': (ProjectTimeline, {'is_milestone': True, 'completion_percentage__gte': 100}),
+    'open_risk_count': (RiskAnalysis, {'is_resolved': False}),
+    'update_count': (ProjectUpdate, {}),
+}
+
+
+def counted_state(instance):
+    counters = COUNTERS[type(instance)]
+    return {
+        field: 1 if predicate is None or predicate(instance) else 0
+        for field, predicate in counters.items()
+    }
+
+
+def remember_state(instance):
+    """Snapshot what this row contributes to its project's counters"""
+    instance._counter_state = (instance.__dict__.get('project_id'), counted_state(instance))
+
+
+def save_deltas(instance, created):
+    """{project_id: {field: delta}} caused by saving `instance`"""
+    deltas = defaultdict(dict)
+    new_state = counted_state(instance)
+    if not created:
+        old_project_id, old_state = getattr(instance, '_counter_state', (instance.project_id, new_state))
+        for field, value in old_state.items():
+            deltas[old_project_id][field] = deltas[old_project_id].get(field, 0) - value
+    for field, value in new_state.items():
+        deltas[instance.project_id][field] = deltas[instance.project_id].get(field, 0) + value
+    instance._counter_state = (instance.project_id, new_state)
+    return deltas
+
+
+def delete_deltas(instance):
+    project_id, state = getattr(instance, '_counter_state', (instance.project_id, counted_state(instance)))
+    return {project_id: {field: -value for field, value in state.items()}}
+
+
+def apply_deltas(deltas, **extra):
+    """Apply counter deltas (plus any `extra` updates) with one UPDATE per project"""
+    for project_id, changes in deltas.items():
+        updates = {field: F(field) + delta for field, delta in changes.items() if delta}
+        updates.update(extra)
+        if project_id is not None and updates:
+            Project.objects.filter(pk=project_id).update(**updates)
+
+
+def count_subquery(model, **filters):
+    """Correlated COUNT(*) over rows of `model` belonging to the outer project"""
+    counts = (
+        model.objects.filter(project=OuterRef('pk'), **filters)
+        .order_by()
+        .values('project')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def actual_counts(queryset):
+    """Annotate `queryset` with the true value of every counter as `actual_<field>`"""
+    from chat.models import Message
+
+    annotations = {
+        f'actual_{field}': count_subquery(model, **filters)
+        for field, (model, filters) in COUNTED_ROWS.items()
+    }
+    messages = (
+        Message.objects.filter(chat_room__project=OuterRef('pk'))
+        .order_by()
+        .values('chat_room__project')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    annotations['actual_message_count'] = Coalesce(Subquery(messages, output_field=IntegerField()), Value(0))
+    return queryset.annotate(**annotations)
+
+
+COUNTER_FIELDS = list(COUNTED_ROWS) + ['message_count']
+
+
+def reconcile(queryset=None, batch_size=500, dry_run=False):
+    """Recompute counters in bulk and fix drifted rows; returns the number of projects fixed"""
+    queryset = (queryset if queryset is not None else Project.objects.all()).order_by('pk')
+    fixed = 0
+    last_pk = 0
+    while True:
+        batch = list(actual_counts(queryset.filter(pk__gt=last_pk))[:batch_size])
+        if not batch:
+            return fixed
+        last_pk = batch[-1].pk
+        drifted = []
+        for project in batch:
+            changed = False
+            for field in COUNTER_FIELDS:
+                actual = getattr(project, f'actual_{field}')
+                if getattr(project, field) != actual:
+                    setattr(project, field, actual)
+                    changed = True
+            if changed:
+                drifted.append(project)
+        if drifted and not dry_run:
+            Project.objects.bulk_update(drifted, COUNTER_FIELDS)
+        fixed += len(drifted)
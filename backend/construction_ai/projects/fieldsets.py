@@ -0,0 +1,91 @@
+"""
+Sparse fieldsets and opt-in expansion for serializers.
+
+``?fields=id,title,risks.title`` limits a read to the named fields; dotted
+names select fields of a nested serializer (``risks`` alone renders risks in
+full). ``?expand=risks,updates`` names which of a serializer's
+``expandable_fields`` (its nested relations) to render; once ``expand`` is
+given, unnamed relations are left out, and a relation named in ``fields`` is
+expanded implicitly. Without either parameter the full representation is
+rendered, as before.
+
+Only the root serializer reads the request; it hands each nested serializer
+its part of the selection. Code that builds a serializer itself can pass
+``fields=`` / ``expand=`` (lists of names) instead. Views can inspect ``serializer.fields`` to learn
+which relations will be rendered and prune their prefetches to match.
+Writes ignore both parameters.
+"""
+from rest_framework import serializers
+
+
+def parse_paths(paths):
+    """['id', 'risks.title', 'risks'] -> {'id': [], 'risks': ['title']}"""
+    tree = {}
+    for path in paths:
+        path = path.strip()
+        if not path:
+            continue
+        head, _, rest = path.partition('.')
+        tree.setdefault(head, [])
+        if rest:
+            tree[head].append(rest)
+    return tree
+
+
+def child_serializer(field):
+    return field.child if isinstance(field, serializers.ListSerializer) else field
+
+
+class FlexFieldsMixin:
+    # Nested relations that ?expand= can leave out
+    expandable_fields = ()
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None or expand is not None:
+            self._selection = (
+                parse_paths(fields) if fields is not None else None,
+                parse_paths(expand) if expand is not None else None,
+            )
+
+    def selection(self):
+        """(fields tree or None, expand tree or None) for this serializer"""
+        if hasattr(self, '_selection'):
+            return self._selection
+        root = self.root
+        if root is not self and not (isinstance(root, serializers.ListSerializer) and root.child is self):
+            # Nested in a serializer that doesn't pass a selection down
+            return None, None
+        request = self.context.get('request')
+        if request is None or request.method not in ('GET', 'HEAD'):
+            return None, None
+        params = request.query_params
+        return (
+            parse_paths(params['fields'].split(',')) if 'fields' in params else None,
+            parse_paths(params['expand'].split(',')) if 'expand' in params else None,
+        )
+
+    def is_selected(self, name, fields, expand):
+        if fields is not None:
+            return name in fields
+        if name in self.expandable_fields:
+            return expand is None or name in expand
+        return True
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selected, expand = self.selection()
+        if selected is None and expand is None:
+            return fields
+
+        for name in list(fields):
+            if not self.is_selected(name, selected, expand):
+                del fields[name]
+                continue
+            nested = child_serializer(fields[name])
+            if isinstance(nested, FlexFieldsMixin):
+                nested._selection = (
+                    parse_paths(selected[name]) if selected and selected[name] else None,
+                    parse_paths(expand.get(name, [])) if expand is not None else None,
+                )
+        return fields
@@ -0,0 +1,32 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from projects import bulk
+from projects.models import Project
+
+
+class Command(BaseCommand):
+    help = "Stream projects (with suppliers, risks and timeline) as JSON or CSV in the import format"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--supervisor', help="Only export projects of this username or email")
+        parser.add_argument('--file-format', choices=list(bulk.EXPORTERS), default='json')
+        parser.add_argument('--output', help="Write to this file instead of stdout")
+        parser.add_argument('--chunk-size', type=int, default=bulk.DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        queryset = Project.objects.all()
+        supervisor = options['supervisor']
+        if supervisor:
+            lookup = 'supervisor__email' if '@' in supervisor else 'supervisor__username'
+            queryset = queryset.filter(**{lookup: supervisor})
+
+        exporter, _ = bulk.EXPORTERS[options['file_format']]
+        output = open(options['output'], 'w', newline='') if options['output'] else sys.stdout
+        try:
+            for chunk in exporter(queryset, chunk_size=options['chunk_size']):
+                output.write(chunk)
+        finally:
+            if output is not sys.stdout:
+                output.close()
@@ -0,0 +1,34 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import User
+from projects import bulk
+
+
+class Command(BaseCommand):
+    help = "Bulk-import projects with their suppliers, risks and timeline from a JSON or CSV file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="JSON or CSV file to import")
+        parser.add_argument('--supervisor', required=True, help="Username or email of the supervising user")
+        parser.add_argument('--file-format', choices=['json', 'csv'], help="Defaults to the file extension")
+        parser.add_argument('--chunk-size', type=int, default=bulk.DEFAULT_CHUNK_SIZE,
+                            help="Projects written per transaction")
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        fmt = options['file_format'] or ('csv' if path.suffix.lower() == '.csv' else 'json')
+        try:
+            supervisor = User.objects.get(role='supervisor', **(
+                {'email': options['supervisor']} if '@' in options['supervisor'] else {'username': options['supervisor']}
+            ))
+        except User.DoesNotExist:
+            raise CommandError(f"No supervisor '{options['supervisor']}'")
+
+        try:
+            records = bulk.parse(path.read_bytes(), fmt)
+            projects = bulk.import_projects(records, supervisor, chunk_size=options['chunk_size'])
+        except bulk.BulkImportError as exc:
+            raise CommandError("Import failed:\n" + "\n".join(exc.messages))
+        self.stdout.write(self.style.SUCCESS(f"Imported {len(projects)} project(s) for {supervisor.username}"))
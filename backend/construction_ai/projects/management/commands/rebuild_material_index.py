@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from projects.materials import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-create the materials index and per-material supplier rankings from ProjectSupplier. "
+        "Migrations backfill it; run it after writes that bypassed signals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS("Material index rebuilt"))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from projects.risk_summary import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the risk heatmap summary rows from RiskAnalysis, e.g. after raw SQL "
+        "or QuerySet.update() changed risks without firing signals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('project_ids', nargs='*', type=int, help="Only rebuild these projects")
+
+    def handle(self, *args, **options):
+        rebuild(options['project_ids'] or None)
+        self.stdout.write(self.style.SUCCESS("Risk summary rebuilt"))
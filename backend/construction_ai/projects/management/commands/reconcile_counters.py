@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from projects.counters import COUNTER_FIELDS, reconcile
+from projects.models import Project
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the denormalized Project counters (%s) in bulk and fix any drift. "
+        "Counters written concurrently while a batch is being fixed may be overwritten, "
+        "so prefer running it at quiet times." % ', '.join(COUNTER_FIELDS)
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('project_ids', nargs='*', type=int, help="Only reconcile these projects")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help="Report drift without writing")
+
+    def handle(self, *args, **options):
+        queryset = Project.objects.all()
+        if options['project_ids']:
+            queryset = queryset.filter(pk__in=options['project_ids'])
+        fixed = reconcile(queryset, batch_size=options['batch_size'], dry_run=options['dry_run'])
+        verb = "would be fixed" if options['dry_run'] else "fixed"
+        self.stdout.write(self.style.SUCCESS(f"{fixed} project(s) with drifted counters {verb}"))
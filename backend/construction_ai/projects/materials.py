@@ -0,0 +1,189 @@
+"""
+Cross-project materials index and supplier rankings.
+
+``ProjectSupplier.materials_provided`` is free text. On every supplier write
+it is split into normalized material names, stored once in ``Material`` and
+linked to the supplier through ``SupplierMaterial`` together with the
+supplier's normalized name, so the same supplier listed in several projects
+is recognised as one.
+
+``MaterialRanking`` holds, per supervisor (whose projects form the portfolio)
+and material, every supplier of that material ranked by average
+``reliability_score`` (higher first) and average ``lead_time_days`` (shorter
+first). Rankings are recomputed for the affected (supervisor, material) pairs
+whenever a supplier is saved or deleted, or a project changes supervisor, so a
+lookup is a single indexed read of precomputed rows. ``rebuild()`` recomputes
+everything after writes that skipped signals.
+"""
+import re
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Avg, Count, Max
+
+from .models import Material, MaterialRanking, Project, ProjectSupplier, SupplierMaterial
+
+DEFAULT_TOP = 10
+MAX_TOP = 100
+
+SEPARATORS = re.compile(r'[,;\n|]+')
+
+
+def normalize(text):
+    """Lower-case, collapse whitespace and trim punctuation: ' Ready-mix  Concrete. ' -> 'ready-mix concrete'"""
+    return ' '.join((text or '').lower().split()).strip(' .-:')
+
+
+def parse_materials(text):
+    """Distinct normalized material names in a `materials_provided` value"""
+    names = []
+    for part in SEPARATORS.split(text or ''):
+        name = normalize(part)[:100]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def supplier_key(supplier):
+    return normalize(supplier.name)[:255]
+
+
+def materials_for(names):
+    """Material rows for `names`, creating any that don't exist yet"""
+    Material.objects.bulk_create([Material(name=name) for name in names], ignore_conflicts=True)
+    return dict(Material.objects.filter(name__in=names).values_list('name', 'pk'))
+
+
+def link_suppliers(suppliers, fresh=False):
+    """
+    Replace the material links of `suppliers` from their current text; returns the
+    material ids linked before or after, which need re-ranking. `fresh` suppliers
+    are known to have no links yet.
+    """
+    suppliers = list(suppliers)
+    parsed = {supplier.pk: parse_materials(supplier.materials_provided) for supplier in suppliers}
+    material_ids = materials_for({name for names in parsed.values() for name in names})
+    affected = set()
+    if not fresh:
+        links = SupplierMaterial.objects.filter(supplier__in=suppliers)
+        affected = set(links.values_list('material_id', flat=True))
+        links.delete()
+    SupplierMaterial.objects.bulk_create([
+        SupplierMaterial(supplier_id=supplier.pk, material_id=material_ids[name], supplier_key=supplier_key(supplier))
+        for supplier in suppliers
+        for name in parsed[supplier.pk]
+    ], batch_size=500)
+    return affected | {material_ids[name] for names in parsed.values() for name in names}
+
+
+def rank(rows):
+    """Order aggregated supplier rows and number them from 1"""
+    rows = sorted(rows, key=lambda row: (-row['reliability_score'], row['lead_time_days'], row['supplier_key']))
+    for position, row in enumerate(rows, 1):
+        row['rank'] = position
+    return rows
+
+
+def refresh_rankings(supervisor_ids, material_ids):
+    """Recompute the rankings of `material_ids` for each supervisor in `supervisor_ids`"""
+    supervisor_ids = {supervisor_id for supervisor_id in supervisor_ids if supervisor_id is not None}
+    material_ids = set(material_ids)
+    if not supervisor_ids or not material_ids:
+        return
+    aggregated = (
+        SupplierMaterial.objects.filter(
+            material_id__in=material_ids, supplier__project__supervisor_id__in=supervisor_ids
+        )
+        .values('supplier__project__supervisor_id', 'material_id', 'supplier_key')
+        .annotate(
+            supplier_name=Max('supplier__name'),
+            reliability_score=Avg('supplier__reliability_score'),
+            lead_time_days=Avg('supplier__lead_time_days'),
+            project_count=Count('supplier__project', distinct=True),
+        )
+        .order_by()
+    )
+    groups = defaultdict(list)
+    for row in aggregated:
+        supervisor_id = row.pop('supplier__project__supervisor_id')
+        groups[supervisor_id, row['material_id']].append(row)
+
+    with transaction.atomic():
+        MaterialRanking.objects.filter(supervisor_id__in=supervisor_ids, material_id__in=material_ids).delete()
+        MaterialRanking.objects.bulk_create([
+            MaterialRanking(supervisor_id=supervisor_id, **row)
+            for (supervisor_id, _), rows in groups.items()
+            for row in rank(rows)
+        ], batch_size=500)
+
+
+def supervisors_of(project_ids):
+    return set(Project.objects.filter(pk__in=project_ids).values_list('supervisor_id', flat=True))
+
+
+def remember_state(supplier):
+    supplier._materials_state = supplier.__dict__.get('project_id')
+
+
+def supplier_saved(supplier):
+    material_ids = link_suppliers([supplier])
+    project_ids = {supplier.project_id, getattr(supplier, '_materials_state', None)}
+    refresh_rankings(supervisors_of(project_ids), material_ids)
+    supplier._materials_state = supplier.project_id
+
+
+def supplier_deleting(supplier):
+    """Links cascade away with the supplier, so note its materials first"""
+    supplier._deleted_material_ids = set(supplier.material_links.values_list('material_id', flat=True))
+
+
+def supplier_deleted(supplier):
+    refresh_rankings(supervisors_of([supplier.project_id]), getattr(supplier, '_deleted_material_ids', ()))
+
+
+def supervisor_changed(project, previous_supervisor_id):
+    """The project's suppliers move from one portfolio to another"""
+    material_ids = SupplierMaterial.objects.filter(supplier__project=project).values_list('material_id', flat=True)
+    refresh_rankings({previous_supervisor_id, project.supervisor_id}, set(material_ids))
+
+
+def index_imported(projects, suppliers):
+    """Link and rank newly bulk-created suppliers of `projects`"""
+    suppliers = list(suppliers)
+    if suppliers:
+        material_ids = link_suppliers(suppliers, fresh=True)
+        refresh_rankings({project.supervisor_id for project in projects}, material_ids)
+
+
+def rebuild(batch_size=500):
+    """Re-create every link and ranking from the suppliers table"""
+    with transaction.atomic():
+        SupplierMaterial.objects.all().delete()
+        MaterialRanking.objects.all().delete()
+        batch = []
+        for supplier in ProjectSupplier.objects.order_by('pk').iterator(chunk_size=batch_size):
+            batch.append(supplier)
+            if len(batch) >= batch_size:
+                link_suppliers(batch, fresh=True)
+                batch = []
+        link_suppliers(batch, fresh=True)
+        refresh_rankings(
+            Project.objects.values_list('supervisor_id', flat=True).distinct(),
+            Material.objects.values_list('pk', flat=True),
+        )
+
+
+def suppliers_for(supervisor_id, material, top=DEFAULT_TOP):
+    """Ranked suppliers of `material` in the supervisor's portfolio"""
+    rows = (
+        MaterialRanking.objects.filter(supervisor_id=supervisor_id, material__name=normalize(material))
+        .order_by('rank')
+        .values('rank', 'supplier_name', 'reliability_score', 'lead_time_days', 'project_count')[:top]
+    )
+    return {
+        'material': normalize(material),
+        'suppliers': [
+            dict(row, reliability_score=round(row['reliability_score'], 2), lead_time_days=round(row['lead_time_days'], 1))
+            for row in rows
+        ],
+    }
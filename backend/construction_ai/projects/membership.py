@@ -0,0 +1,84 @@
+"""
+Resolve which projects a user can see or manage.
+
+Membership is "the user supervises the project" for supervisors and "a
+ProjectWorker row exists" for workers. Both sets are loaded with one query,
+cached across requests under ``project-membership:<user id>`` and memoised on
+the request, so project-scoped endpoints never re-check membership per row.
+Entries are invalidated by the receivers in ``projects.signals``.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Project, ProjectWorker
+
+
+class Membership:
+    def __init__(self, user_id, role, supervised=(), assigned=()):
+        self.user_id = user_id
+        self.role = role
+        self.supervised = frozenset(supervised)
+        self.assigned = frozenset(assigned)
+
+    @property
+    def viewable(self):
+        """Ids of projects the user may read"""
+        if self.role == 'supervisor':
+            return self.supervised
+        if self.role == 'worker':
+            return self.assigned
+        return frozenset()
+
+    @property
+    def manageable(self):
+        """Ids of projects the user may change"""
+        return self.supervised if self.role == 'supervisor' else frozenset()
+
+    def can_view(self, project_id):
+        return _as_id(project_id) in self.viewable
+
+    def can_manage(self, project_id):
+        return _as_id(project_id) in self.manageable
+
+
+def _as_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def cache_key(user_id):
+    return f'project-membership:{user_id}'
+
+
+def load_membership(user):
+    """Read a user's memberships from the database (one query per role)"""
+    if user.role == 'supervisor':
+        supervised = Project.objects.filter(supervisor=user).values_list('id', flat=True)
+        return Membership(user.pk, user.role, supervised=supervised)
+    assigned = ProjectWorker.objects.filter(worker=user).values_list('project_id', flat=True)
+    return Membership(user.pk, user.role, assigned=assigned)
+
+
+def get_user_membership(user):
+    """Cached membership for a user, shared across requests"""
+    key = cache_key(user.pk)
+    membership = cache.get(key)
+    if membership is None or membership.role != user.role:
+        membership = load_membership(user)
+        cache.set(key, membership, getattr(settings, 'PROJECT_MEMBERSHIP_CACHE_TIMEOUT', 300))
+    return membership
+
+
+def get_membership(request):
+    """Membership for the request's user, resolved at most once per request"""
+    membership = getattr(request, '_project_membership', None)
+    if membership is None or membership.user_id != request.user.pk:
+        membership = get_user_membership(request.user)
+        request._project_membership = membership
+    return membership
+
+
+def invalidate(*user_ids):
+    cache.delete_many([cache_key(user_id) for user_id in user_ids if user_id is not None])
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-17 16:13
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Project = apps.get_model('projects', 'Project')
+    Message = apps.get_model('chat', 'Message')
+
+    def count(model, link='project', **filters):
+        rows = (
+            model.objects.filter(**{link: OuterRef('pk')}, **filters)
+            .order_by().values(link).annotate(total=Count('pk')).values('total')
+        )
+        return Coalesce(Subquery(rows, output_field=IntegerField()), Value(0))
+
+    Project.objects.update(
+        current_worker_count=count(apps.get_model('projects', 'ProjectWorker')),
+        supplier_count=count(apps.get_model('projects', 'ProjectSupplier')),
+        timeline_event_count=count(apps.get_model('projects', 'ProjectTimeline')),
+        completed_milestone_count=count(
+            apps.get_model('projects', 'ProjectTimeline'), is_milestone=True, completion_percentage__gte=100
+        ),
+        open_risk_count=count(apps.get_model('projects', 'RiskAnalysis'), is_resolved=False),
+        update_count=count(apps.get_model('projects', 'ProjectUpdate')),
+        message_count=count(Message, link='chat_room__project'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0004_project_content_version'),
+        ('chat', '0004_chatjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='completed_milestone_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='message_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='open_risk_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='supplier_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='timeline_event_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='update_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 16:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0005_project_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['supervisor', 'status'], name='proj_supervisor_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projecttimeline',
+            index=models.Index(fields=['project', 'start_date'], name='proj_timeline_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectupdate',
+            index=models.Index(fields=['project', 'created_at'], name='proj_update_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectworker',
+            index=models.Index(fields=['worker', 'project'], name='proj_worker_worker_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='riskanalysis',
+            index=models.Index(fields=['project', 'is_resolved', 'risk_level'], name='proj_risk_open_level_idx'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-17 16:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, FloatField, Sum
+
+
+def backfill_risk_summary(apps, schema_editor):
+    RiskAnalysis = apps.get_model('projects', 'RiskAnalysis')
+    RiskSummary = apps.get_model('projects', 'RiskSummary')
+    cells = (
+        RiskAnalysis.objects.filter(is_resolved=False).order_by()
+        .values('project_id', 'risk_category', 'risk_level')
+        .annotate(open_count=Count('pk'), total_exposure=Sum(F('probability') * F('impact'), output_field=FloatField()))
+    )
+    RiskSummary.objects.bulk_create([RiskSummary(**cell) for cell in cells], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0006_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RiskSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('risk_category', models.CharField(choices=[('supply_chain', 'Supply Chain'), ('workforce', 'Workforce'), ('financial', 'Financial'), ('weather', 'Weather/Environmental'), ('technical', 'Technical'), ('safety', 'Safety'), ('regulatory', 'Regulatory'), ('other', 'Other')], max_length=20)),
+                ('risk_level', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High'), ('critical', 'Critical')], max_length=10)),
+                ('open_count', models.IntegerField(default=0)),
+                ('total_exposure', models.FloatField(default=0.0, help_text='Sum of probability * impact over open risks')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='risk_summaries', to='projects.project')),
+            ],
+            options={
+                'unique_together': {('project', 'risk_category', 'risk_level')},
+            },
+        ),
+        migrations.RunPython(backfill_risk_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:23
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def start_from_updated_at(apps, schema_editor):
+    Project = apps.get_model('projects', 'Project')
+    Project.objects.update(content_modified_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0008_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='content_modified_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.RunPython(start_from_updated_at, migrations.RunPython.noop),
+    ]
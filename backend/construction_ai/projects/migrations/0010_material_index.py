@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0009_project_content_modified_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Material',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MaterialRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('supplier_key', models.CharField(max_length=255)),
+                ('supplier_name', models.CharField(max_length=255)),
+                ('reliability_score', models.FloatField(help_text="Average over the supplier's rows")),
+                ('lead_time_days', models.FloatField(help_text="Average over the supplier's rows")),
+                ('project_count', models.IntegerField(default=0)),
+                ('rank', models.PositiveIntegerField()),
+                ('material', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='projects.material')),
+                ('supervisor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='material_rankings', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['supervisor', 'material', 'rank'], name='proj_matrank_rank_idx')],
+                'unique_together': {('supervisor', 'material', 'supplier_key')},
+            },
+        ),
+        migrations.CreateModel(
+            name='SupplierMaterial',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('supplier_key', models.CharField(max_length=255)),
+                ('material', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='supplier_links', to='projects.material')),
+                ('supplier', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='material_links', to='projects.projectsupplier')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['material', 'supplier_key'], name='proj_supmat_material_idx')],
+                'unique_together': {('supplier', 'material')},
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:03
+
+import django.db.models.deletion
+import django.db.models.expressions
+from django.db import migrations, models
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+MAX_TOP = 50
+
+
+def backfill_risk_rankings(apps, schema_editor):
+    RiskAnalysis = apps.get_model('projects', 'RiskAnalysis')
+    RiskRanking = apps.get_model('projects', 'RiskRanking')
+    ranked = (
+        RiskAnalysis.objects.filter(is_resolved=False)
+        .annotate(rank=Window(RowNumber(), partition_by=F('project_id'), order_by=[F('exposure').desc(), F('id').asc()]))
+        .filter(rank__lte=MAX_TOP)
+        .order_by('project_id', 'rank')
+        .values_list('project_id', 'id')
+    )
+    rankings = {}
+    for project_id, risk_id in ranked:
+        rankings.setdefault(project_id, []).append(risk_id)
+    RiskRanking.objects.bulk_create(
+        [RiskRanking(project_id=project_id, risk_ids=risk_ids) for project_id, risk_ids in rankings.items()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0010_material_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RiskRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('risk_ids', models.JSONField(default=list, help_text='Up to risk_summary.MAX_TOP open risk ids, highest exposure first')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='riskanalysis',
+            name='exposure',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(models.F('probability'), '*', models.F('impact')), output_field=models.FloatField()),
+        ),
+        migrations.AddIndex(
+            model_name='riskanalysis',
+            index=models.Index(fields=['project', 'is_resolved', '-exposure', 'id'], name='proj_risk_open_exposure_idx'),
+        ),
+        migrations.AddField(
+            model_name='riskranking',
+            name='project',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='risk_ranking', to='projects.project'),
+        ),
+        migrations.RunPython(backfill_risk_rankings, migrations.RunPython.noop),
+    ]
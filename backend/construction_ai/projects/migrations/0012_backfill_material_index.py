@@ -0,0 +1,72 @@
+from collections import defaultdict
+
+from django.db import migrations
+from django.db.models import Avg, Count, Max
+
+# Pure text helpers only; the rows are written through the historical models
+from projects.materials import normalize, parse_materials, rank
+
+
+def backfill_material_index(apps, schema_editor, batch_size=500):
+    ProjectSupplier = apps.get_model('projects', 'ProjectSupplier')
+    Material = apps.get_model('projects', 'Material')
+    SupplierMaterial = apps.get_model('projects', 'SupplierMaterial')
+    MaterialRanking = apps.get_model('projects', 'MaterialRanking')
+    # Start from scratch in case rebuild_material_index already ran
+    clear_material_index(apps, schema_editor)
+
+    def link(batch):
+        parsed = {supplier.pk: parse_materials(supplier.materials_provided) for supplier in batch}
+        names = {name for names in parsed.values() for name in names}
+        Material.objects.bulk_create([Material(name=name) for name in names], ignore_conflicts=True)
+        material_ids = dict(Material.objects.filter(name__in=names).values_list('name', 'pk'))
+        SupplierMaterial.objects.bulk_create([
+            SupplierMaterial(supplier_id=supplier.pk, material_id=material_ids[name], supplier_key=normalize(supplier.name)[:255])
+            for supplier in batch
+            for name in parsed[supplier.pk]
+        ], batch_size=batch_size)
+
+    batch = []
+    for supplier in ProjectSupplier.objects.only('pk', 'name', 'materials_provided').order_by('pk').iterator(chunk_size=batch_size):
+        batch.append(supplier)
+        if len(batch) >= batch_size:
+            link(batch)
+            batch = []
+    link(batch)
+
+    aggregated = (
+        SupplierMaterial.objects.filter(supplier__project__supervisor__isnull=False)
+        .values('supplier__project__supervisor_id', 'material_id', 'supplier_key')
+        .annotate(
+            supplier_name=Max('supplier__name'),
+            reliability_score=Avg('supplier__reliability_score'),
+            lead_time_days=Avg('supplier__lead_time_days'),
+            project_count=Count('supplier__project', distinct=True),
+        )
+        .order_by()
+    )
+    groups = defaultdict(list)
+    for row in aggregated:
+        supervisor_id = row.pop('supplier__project__supervisor_id')
+        groups[supervisor_id, row['material_id']].append(row)
+    MaterialRanking.objects.bulk_create([
+        MaterialRanking(supervisor_id=supervisor_id, **row)
+        for (supervisor_id, _), rows in groups.items()
+        for row in rank(rows)
+    ], batch_size=batch_size)
+
+
+def clear_material_index(apps, schema_editor):
+    apps.get_model('projects', 'MaterialRanking').objects.all().delete()
+    apps.get_model('projects', 'SupplierMaterial').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0011_risk_ranking'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_material_index, clear_material_index),
+    ]
@@ -0,0 +1,66 @@
+from functools import partial
+
+from rest_framework import permissions
+
+from . import conditional
+from .membership import get_membership
+from .permissions import IsSupervisor, ProjectMemberPermission
+
+class ProjectScopedMixin:
+    """
+    Limit a project sub-resource viewset to the requesting user's projects.
+
+    List requests must name a `?project_id=` the user belongs to; detail
+    requests are limited to all of the user's projects. Membership comes from
+    the cached resolver, so scoping costs no queries of its own. Scoped lists
+    carry the project's validators and answer revalidation with a 304.
+    """
+    project_scoped = True
+    project_lookup = 'project_id'
+    member_writable = False
+    # Relations joined / prefetched when the serializer renders the field of the same name
+    joined_fields = ()
+    prefetched_fields = ()
+
+    def get_membership(self):
+        return get_membership(self.request)
+
+    def get_permissions(self):
+        """Members read; writes need a supervisor of the row's project unless `member_writable`"""
+        if self.action in ['create', 'update', 'partial_update', 'destroy'] and not self.member_writable:
+            return [permissions.IsAuthenticated(), IsSupervisor(), ProjectMemberPermission()]
+        return [permissions.IsAuthenticated(), ProjectMemberPermission()]
+
+    def get_queryset(self):
+        queryset = self.with_rendered_relations(super().get_queryset())
+        membership = self.get_membership()
+        project_id = self.request.query_params.get('project_id')
+
+        if project_id:
+            if not membership.can_view(project_id):
+                return queryset.none()
+            return queryset.filter(**{self.project_lookup: project_id})
+
+        if self.action == 'list':
+            return queryset.none()
+        return queryset.filter(**{f'{self.project_lookup}__in': membership.viewable})
+
+    def with_rendered_relations(self, queryset):
+        """Load the relations the (possibly ?fields=-limited) serializer will render"""
+        if not (self.joined_fields or self.prefetched_fields):
+            return queryset
+        fields = self.get_serializer().fields
+        joined = [name for name in self.joined_fields if name in fields]
+        prefetched = [name for name in self.prefetched_fields if name in fields]
+        if joined:
+            queryset = queryset.select_related(*joined)
+        if prefetched:
+            queryset = queryset.prefetch_related(*prefetched)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        project_id = request.query_params.get('project_id')
+        render = partial(super().list, request, *args, **kwargs)
+        if project_id and self.get_membership().can_view(project_id):
+            return conditional.respond(request, project_id, render)
+        return render()
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from accounts.models import User
 import uuid
 
@@ -38,23 +39,50 @@ class Project(models.Model):
     supervisor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='supervised_projects')
     estimated_workers = models.IntegerField(default=0, help_text="Approximate number of workers needed")
     current_worker_count = models.IntegerField(default=0, help_text="Current number of assigned workers")
+    
+    # Denormalized counters, maintained atomically by projects.counters
+    supplier_count = models.IntegerField(default=0, editable=False)
+    timeline_event_count = models.IntegerField(default=0, editable=False)
+    completed_milestone_count = models.IntegerField(default=0, editable=False)
+    open_risk_count = models.IntegerField(default=0, editable=False)
+    update_count = models.IntegerField(default=0, editable=False)
+    message_count = models.IntegerField(default=0, editable=False)
     budget = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     current_spending = models.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="Current project spending")
     
+    # Bumped whenever the project or one of its child rows changes (see projects.signals)
+    content_version = models.PositiveIntegerField(default=0, editable=False)
+    content_modified_at = models.DateTimeField(default=timezone.now, editable=False)
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Written only with atomic UPDATEs (projects.counters, projects.versioning, chat.signals)
+    DENORMALIZED_FIELDS = (
+        'current_worker_count', 'supplier_count', 'timeline_event_count', 'completed_milestone_count',
+        'open_risk_count', 'update_count', 'message_count', 'content_version', 'content_modified_at',
+    )
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['supervisor', 'status'], name='proj_supervisor_status_idx'),
+        ]
+    
     def __str__(self):
         return self.title
     
     def save(self, *args, **kwargs):
-        # Remove Point reference
+        """Never write denormalized fields back on update: this copy may predate changes to child rows"""
+        if self._state.adding or kwargs.get('force_insert'):
+            return super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            update_fields = [field.name for field in self._meta.concrete_fields if not field.primary_key]
+        kwargs['update_fields'] = [name for name in update_fields if name not in self.DENORMALIZED_FIELDS]
         super().save(*args, **kwargs)
-        
-        # Create a chat room for this project if it doesn't exist
-        from chat.models import ChatRoom
-        ChatRoom.objects.get_or_create(project=self)
+        # Pick up the current values (including the version bump from post_save) for the response
+        self.refresh_from_db(fields=self.DENORMALIZED_FIELDS)
         
 
 class ProjectSupplier(models.Model):
@@ -81,6 +109,10 @@ class ProjectWorker(models.Model):
     
     class Meta:
         unique_together = ('project', 'worker')
+        indexes = [
+            # Covers the membership lookup (worker -> project ids) without touching the table
+            models.Index(fields=['worker', 'project'], name='proj_worker_worker_idx'),
+        ]
     
     def __str__(self):
         return f"{self.worker.username} - {self.project.title}"
@@ -91,8 +123,15 @@ class ProjectUpdate(models.Model):
     title = models.CharField(max_length=255)
     content = models.TextField()
     image = models.ImageField(upload_to='project_updates/', blank=True, null=True)
+    # Thumbnail/preview file names, written in the background by imaging.derivatives
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['project', 'created_at'], name='proj_update_created_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.title} - {self.project.title}"
 
@@ -109,6 +148,11 @@ class ProjectTimeline(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['project', 'start_date'], name='proj_timeline_start_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.title} - {self.project.title}"
 
@@ -144,8 +188,84 @@ class RiskAnalysis(models.Model):
     resolved_date = models.DateField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # probability * impact, computed by the database so bulk writes and UPDATEs keep it current
+    exposure = models.GeneratedField(
+        expression=models.F('probability') * models.F('impact'), output_field=models.FloatField(), db_persist=True
+    )
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['project', 'is_resolved', 'risk_level'], name='proj_risk_open_level_idx'),
+            # A project's open risks by exposure: top-N reads stop after N index entries
+            models.Index(fields=['project', 'is_resolved', '-exposure', 'id'], name='proj_risk_open_exposure_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.project.title}"
 
+class RiskSummary(models.Model):
+    """Open-risk totals per project and (category, level) cell, kept current by projects.risk_summary"""
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='risk_summaries')
+    risk_category = models.CharField(max_length=20, choices=RiskAnalysis.RISK_CATEGORY_CHOICES)
+    risk_level = models.CharField(max_length=10, choices=RiskAnalysis.RISK_LEVEL_CHOICES)
+    open_count = models.IntegerField(default=0)
+    total_exposure = models.FloatField(default=0.0, help_text="Sum of probability * impact over open risks")
+    
+    class Meta:
+        unique_together = ('project', 'risk_category', 'risk_level')
+    
+    def __str__(self):
+        return f"{self.project_id} {self.risk_category}/{self.risk_level}: {self.open_count}"
+
+class RiskRanking(models.Model):
+    """A project's open risks with the highest exposure, kept current by projects.risk_summary"""
+    project = models.OneToOneField(Project, on_delete=models.CASCADE, related_name='risk_ranking')
+    risk_ids = models.JSONField(default=list, help_text="Up to risk_summary.MAX_TOP open risk ids, highest exposure first")
+    
+    def __str__(self):
+        return f"{self.project_id}: {self.risk_ids}"
+
+class Material(models.Model):
+    """A material named in some supplier's `materials_provided`, by its normalized name"""
+    name = models.CharField(max_length=100, unique=True)
+    
+    def __str__(self):
+        return self.name
+
+class SupplierMaterial(models.Model):
+    """Links a supplier row to each material it provides, kept current by projects.materials"""
+    supplier = models.ForeignKey(ProjectSupplier, on_delete=models.CASCADE, related_name='material_links')
+    material = models.ForeignKey(Material, on_delete=models.CASCADE, related_name='supplier_links')
+    # Normalized supplier name: the same supplier listed in several projects shares a key
+    supplier_key = models.CharField(max_length=255)
+    
+    class Meta:
+        unique_together = ('supplier', 'material')
+        indexes = [
+            models.Index(fields=['material', 'supplier_key'], name='proj_supmat_material_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.supplier_key}: {self.material_id}"
+
+class MaterialRanking(models.Model):
+    """Suppliers of a material across one supervisor's projects, in rank order (see projects.materials)"""
+    supervisor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='material_rankings')
+    material = models.ForeignKey(Material, on_delete=models.CASCADE, related_name='rankings')
+    supplier_key = models.CharField(max_length=255)
+    supplier_name = models.CharField(max_length=255)
+    reliability_score = models.FloatField(help_text="Average over the supplier's rows")
+    lead_time_days = models.FloatField(help_text="Average over the supplier's rows")
+    project_count = models.IntegerField(default=0)
+    rank = models.PositiveIntegerField()
+    
+    class Meta:
+        unique_together = ('supervisor', 'material', 'supplier_key')
+        indexes = [
+            models.Index(fields=['supervisor', 'material', 'rank'], name='proj_matrank_rank_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.material_id} #{self.rank}: {self.supplier_name}"
+
 # Remove ProjectChat class as we're using the separate chat app
\ No newline at end of file
@@ -1,12 +1,44 @@
 from rest_framework import permissions
 
+from .membership import get_membership
+from .models import Project
+
 class IsSupervisor(permissions.BasePermission):
+    """Permission to only allow supervisors to create/edit projects"""
     def has_permission(self, request, view):
         return request.user.role == 'supervisor'
 
-class IsProjectMember(permissions.BasePermission):
+def project_id_of(obj):
+    """Project id of a project or of any row that belongs to one"""
+    if isinstance(obj, Project):
+        return obj.pk
+    if hasattr(obj, 'project_id'):
+        return obj.project_id
+    return obj.chat_room.project_id
+
+class ProjectMemberPermission(permissions.BasePermission):
+    """
+    Project members may read; only the project's supervisor may write, unless
+    the view sets `member_writable` (e.g. any member may post an update).
+    """
+    message = "You don't have permission to access this project"
+
+    def has_permission(self, request, view):
+        # Created or moved sub-resource rows must point at a project the user may write to
+        if getattr(view, 'project_scoped', False) and request.method not in permissions.SAFE_METHODS:
+            project_id = request.data.get('project')
+            if project_id is not None:
+                return self.can_write(request, view, project_id)
+        return True
+
     def has_object_permission(self, request, view, obj):
-        # Supervisors see all; workers only their assigned
-        if request.user.role == 'supervisor':
-            return obj.created_by == request.user
-        return request.user in obj.workers.all()
+        project_id = project_id_of(obj)
+        if request.method in permissions.SAFE_METHODS:
+            return get_membership(request).can_view(project_id)
+        return self.can_write(request, view, project_id)
+
+    def can_write(self, request, view, project_id):
+        membership = get_membership(request)
+        if getattr(view, 'member_writable', False):
+            return membership.can_view(project_id)
+        return membership.can_manage(project_id)
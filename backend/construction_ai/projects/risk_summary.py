@@ -0,0 +1,190 @@
+"""
+Portfolio risk heatmap.
+
+``RiskSummary`` holds one row per project and (category, level) cell with the
+number of open risks and their summed exposure (probability * impact). Like
+the counters in ``projects.counters``, rows are adjusted with atomic ``F()``
+updates from ``RiskAnalysis`` signals, comparing the state a risk was loaded
+with against its saved state, so the heatmap is a small aggregate over at most
+32 rows per project however many risks exist. ``rebuild()`` recomputes rows
+from scratch after bulk writes that skip signals.
+
+The top exposures come from ``RiskRanking``: each project's ``MAX_TOP`` open
+risk ids, highest exposure first. A risk write that changes what it counts
+for re-reads its project's list, a range scan of at most ``MAX_TOP`` entries
+of the ``(project, is_resolved, -exposure, id)`` index over the database-computed
+``RiskAnalysis.exposure``. The heatmap then loads at most ``top`` risks per
+project, so neither part grows with the number of risks.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, FloatField, Sum, Window
+from django.db.models.functions import Coalesce, RowNumber
+
+from .models import RiskAnalysis, RiskRanking, RiskSummary
+
+DEFAULT_TOP = 5
+MAX_TOP = 50
+
+
+def exposure_of(risk):
+    return (risk.probability or 0) * (risk.impact or 0)
+
+
+def summary_state(risk):
+    """(project id, category, level, exposure) for an open risk, None when it doesn't count"""
+    if risk.is_resolved or risk.__dict__.get('project_id') is None:
+        return None
+    return (risk.project_id, risk.risk_category, risk.risk_level, float(exposure_of(risk)))
+
+
+def remember_state(risk):
+    risk._summary_state = summary_state(risk)
+
+
+def adjust(state, sign):
+    project_id, category, level, exposure = state
+    cell = RiskSummary.objects.filter(project_id=project_id, risk_category=category, risk_level=level)
+    updated = cell.update(open_count=F('open_count') + sign, total_exposure=F('total_exposure') + sign * exposure)
+    if updated or sign < 0:
+        return
+    try:
+        with transaction.atomic():
+            RiskSummary.objects.create(
+                project_id=project_id, risk_category=category, risk_level=level,
+                open_count=1, total_exposure=exposure
+            )
+    except IntegrityError:
+        # Another writer created the cell first
+        cell.update(open_count=F('open_count') + 1, total_exposure=F('total_exposure') + exposure)
+
+
+def ranked_ids(project_id):
+    return list(
+        RiskAnalysis.objects.filter(project_id=project_id, is_resolved=False)
+        .order_by('-exposure', 'id').values_list('id', flat=True)[:MAX_TOP]
+    )
+
+
+def refresh_ranking(project_id, create=True):
+    """Re-read the project's top open risks; deletes only update, so a cascade can't recreate the row"""
+    if create:
+        RiskRanking.objects.update_or_create(project_id=project_id, defaults={'risk_ids': ranked_ids(project_id)})
+    else:
+        RiskRanking.objects.filter(project_id=project_id).update(risk_ids=ranked_ids(project_id))
+
+
+def risk_saved(risk, created):
+    old_state = None if created else getattr(risk, '_summary_state', None)
+    new_state = summary_state(risk)
+    if old_state != new_state:
+        if old_state:
+            adjust(old_state, -1)
+        if new_state:
+            adjust(new_state, 1)
+        for project_id in {state[0] for state in (old_state, new_state) if state}:
+            refresh_ranking(project_id)
+    risk._summary_state = new_state
+
+
+def risk_deleted(risk):
+    state = getattr(risk, '_summary_state', None)
+    if state:
+        adjust(state, -1)
+        refresh_ranking(state[0], create=False)
+
+
+def rank(risks):
+    """{project id: its top MAX_TOP open risk ids} for the open risks in `risks`, in one query"""
+    ranked = (
+        risks.annotate(rank=Window(RowNumber(), partition_by=F('project_id'), order_by=[F('exposure').desc(), F('id').asc()]))
+        .filter(rank__lte=MAX_TOP)
+        .order_by('project_id', 'rank')
+        .values_list('project_id', 'id')
+    )
+    rankings = {}
+    for project_id, risk_id in ranked:
+        rankings.setdefault(project_id, []).append(risk_id)
+    return rankings
+
+
+def rebuild(project_ids=None, replace=True):
+    """
+    Recompute summary rows for `project_ids` (all projects when None) from the risks table.
+    Pass replace=False for projects known to have no summary rows yet (e.g. just imported).
+    """
+    risks = RiskAnalysis.objects.filter(is_resolved=False)
+    summaries = RiskSummary.objects.all()
+    rankings = RiskRanking.objects.all()
+    if project_ids is not None:
+        risks = risks.filter(project_id__in=project_ids)
+        summaries = summaries.filter(project_id__in=project_ids)
+        rankings = rankings.filter(project_id__in=project_ids)
+    cells = (
+        risks.order_by()
+        .values('project_id', 'risk_category', 'risk_level')
+        .annotate(open_count=Count('pk'), total_exposure=Sum(F('probability') * F('impact'), output_field=FloatField()))
+    )
+
+    def create():
+        RiskSummary.objects.bulk_create([RiskSummary(**cell) for cell in cells], batch_size=500)
+        RiskRanking.objects.bulk_create(
+            [RiskRanking(project_id=project_id, risk_ids=ids) for project_id, ids in rank(risks).items()],
+            batch_size=500,
+        )
+
+    if not replace:
+        create()
+        return
+    with transaction.atomic():
+        summaries.delete()
+        rankings.delete()
+        create()
+
+
+def heatmap(project_ids, top=DEFAULT_TOP):
+    """Open risks per (category, level) across `project_ids`, plus each project's top-`top` exposures"""
+    cells = (
+        RiskSummary.objects.filter(project_id__in=project_ids, open_count__gt=0)
+        .values('risk_category', 'risk_level')
+        .annotate(
+            open_count=Coalesce(Sum('open_count'), 0),
+            exposure=Coalesce(Sum('total_exposure'), 0.0),
+            projects=Count('project', distinct=True),
+        )
+        .order_by('risk_category', 'risk_level')
+    )
+    cells = [dict(cell, exposure=round(cell['exposure'], 4)) for cell in cells]
+
+    rankings = {
+        project_id: risk_ids[:top]
+        for project_id, risk_ids in RiskRanking.objects.filter(project_id__in=project_ids)
+        .order_by('project_id').values_list('project_id', 'risk_ids')
+        if risk_ids
+    }
+    risks = {
+        risk['id']: risk
+        for risk in RiskAnalysis.objects.filter(id__in=[pk for ids in rankings.values() for pk in ids]).values(
+            'id', 'project__title', 'title', 'risk_category', 'risk_level', 'probability', 'impact', 'exposure'
+        )
+    }
+    top_exposures = {}
+    titles = {}
+    for project_id, risk_ids in rankings.items():
+        for pk in risk_ids:
+            if pk in risks:
+                titles[project_id] = risks[pk].pop('project__title')
+                top_exposures.setdefault(project_id, []).append(risks[pk])
+
+    return {
+        'categories': [key for key, _ in RiskAnalysis.RISK_CATEGORY_CHOICES],
+        'levels': [key for key, _ in RiskAnalysis.RISK_LEVEL_CHOICES],
+        'cells': cells,
+        'totals': {
+            'open_count': sum(cell['open_count'] for cell in cells),
+            'exposure': round(sum(cell['exposure'] for cell in cells), 4),
+        },
+        'top_exposures': [
+            {'project': project_id, 'title': titles[project_id], 'risks': risks}
+            for project_id, risks in top_exposures.items()
+        ],
+    }
@@ -0,0 +1,133 @@
+"""
+Critical-path analysis over ``ProjectTimeline.dependencies``.
+
+An event's ``dependencies`` are the events that must finish before it can
+start. Events and edges are loaded in two queries and scheduled with Kahn's
+topological sort, so the forward pass (earliest start/finish), the backward
+pass (latest start/finish) and slack are all O(events + edges). Events left
+over by the sort sit on a dependency cycle and are reported instead of a
+schedule. Durations come from each event's planned dates; offsets are in days
+from the earliest planned start. Results are cached under the project's
+``content_version``, which every timeline save, delete and dependency change bumps.
+"""
+from collections import deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import ProjectTimeline
+
+
+class ScheduleCycleError(Exception):
+    """The dependency graph has at least one cycle; `event_ids` are the events on or behind it"""
+    def __init__(self, event_ids):
+        self.event_ids = sorted(event_ids)
+        super().__init__(f"Timeline dependencies form a cycle through events {self.event_ids}")
+
+
+def load_graph(project_id):
+    """(events, edges) for a project; an edge (a, b) means b depends on a"""
+    events = list(
+        ProjectTimeline.objects.filter(project_id=project_id)
+        .order_by('start_date', 'id')
+        .values('id', 'title', 'start_date', 'end_date', 'is_milestone', 'completion_percentage')
+    )
+    Dependency = ProjectTimeline.dependencies.through
+    edges = list(
+        Dependency.objects.filter(from_projecttimeline__project_id=project_id)
+        .values_list('to_projecttimeline_id', 'from_projecttimeline_id')
+    )
+    return events, edges
+
+
+def topological_order(event_ids, edges):
+    """Kahn's algorithm; returns (order, successors, predecessors) or raises ScheduleCycleError"""
+    successors = {event_id: [] for event_id in event_ids}
+    predecessors = {event_id: [] for event_id in event_ids}
+    for before, after in edges:
+        # Dependencies on other projects' events don't constrain this schedule
+        if before in successors and after in successors:
+            successors[before].append(after)
+            predecessors[after].append(before)
+
+    indegree = {event_id: len(predecessors[event_id]) for event_id in event_ids}
+    ready = deque(event_id for event_id in event_ids if not indegree[event_id])
+    order = []
+    while ready:
+        event_id = ready.popleft()
+        order.append(event_id)
+        for successor in successors[event_id]:
+            indegree[successor] -= 1
+            if not indegree[successor]:
+                ready.append(successor)
+    if len(order) != len(event_ids):
+        raise ScheduleCycleError(event_id for event_id in event_ids if indegree[event_id])
+    return order, successors, predecessors
+
+
+def duration_of(event):
+    return max((event['end_date'] - event['start_date']).days, 0)
+
+
+def compute_schedule(events, edges):
+    """Earliest/latest start and finish, slack and the critical path for `events`"""
+    by_id = {event['id']: event for event in events}
+    order, successors, predecessors = topological_order(list(by_id), edges)
+    duration = {event_id: duration_of(by_id[event_id]) for event_id in order}
+
+    earliest_start = {}
+    for event_id in order:
+        earliest_start[event_id] = max(
+            (earliest_start[before] + duration[before] for before in predecessors[event_id]), default=0
+        )
+    finish = max((earliest_start[event_id] + duration[event_id] for event_id in order), default=0)
+
+    latest_start = {}
+    for event_id in reversed(order):
+        latest_finish = min((latest_start[after] for after in successors[event_id]), default=finish)
+        latest_start[event_id] = latest_finish - duration[event_id]
+
+    anchor = min((event['start_date'] for event in events), default=None)
+    rows = []
+    for event_id in order:
+        event = by_id[event_id]
+        slack = latest_start[event_id] - earliest_start[event_id]
+        rows.append({
+            'id': event_id,
+            'title': event['title'],
+            'is_milestone': event['is_milestone'],
+            'completion_percentage': event['completion_percentage'],
+            'duration_days': duration[event_id],
+            'dependencies': predecessors[event_id],
+            'earliest_start': anchor + timedelta(days=earliest_start[event_id]),
+            'earliest_finish': anchor + timedelta(days=earliest_start[event_id] + duration[event_id]),
+            'latest_start': anchor + timedelta(days=latest_start[event_id]),
+            'latest_finish': anchor + timedelta(days=latest_start[event_id] + duration[event_id]),
+            'slack_days': slack,
+            'is_critical': slack == 0,
+        })
+    return {
+        'start_date': anchor,
+        'finish_date': anchor + timedelta(days=finish) if anchor else None,
+        'duration_days': finish,
+        # Zero-slack events in dependency order
+        'critical_path': [row['id'] for row in rows if row['is_critical']],
+        'events': rows,
+    }
+
+
+def critical_path(project):
+    """Cached schedule for `project`; raises ScheduleCycleError for cyclic dependencies"""
+    key = f'critical-path:{project.pk}:{project.content_version}'
+    result = cache.get(key)
+    if result is None:
+        try:
+            result = compute_schedule(*load_graph(project.pk))
+        except ScheduleCycleError as exc:
+            # Cache the failure too, so a broken schedule doesn't re-query on every request
+            result = {'cycle': exc.event_ids}
+        cache.set(key, result, getattr(settings, 'CRITICAL_PATH_CACHE_TIMEOUT', 60 * 60))
+    if 'cycle' in result:
+        raise ScheduleCycleError(result['cycle'])
+    return dict(result, project=project.pk, content_version=project.content_version)
@@ -4,13 +4,18 @@ from .models import (
     ProjectTimeline, RiskAnalysis
 )
 from accounts.models import User
+from imaging.fields import ImageVariantsField
+from .fieldsets import FlexFieldsMixin
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(FlexFieldsMixin, serializers.ModelSerializer):
+    profile_picture_variants = ImageVariantsField()
+    
     class Meta:
         model = User
-        fields = ['id', 'username', 'email', 'first_name', 'last_name', 'role', 'profile_picture']
+        fields = ['id', 'username', 'email', 'first_name', 'last_name', 'role', 'profile_picture',
+                  'profile_picture_variants']
 
-class ProjectSupplierSerializer(serializers.ModelSerializer):
+class ProjectSupplierSerializer(FlexFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = ProjectSupplier
         fields = [
@@ -18,7 +23,7 @@ class ProjectSupplierSerializer(serializers.ModelSerializer):
             'materials_provided', 'reliability_score', 'lead_time_days', 'created_at'
         ]
 
-class ProjectTimelineSerializer(serializers.ModelSerializer):
+class ProjectTimelineSerializer(FlexFieldsMixin, serializers.ModelSerializer):
     responsible_person = UserSerializer(read_only=True)
     responsible_person_id = serializers.PrimaryKeyRelatedField(
         queryset=User.objects.all(),
@@ -36,7 +41,7 @@ class ProjectTimelineSerializer(serializers.ModelSerializer):
             'responsible_person', 'responsible_person_id', 'created_at', 'updated_at'
         ]
 
-class RiskAnalysisSerializer(serializers.ModelSerializer):
+class RiskAnalysisSerializer(FlexFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = RiskAnalysis
         fields = [
@@ -45,7 +50,7 @@ class RiskAnalysisSerializer(serializers.ModelSerializer):
             'is_resolved', 'resolved_date', 'created_at', 'updated_at'
         ]
 
-class ProjectWorkerSerializer(serializers.ModelSerializer):
+class ProjectWorkerSerializer(FlexFieldsMixin, serializers.ModelSerializer):
     worker = UserSerializer(read_only=True)
     worker_id = serializers.PrimaryKeyRelatedField(
         queryset=User.objects.filter(role='worker'),
@@ -74,15 +79,18 @@ class ProjectWorkerSerializer(serializers.ModelSerializer):
         
         return super().create(validated_data)
 
-class ProjectUpdateSerializer(serializers.ModelSerializer):
+class ProjectUpdateSerializer(FlexFieldsMixin, serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
+    # Thumbnail/preview URLs; empty until the background job has run
+    image_variants = ImageVariantsField()
     
     class Meta:
         model = ProjectUpdate
-        fields = ['id', 'project', 'author', 'title', 'content', 'image', 'created_at']
+        fields = ['id', 'project', 'author', 'title', 'content', 'image', 'image_variants',
+                  'created_at']
         read_only_fields = ['author']
 
-class ProjectSerializer(serializers.ModelSerializer):
+class ProjectSerializer(FlexFieldsMixin, serializers.ModelSerializer):
     supervisor = UserSerializer(read_only=True)
     workers = ProjectWorkerSerializer(source='project_workers', many=True, read_only=True)
     suppliers = ProjectSupplierSerializer(many=True, read_only=True)
@@ -92,6 +100,9 @@ class ProjectSerializer(serializers.ModelSerializer):
     lat = serializers.FloatField(write_only=True, required=False)
     lng = serializers.FloatField(write_only=True, required=False)
     
+    # Left out unless named in ?expand= or ?fields= once either is given (see projects.fieldsets)
+    expandable_fields = ('workers', 'suppliers', 'timeline_events', 'risks', 'updates')
+    
     class Meta:
         model = Project
         fields = [
@@ -102,4 +113,22 @@ class ProjectSerializer(serializers.ModelSerializer):
             'budget', 'current_spending', 'created_at', 'updated_at', 
             'workers', 'suppliers', 'timeline_events', 'risks', 'updates',
             'lat', 'lng'
-        ]
\ No newline at end of file
+        ]
+        # Maintained by projects.counters
+        read_only_fields = ['current_worker_count']
+
+class ProjectSummarySerializer(FlexFieldsMixin, serializers.ModelSerializer):
+    """Lightweight project representation for list views (no nested rows)"""
+    supervisor = UserSerializer(read_only=True)
+    worker_count = serializers.IntegerField(source='current_worker_count', read_only=True)
+    
+    class Meta:
+        model = Project
+        fields = [
+            'id', 'title', 'description', 'location', 'start_date', 'end_date',
+            'status', 'supervisor', 'estimated_workers', 'current_worker_count',
+            'budget', 'current_spending', 'created_at', 'updated_at',
+            'worker_count', 'supplier_count', 'timeline_event_count',
+            'completed_milestone_count', 'open_risk_count', 'update_count',
+            'message_count'
+        ]
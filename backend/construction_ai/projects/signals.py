@@ -0,0 +1,139 @@
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save, pre_delete
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from accounts.models import User
+from . import counters, materials, membership, risk_summary
+from .models import (
+    Project, ProjectWorker, ProjectUpdate, ProjectSupplier,
+    ProjectTimeline, RiskAnalysis
+)
+from .versioning import bump_content_version, version_updates
+
+# Sent with `projects` (saved Project instances) and `children` ({'suppliers': [...],
+# 'risks': [...], 'timeline_events': [...]}) after each bulk-import chunk, whose rows
+# were written with bulk_create and so never fired post_save
+projects_imported = Signal()
+
+@receiver(post_init, sender=Project)
+def remember_supervisor(sender, instance, **kwargs):
+    """Keep the loaded supervisor so a reassignment invalidates both users"""
+    instance._loaded_supervisor_id = instance.__dict__.get('supervisor_id')
+
+@receiver(post_save, sender=Project)
+def project_saved(sender, instance, created, **kwargs):
+    """Invalidate cached membership when a project is created or changes supervisor"""
+    previous = instance._loaded_supervisor_id
+    if created or previous != instance.supervisor_id:
+        membership.invalidate(previous, instance.supervisor_id)
+    if not created and previous != instance.supervisor_id:
+        # The project's suppliers move to the new supervisor's material rankings
+        materials.supervisor_changed(instance, previous)
+    instance._loaded_supervisor_id = instance.supervisor_id
+
+@receiver(post_delete, sender=Project)
+def project_deleted(sender, instance, **kwargs):
+    membership.invalidate(instance.supervisor_id)
+
+@receiver(post_save, sender=ProjectWorker)
+@receiver(post_delete, sender=ProjectWorker)
+def project_worker_changed(sender, instance, **kwargs):
+    """Worker assignments change which projects the worker can see"""
+    membership.invalidate(instance.worker_id)
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    """Membership depends on the role, so drop it whenever a user is saved"""
+    if not created:
+        membership.invalidate(instance.pk)
+
+@receiver(post_save, sender=Project)
+def project_content_changed(sender, instance, **kwargs):
+    """Any saved change to a project invalidates content derived from it"""
+    bump_content_version(instance.pk)
+    instance.content_version += 1
+    instance.content_modified_at = timezone.now()
+
+@receiver(post_init, sender=ProjectWorker)
+@receiver(post_init, sender=RiskAnalysis)
+@receiver(post_init, sender=ProjectTimeline)
+@receiver(post_init, sender=ProjectSupplier)
+@receiver(post_init, sender=ProjectUpdate)
+def remember_counted_state(sender, instance, **kwargs):
+    counters.remember_state(instance)
+
+@receiver(post_save, sender=ProjectWorker)
+def project_worker_saved(sender, instance, created, **kwargs):
+    """Assignments are part of the project's content (its worker list)"""
+    counters.apply_deltas(counters.save_deltas(instance, created), **version_updates())
+
+@receiver(post_delete, sender=ProjectWorker)
+def project_worker_deleted(sender, instance, **kwargs):
+    counters.apply_deltas(counters.delete_deltas(instance), **version_updates())
+
+@receiver(post_save, sender=RiskAnalysis)
+@receiver(post_save, sender=ProjectTimeline)
+@receiver(post_save, sender=ProjectSupplier)
+@receiver(post_save, sender=ProjectUpdate)
+def child_content_saved(sender, instance, created, **kwargs):
+    """Adjust counters and bump the content version in a single UPDATE"""
+    counters.apply_deltas(
+        counters.save_deltas(instance, created),
+        **version_updates()
+    )
+
+@receiver(post_delete, sender=RiskAnalysis)
+@receiver(post_delete, sender=ProjectTimeline)
+@receiver(post_delete, sender=ProjectSupplier)
+@receiver(post_delete, sender=ProjectUpdate)
+def child_content_deleted(sender, instance, **kwargs):
+    counters.apply_deltas(
+        counters.delete_deltas(instance),
+        **version_updates()
+    )
+
+@receiver(m2m_changed, sender=ProjectTimeline.dependencies.through)
+def timeline_dependencies_changed(sender, instance, action, **kwargs):
+    """Dependency edits change the schedule without saving any timeline row"""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_content_version(instance.project_id)
+
+@receiver(post_init, sender=RiskAnalysis)
+def remember_risk_summary_state(sender, instance, **kwargs):
+    risk_summary.remember_state(instance)
+
+@receiver(post_save, sender=RiskAnalysis)
+def risk_summary_saved(sender, instance, created, **kwargs):
+    """Move the risk between heatmap cells (or in/out of the open set)"""
+    risk_summary.risk_saved(instance, created)
+
+@receiver(post_delete, sender=RiskAnalysis)
+def risk_summary_deleted(sender, instance, **kwargs):
+    risk_summary.risk_deleted(instance)
+
+@receiver(projects_imported)
+def summarize_imported_risks(sender, projects, **kwargs):
+    """Imported risks were bulk-created without post_save"""
+    risk_summary.rebuild([project.pk for project in projects], replace=False)
+
+@receiver(post_init, sender=ProjectSupplier)
+def remember_materials_state(sender, instance, **kwargs):
+    materials.remember_state(instance)
+
+@receiver(post_save, sender=ProjectSupplier)
+def supplier_materials_saved(sender, instance, **kwargs):
+    """Re-link the supplier's materials and re-rank them"""
+    materials.supplier_saved(instance)
+
+@receiver(pre_delete, sender=ProjectSupplier)
+def supplier_materials_deleting(sender, instance, **kwargs):
+    materials.supplier_deleting(instance)
+
+@receiver(post_delete, sender=ProjectSupplier)
+def supplier_materials_deleted(sender, instance, **kwargs):
+    materials.supplier_deleted(instance)
+
+@receiver(projects_imported)
+def index_imported_materials(sender, projects, children, **kwargs):
+    """Imported suppliers were bulk-created without post_save"""
+    materials.index_imported(projects, children['suppliers'])
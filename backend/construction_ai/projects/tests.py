@@ -1,3 +1,705 @@
-from django.test import TestCase
+import importlib
+from datetime import date
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps as django_apps
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from accounts.models import User
+from chat.models import ChatRoom
+from . import bulk, materials, workspace
+from .counters import COUNTER_FIELDS, reconcile
+from .membership import get_user_membership
+from .schedule import compute_schedule
+from .models import (
+    MaterialRanking, Project, ProjectWorker, ProjectUpdate, ProjectSupplier,
+    ProjectTimeline, RiskAnalysis, RiskRanking, RiskSummary, SupplierMaterial
+)
+from .risk_summary import heatmap, rebuild as rebuild_risk_summary
+
+
+def make_user(username, role):
+    return User.objects.create_user(
+        username=username, email=f'{username}@example.com', role=role
+    )
+
+
+def make_project(supervisor, title='Bridge'):
+    return Project.objects.create(
+        title=title, description='Test project', location='Site A',
+        start_date=date(2025, 1, 1), end_date=date(2025, 12, 31), supervisor=supervisor
+    )
+
+
+def add_nested_rows(project, count):
+    """Attach `count` rows of every nested relation to the project"""
+    previous = None
+    for i in range(count):
+        worker = make_user(f'{project.pk}-worker-{i}', 'worker')
+        ProjectWorker.objects.create(project=project, worker=worker)
+        ProjectSupplier.objects.create(project=project, name=f'Supplier {i}', materials_provided='steel')
+        event = ProjectTimeline.objects.create(
+            project=project, title=f'Event {i}', description='', responsible_person=worker,
+            start_date=date(2025, 1, 1), end_date=date(2025, 2, 1)
+        )
+        if previous:
+            event.dependencies.add(previous)
+        previous = event
+        RiskAnalysis.objects.create(
+            project=project, title=f'Risk {i}', description='', risk_level='low', mitigation_plan=''
+        )
+        ProjectUpdate.objects.create(project=project, author=worker, title=f'Update {i}', content='')
+
+
+class ProjectQueryPlanTests(APITestCase):
+    def setUp(self):
+        self.supervisor = make_user('supervisor', 'supervisor')
+        self.client.force_authenticate(self.supervisor)
+
+    def test_list_uses_summary_representation(self):
+        project = make_project(self.supervisor)
+        add_nested_rows(project, 2)
+        risk = RiskAnalysis.objects.filter(project=project).first()
+        risk.is_resolved = True
+        risk.save()
+
+        response = self.client.get(reverse('project-list'))
+
+        self.assertEqual(response.status_code, 200)
+        row = response.data[0]
+        self.assertNotIn('workers', row)
+        self.assertNotIn('updates', row)
+        self.assertEqual(row['worker_count'], 2)
+        self.assertEqual(row['timeline_event_count'], 2)
+        self.assertEqual(row['open_risk_count'], 1)
+
+    def test_list_query_count_is_flat(self):
+        for i in range(5):
+            add_nested_rows(make_project(self.supervisor, f'Project {i}'), 3)
+
+        # One query for the projects (with supervisor and counts) once membership is cached
+        get_user_membership(self.supervisor)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('project-list'))
+        self.assertEqual(len(response.data), 5)
+
+    def test_retrieve_query_count_is_flat(self):
+        small = make_project(self.supervisor, 'Small')
+        add_nested_rows(small, 1)
+        large = make_project(self.supervisor, 'Large')
+        add_nested_rows(large, 10)
+
+        # Project + workers + suppliers + timeline + dependencies + risks + updates
+        get_user_membership(self.supervisor)
+        for project in (small, large):
+            with self.assertNumQueries(7):
+                response = self.client.get(reverse('project-detail', args=[project.pk]))
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['updates']), 10)
+
+    def test_worker_membership_lookup_is_index_only(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('EXPLAIN QUERY PLAN output is SQLite specific')
+        worker = make_user('worker', 'worker')
+        queryset = ProjectWorker.objects.filter(worker=worker).values_list('project_id', flat=True)
+
+        plan = queryset.explain()
+
+        self.assertIn('COVERING INDEX proj_worker_worker_idx', plan)
+
+
+class MembershipTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.supervisor = make_user('supervisor', 'supervisor')
+        self.worker = make_user('worker', 'worker')
+        self.project = make_project(self.supervisor)
+
+    def test_membership_is_cached_and_invalidated_by_assignment(self):
+        self.assertFalse(get_user_membership(self.worker).can_view(self.project.pk))
+        with self.assertNumQueries(0):
+            get_user_membership(self.worker)
+
+        assignment = ProjectWorker.objects.create(project=self.project, worker=self.worker)
+        self.assertTrue(get_user_membership(self.worker).can_view(self.project.pk))
+
+        assignment.delete()
+        self.assertFalse(get_user_membership(self.worker).can_view(self.project.pk))
+
+    def test_supervisor_change_invalidates_both_supervisors(self):
+        other = make_user('other', 'supervisor')
+        self.assertTrue(get_user_membership(self.supervisor).can_manage(self.project.pk))
+
+        self.project.supervisor = other
+        self.project.save()
+
+        self.assertFalse(get_user_membership(self.supervisor).can_view(self.project.pk))
+        self.assertTrue(get_user_membership(other).can_manage(self.project.pk))
+
+    def test_sub_resources_are_scoped_to_members(self):
+        RiskAnalysis.objects.create(
+            project=self.project, title='Flood', description='', risk_level='high', mitigation_plan=''
+        )
+        url = reverse('riskanalysis-list')
+
+        self.client.force_authenticate(self.worker)
+        self.assertEqual(self.client.get(url, {'project_id': self.project.pk}).data, [])
+
+        ProjectWorker.objects.create(project=self.project, worker=self.worker)
+        self.assertEqual(len(self.client.get(url, {'project_id': self.project.pk}).data), 1)
+        # Workers can read but not write
+        response = self.client.post(url, {'project': self.project.pk, 'title': 'Strike'})
+        self.assertEqual(response.status_code, 403)
+
+    def test_supervisor_cannot_write_to_another_supervisors_project(self):
+        other = make_user('other', 'supervisor')
+        self.client.force_authenticate(other)
+        response = self.client.post(reverse('projectsupplier-list'), {
+            'project': self.project.pk, 'name': 'Acme', 'materials_provided': 'steel'
+        })
+        self.assertEqual(response.status_code, 403)
+
+
+class CounterTests(APITestCase):
+    def setUp(self):
+        self.supervisor = make_user('supervisor', 'supervisor')
+        self.project = make_project(self.supervisor)
+
+    def counts(self):
+        self.project.refresh_from_db()
+        return {field: getattr(self.project, field) for field in COUNTER_FIELDS}
+
+    def test_counters_follow_writes(self):
+        add_nested_rows(self.project, 2)
+        milestone = ProjectTimeline.objects.create(
+            project=self.project, title='Handover', description='', is_milestone=True,
+            start_date=date(2025, 6, 1), end_date=date(2025, 6, 1)
+        )
+        milestone.completion_percentage = 100
+        milestone.save()
+        ChatRoom.objects.get(project=self.project).messages.create(sender=self.supervisor, content='hi')
+        ProjectWorker.objects.filter(project=self.project).first().delete()
+
+        self.assertEqual(self.counts(), {
+            'current_worker_count': 1, 'supplier_count': 2, 'timeline_event_count': 3,
+            'completed_milestone_count': 1, 'open_risk_count': 2, 'update_count': 2,
+            'message_count': 1,
+        })
+
+    def test_saving_a_stale_copy_keeps_counters_and_version(self):
+        stale = Project.objects.get(pk=self.project.pk)
+        RiskAnalysis.objects.create(
+            project=self.project, title='Flood', description='', risk_level='high', mitigation_plan='Pumps'
+        )
+        ChatRoom.objects.get(project=self.project).messages.create(sender=self.supervisor, content='hi')
+        version = Project.objects.get(pk=self.project.pk).content_version
+
+        stale.title = 'Renamed'
+        stale.save()
+
+        counts = self.counts()
+        self.assertEqual((counts['open_risk_count'], counts['message_count']), (1, 1))
+        self.assertEqual(self.project.title, 'Renamed')
+        self.assertEqual(self.project.content_version, version + 1)
+        # The saved instance reflects the stored values, so responses and ETags built from it are current
+        self.assertEqual((stale.open_risk_count, stale.content_version), (1, version + 1))
+
+    def test_patch_keeps_counters_and_bumps_version(self):
+        RiskAnalysis.objects.create(
+            project=self.project, title='Flood', description='', risk_level='high', mitigation_plan='Pumps'
+        )
+        version = Project.objects.get(pk=self.project.pk).content_version
+        self.client.force_authenticate(self.supervisor)
+
+        response = self.client.patch(reverse('project-detail', args=[self.project.pk]), {'title': 'Renamed'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.counts()['open_risk_count'], 1)
+        self.assertEqual(self.project.content_version, version + 1)
+
+    def test_reconcile_repairs_drift(self):
+        add_nested_rows(self.project, 3)
+        expected = self.counts()
+        Project.objects.filter(pk=self.project.pk).update(open_risk_count=99, current_worker_count=0)
+
+        self.assertEqual(reconcile(), 1)
+        self.assertEqual(self.counts(), expected)
+        self.assertEqual(reconcile(), 0)
+
+
+class BulkImportExportTests(APITestCase):
+    def setUp(self):
+        self.supervisor = make_user('supervisor', 'supervisor')
+        self.client.force_authenticate(self.supervisor)
+
+    def payload(self, count):
+        return {'projects': [
+            {
+                'title': f'Depot {i}', 'description': 'Imported', 'location': 'North',
+                'start_date': '2025-01-01', 'end_date': '2025-06-30', 'budget': '1000.00',
+                'suppliers': [{'name': 'Acme', 'materials_provided': 'rebar, cement', 'reliability_score': 90}],
+                'risks': [{'title': 'Flood', 'description': 'River nearby', 'risk_level': 'high', 'mitigation_plan': 'Pumps'}],
+                'timeline_events': [
+                    {'key': 'dig', 'title': 'Excavation', 'description': 'Dig', 'start_date': '2025-01-01', 'end_date': '2025-02-01'},
+                    {'key': 'pour', 'title': 'Foundation', 'description': 'Pour', 'start_date': '2025-02-01',
+                     'end_date': '2025-03-01', 'dependencies': ['dig']},
+                ],
+            }
+            for i in range(count)
+        ]}
+
+    def test_import_creates_projects_children_and_chat_rooms(self):
+        response = self.client.post(reverse('project-import-projects'), self.payload(3), format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 3)
+        project = Project.objects.get(pk=response.data['ids'][0])
+        self.assertEqual((project.supplier_count, project.open_risk_count, project.timeline_event_count), (1, 1, 2))
+        self.assertTrue(ChatRoom.objects.filter(project=project).exists())
+        foundation = project.timeline_events.get(title='Foundation')
+        self.assertEqual([event.title for event in foundation.dependencies.all()], ['Excavation'])
+        # The new projects are visible straight away
+        self.assertEqual(len(self.client.get(reverse('project-list')).data), 3)
+
+    def test_import_query_count_does_not_grow_with_projects(self):
+        # Projects, suppliers, risks, timeline, dependencies, chat rooms, risk summary (read + write),
+        # risk rankings (read + write), search documents, materials (upsert + read), material links,
+        # rankings (read, delete, write + savepoint) + savepoint
+        with self.assertNumQueries(21):
+            bulk.import_projects(self.payload(20)['projects'], self.supervisor)
+
+    def test_invalid_rows_reject_the_whole_import(self):
+        payload = self.payload(2)
+        payload['projects'][1]['risks'][0]['risk_level'] = 'apocalyptic'
+
+        response = self.client.post(reverse('project-import-projects'), payload, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('risk_level', response.data['errors'][0])
+        self.assertFalse(Project.objects.exists())
+
+    def test_csv_export_round_trips(self):
+        bulk.import_projects(self.payload(2)['projects'], self.supervisor)
+
+        response = self.client.get(reverse('project-export-projects'), {'file_format': 'csv'})
+        text = b''.join(response.streaming_content).decode()
+        records = bulk.parse(text, 'csv')
+
+        self.assertEqual(len(records), 2)
+        self.assertEqual(len(records[0]['timeline_events']), 2)
+        bulk.import_projects(records, self.supervisor)
+        self.assertEqual(Project.objects.count(), 4)
+        self.assertEqual(ProjectTimeline.dependencies.through.objects.count(), 4)
+
+
+class CriticalPathTests(APITestCase):
+    def setUp(self):
+        self.supervisor = make_user('supervisor', 'supervisor')
+        self.client.force_authenticate(self.supervisor)
+        self.project = make_project(self.supervisor)
+
+    def event(self, title, start, days, *dependencies):
+        event = ProjectTimeline.objects.create(
+            project=self.project, title=title, description=title,
+            start_date=date(2025, 1, start), end_date=date(2025, 1, start + days)
+        )
+        event.dependencies.add(*dependencies)
+        return event
+
+    def get(self):
+        return self.client.get(reverse('project-critical-path', args=[self.project.pk]))
+
+    def test_slack_and_critical_path(self):
+        dig = self.event('Dig', 1, 5)
+        pour = self.event('Pour', 6, 3, dig)
+        fence = self.event('Fence', 1, 2)
+        roof = self.event('Roof', 9, 4, pour, fence)
+
+        response = self.get()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['duration_days'], 12)
+        self.assertEqual(response.data['finish_date'], date(2025, 1, 13))
+        self.assertEqual(response.data['critical_path'], [dig.pk, pour.pk, roof.pk])
+        rows = {row['id']: row for row in response.data['events']}
+        self.assertEqual(rows[fence.pk]['slack_days'], 6)
+        self.assertEqual(rows[fence.pk]['latest_start'], date(2025, 1, 7))
+        self.assertEqual(rows[roof.pk]['earliest_start'], date(2025, 1, 9))
+
+    def test_cached_until_dependencies_change(self):
+        first = self.event('First', 1, 2)
+        second = self.event('Second', 1, 2)
+        self.get()
+
+        # Only the project row; membership and the schedule come from the cache
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get().data['duration_days'], 2)
+
+        second.dependencies.add(first)
+        self.assertEqual(self.get().data['duration_days'], 4)
+
+    def test_cycles_are_reported(self):
+        first = self.event('First', 1, 2)
+        second = self.event('Second', 3, 2, first)
+        first.dependencies.add(second)
+        self.event('Unrelated', 1, 2)
+
+        response = self.get()
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['cycle'], sorted([first.pk, second.pk]))
+
+    def test_schedule_scales_linearly(self):
+        count = 5000
+        events = [
+            {'id': i, 'title': '', 'start_date': date(2025, 1, 1), 'end_date': date(2025, 1, 2),
+             'is_milestone': False, 'completion_percentage': 0}
+            for i in range(count)
+        ]
+        edges = [(i, i + 1) for i in range(count - 1)] + [(i, i + 2) for i in range(count - 2)]
+
+        result = compute_schedule(events, edges)
+
+        self.assertEqual(result['duration_days'], count)
+        self.assertEqual(len(result['critical_path']), count)
+
+
+class RiskHeatmapTests(APITestCase):
+    def setUp(self):
+        self.supervisor = make_user('supervisor', 'supervisor')
+        self.client.force_authenticate(self.supervisor)
+        self.bridge = make_project(self.supervisor, 'Bridge')
+        self.tower = make_project(self.supervisor, 'Tower')
+
+    def risk(self, project, category, level, probability, impact):
+        return RiskAnalysis.objects.create(
+            project=project, title=f'{category} {level}', description='', risk_level=level,
+            risk_category=category, probability=probability, impact=impact, mitigation_plan=''
+        )
+
+    def cells(self, data):
+        return {(cell['risk_category'], cell['risk_level']): cell for cell in data['cells']}
+
+    def test_heatmap_follows_risk_changes(self):
+        weather = self.risk(self.bridge, 'weather', 'high', 0.5, 8)
+        self.risk(self.tower, 'weather', 'high', 0.2, 5)
+        safety = self.risk(self.tower, 'safety', 'low', 0.1, 2)
+
+        cells = self.cells(self.client.get(reverse('project-risk-heatmap')).data)
+        self.assertEqual(cells['weather', 'high']['open_count'], 2)
+        self.assertEqual(cells['weather', 'high']['exposure'], 5.0)
+        self.assertEqual(cells['weather', 'high']['projects'], 2)
+
+        weather.risk_level = 'critical'
+        weather.save()
+        safety.is_resolved = True
+        safety.save()
+
+        data = self.client.get(reverse('project-risk-heatmap')).data
+        cells = self.cells(data)
+        self.assertEqual(cells['weather', 'high']['open_count'], 1)
+        self.assertEqual(cells['weather', 'critical']['exposure'], 4.0)
+        self.assertNotIn(('safety', 'low'), cells)
+        self.assertEqual(data['totals'], {'open_count': 2, 'exposure': 5.0})
+
+        weather.delete()
+        self.assertNotIn(('weather', 'critical'), self.cells(self.client.get(reverse('project-risk-heatmap')).data))
+
+    def test_top_exposures_per_project(self):
+        low = self.risk(self.bridge, 'financial', 'low', 0.1, 1)
+        high = self.risk(self.bridge, 'financial', 'high', 0.9, 9)
+        middle = self.risk(self.bridge, 'technical', 'medium', 0.5, 5)
+        self.risk(self.tower, 'other', 'low', 0.3, 3)
+
+        data = self.client.get(reverse('project-risk-heatmap'), {'top': 2}).data
+
+        top = {row['project']: [risk['id'] for risk in row['risks']] for row in data['top_exposures']}
+        self.assertEqual(top[self.bridge.pk], [high.pk, middle.pk])
+        self.assertNotIn(low.pk, top[self.bridge.pk])
+        self.assertEqual(len(top[self.tower.pk]), 1)
+
+    def test_ranking_follows_exposure_changes(self):
+        first = self.risk(self.bridge, 'weather', 'high', 0.5, 8)
+        second = self.risk(self.bridge, 'safety', 'medium', 0.5, 4)
+        self.assertEqual(RiskRanking.objects.get(project=self.bridge).risk_ids, [first.pk, second.pk])
+
+        second.impact = 10
+        second.save()
+        self.assertEqual(RiskRanking.objects.get(project=self.bridge).risk_ids, [second.pk, first.pk])
+
+        second.is_resolved = True
+        second.save()
+        first.delete()
+        self.assertEqual(RiskRanking.objects.get(project=self.bridge).risk_ids, [])
+
+    def test_top_exposures_are_read_from_the_ranking(self):
+        risks = [self.risk(self.bridge, 'financial', 'low', 0.5, impact) for impact in range(1, 8)]
+        before = RiskRanking.objects.get(project=self.bridge).risk_ids
+        self.assertEqual(before, [risk.pk for risk in reversed(risks)])
+
+        # Summary cells, rankings, then only the `top` ranked risks by id
+        with CaptureQueriesContext(connection) as queries:
+            data = heatmap([self.bridge.pk, self.tower.pk], top=2)
+        self.assertEqual(len(queries), 3)
+        self.assertIn(f'IN ({risks[-1].pk}, {risks[-2].pk})', queries[-1]['sql'])
+        self.assertEqual([risk['exposure'] for risk in data['top_exposures'][0]['risks']], [3.5, 3.0])
+
+        RiskRanking.objects.all().delete()
+        rebuild_risk_summary()
+        self.assertEqual(RiskRanking.objects.get(project=self.bridge).risk_ids, before)
+
+    def test_rebuild_matches_incremental_rows(self):
+        self.risk(self.bridge, 'weather', 'high', 0.5, 8)
+        self.risk(self.bridge, 'weather', 'high', 0.25, 4)
+        self.risk(self.tower, 'safety', 'low', 0.1, 2)
+        before = sorted(RiskSummary.objects.values_list('project', 'risk_category', 'risk_level', 'open_count', 'total_exposure'))
+
+        rebuild_risk_summary()
+
+        after = sorted(RiskSummary.objects.values_list('project', 'risk_category', 'risk_level', 'open_count', 'total_exposure'))
+        self.assertEqual(before, after)
+
+    def test_workers_cannot_see_the_portfolio(self):
+        self.client.force_authenticate(make_user('worker', 'worker'))
+        self.assertEqual(self.client.get(reverse('project-risk-heatmap')).status_code, 403)
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.supervisor = make_user('supervisor', 'supervisor')
+        self.project = make_project(self.supervisor)
+        add_nested_rows(self.project, 2)
+        self.client.force_authenticate(self.supervisor)
+
+    def test_project_detail_revalidates_with_one_query(self):
+        url = reverse('project-detail', args=[self.project.pk])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+
+        with self.assertNumQueries(1):
+            cached = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+
+        # Child rows change the project's version too
+        RiskAnalysis.objects.create(
+            project=self.project, title='Flood', description='', risk_level='high', mitigation_plan=''
+        )
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], etag)
+
+    def test_scoped_lists_follow_the_project_version(self):
+        url = reverse('projectworker-list')
+        response = self.client.get(url, {'project_id': self.project.pk})
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+        cached = self.client.get(
+            url, {'project_id': self.project.pk}, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(cached.status_code, 304)
+
+        ProjectWorker.objects.filter(project=self.project).first().delete()
+        changed = self.client.get(url, {'project_id': self.project.pk}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertEqual(len(changed.data), 1)
+
+    def test_non_members_never_get_a_304(self):
+        etag = self.client.get(reverse('project-detail', args=[self.project.pk]))['ETag']
+        self.client.force_authenticate(make_user('outsider', 'supervisor'))
+
+        response = self.client.get(reverse('project-detail', args=[self.project.pk]), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 404)
+
+
+class FieldsetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.supervisor = make_user('supervisor', 'supervisor')
+        self.project = make_project(self.supervisor)
+        add_nested_rows(self.project, 3)
+        get_user_membership(self.supervisor)
+        self.client.force_authenticate(self.supervisor)
+        self.url = reverse('project-detail', args=[self.project.pk])
+
+    def test_expand_limits_nested_relations_and_their_queries(self):
+        # Project (with supervisor) and risks only
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'expand': 'risks'})
+        self.assertIn('title', response.data)
+        self.assertEqual(len(response.data['risks']), 3)
+        for relation in ['workers', 'suppliers', 'timeline_events', 'updates']:
+            self.assertNotIn(relation, response.data)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {'expand': ''})
+        self.assertNotIn('risks', response.data)
+
+    def test_fields_select_nested_fields_and_prune_joins(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'fields': 'id,title,updates.title'})
+        self.assertEqual(set(response.data), {'id', 'title', 'updates'})
+        self.assertEqual(set(response.data['updates'][0]), {'title'})
+
+        response = self.client.get(self.url, {'fields': 'timeline_events.title,timeline_events.dependencies'})
+        self.assertEqual(set(response.data['timeline_events'][0]), {'title', 'dependencies'})
+
+    def test_sub_resource_lists_accept_fields(self):
+        # Validators and the joined rows
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('projectupdate-list'), {
+                'project_id': self.project.pk, 'fields': 'id,title,author.username'
+            })
+        self.assertEqual(response.data[0]['author'], {'username': response.data[0]['author']['username']})
+
+    def test_full_representation_by_default(self):
+        response = self.client.get(self.url)
+        for relation in ['workers', 'suppliers', 'timeline_events', 'risks', 'updates']:
+            self.assertEqual(len(response.data[relation]), 3)
+
+
+class WorkspaceTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.supervisor = make_user('supervisor', 'supervisor')
+        self.project = make_project(self.supervisor)
+        add_nested_rows(self.project, 4)
+        room = ChatRoom.objects.get(project=self.project)
+        for i in range(5):
+            room.messages.create(sender=self.supervisor, content=f'Message {i}')
+        get_user_membership(self.supervisor)
+        self.client.force_authenticate(self.supervisor)
+        self.url = reverse('project-workspace', args=[self.project.pk])
+
+    def test_one_round_trip_with_a_flat_query_count(self):
+        # Project, five sections (+ timeline dependencies), messages and the version check
+        with self.assertNumQueries(9):
+            response = self.client.get(self.url, {'limit': 3})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.data
+        self.assertEqual(data['project']['title'], 'Bridge')
+        self.assertNotIn('risks', data['project'])
+        for section in ['timeline_events', 'workers', 'suppliers', 'risks', 'updates']:
+            self.assertEqual(len(data[section]['results']), 3)
+            self.assertTrue(data[section]['has_more'])
+        self.assertEqual(data['chat_room']['project'], self.project.pk)
+        self.assertEqual([m['content'] for m in data['messages']['results']], ['Message 2', 'Message 3', 'Message 4'])
+        self.assertTrue(data['messages']['has_older'])
+
+        older = self.client.get(reverse('message-list'), {
+            'chat_room_id': data['chat_room']['id'], 'before': data['messages']['before']
+        })
+        self.assertEqual([m['content'] for m in older.data['results']], ['Message 0', 'Message 1'])
+
+    def test_snapshot_is_reread_when_the_project_changes(self):
+        calls = []
+        original = workspace.load_project
+
+        def load_and_change(project_id, limit):
+            project = original(project_id, limit)
+            if not calls:
+                RiskAnalysis.objects.create(
+                    project=self.project, title='Late', description='', risk_level='low', mitigation_plan=''
+                )
+            calls.append(project)
+            return project
+
+        with mock.patch('projects.workspace.load_project', side_effect=load_and_change):
+            data = self.client.get(self.url, {'limit': 10}).data
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(len(data['risks']['results']), 5)
+
+    def test_non_members_get_404(self):
+        self.client.force_authenticate(make_user('outsider', 'worker'))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class MaterialIndexTests(APITestCase):
+    def setUp(self):
+        self.supervisor = make_user('supervisor', 'supervisor')
+        self.bridge = make_project(self.supervisor, 'Bridge')
+        self.tower = make_project(self.supervisor, 'Tower')
+        self.client.force_authenticate(self.supervisor)
+
+    def supplier(self, project, name, materials_provided, reliability, lead_time):
+        return ProjectSupplier.objects.create(
+            project=project, name=name, materials_provided=materials_provided,
+            reliability_score=reliability, lead_time_days=lead_time
+        )
+
+    def ranking(self, material, **params):
+        response = self.client.get(reverse('projectsupplier-by-material'), dict(params, material=material))
+        self.assertEqual(response.status_code, 200)
+        return [(row['supplier_name'], row['rank']) for row in response.data['suppliers']]
+
+    def test_suppliers_are_ranked_across_projects(self):
+        self.supplier(self.bridge, 'Acme Steel', 'Steel; Rebar', 80, 10)
+        self.supplier(self.tower, 'ACME  steel', 'steel, cement', 90, 6)
+        self.supplier(self.tower, 'Ironworks', 'Steel', 85, 3)
+        self.supplier(self.bridge, 'Quick Steel', 'steel', 85, 14)
+
+        # Acme averages 85 over two projects and 8 days, ahead of Quick Steel on lead time
+        self.assertEqual(self.ranking(' STEEL '), [('Ironworks', 1), ('Acme Steel', 2), ('Quick Steel', 3)])
+        self.assertEqual(self.ranking('steel', top=1), [('Ironworks', 1)])
+        self.assertEqual(self.ranking('rebar'), [('Acme Steel', 1)])
+        with self.assertNumQueries(1):
+            self.client.get(reverse('projectsupplier-by-material'), {'material': 'steel'})
+
+    def test_rankings_follow_supplier_writes(self):
+        supplier = self.supplier(self.bridge, 'Acme', 'steel', 80, 10)
+        other = self.supplier(self.tower, 'Ironworks', 'steel', 70, 3)
+        self.assertEqual(self.ranking('steel'), [('Acme', 1), ('Ironworks', 2)])
+
+        supplier.materials_provided = 'cement'
+        supplier.save()
+        self.assertEqual(self.ranking('steel'), [('Ironworks', 1)])
+        self.assertEqual(self.ranking('cement'), [('Acme', 1)])
+
+        other.delete()
+        self.assertEqual(self.ranking('steel'), [])
+
+    def test_rankings_are_per_portfolio(self):
+        self.supplier(self.bridge, 'Acme', 'steel', 80, 10)
+        other = make_user('other', 'supervisor')
+        self.bridge.supervisor = other
+        self.bridge.save()
+
+        self.assertEqual(self.ranking('steel'), [])
+        self.client.force_authenticate(other)
+        self.assertEqual(self.ranking('steel'), [('Acme', 1)])
+
+        self.client.force_authenticate(make_user('worker', 'worker'))
+        self.assertEqual(self.client.get(reverse('projectsupplier-by-material'), {'material': 'steel'}).status_code, 403)
+
+    def test_rebuild_matches_incremental_rows(self):
+        self.supplier(self.bridge, 'Acme', 'steel, cement', 80, 10)
+        self.supplier(self.tower, 'acme', 'Steel', 60, 4)
+        before = sorted(MaterialRanking.objects.values_list('material__name', 'supplier_key', 'rank', 'project_count'))
+
+        materials.rebuild()
+
+        after = sorted(MaterialRanking.objects.values_list('material__name', 'supplier_key', 'rank', 'project_count'))
+        self.assertEqual(before, after)
+        self.assertEqual(SupplierMaterial.objects.count(), 3)
+
+    def test_migration_backfills_existing_suppliers(self):
+        self.supplier(self.bridge, 'Acme', 'steel, cement', 80, 10)
+        self.supplier(self.tower, 'Ironworks', 'Steel', 90, 4)
+        before = sorted(MaterialRanking.objects.values_list('material__name', 'supplier_key', 'rank', 'project_count'))
+        # Suppliers that existed before the index, as the schema migration left them
+        MaterialRanking.objects.all().delete()
+        SupplierMaterial.objects.all().delete()
+
+        migration = importlib.import_module('projects.migrations.0012_backfill_material_index')
+        migration.backfill_material_index(django_apps, None)
+
+        after = sorted(MaterialRanking.objects.values_list('material__name', 'supplier_key', 'rank', 'project_count'))
+        self.assertEqual(before, after)
+        self.assertEqual(self.ranking('steel'), [('Ironworks', 1), ('Acme', 2)])
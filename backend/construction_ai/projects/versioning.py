@@ -0,0 +1,25 @@
+"""
+Project content versions.
+
+``Project.content_version`` is bumped with an atomic ``F()`` update whenever the
+project or one of its child rows changes, and ``content_modified_at`` records
+when. Anything derived from a project's content (e.g. the AI prompt context)
+can be cached under a key that includes the version and never needs explicit
+invalidation: a change simply makes the old key unreachable. The same pair
+serves as HTTP validators for project resources (see ``projects.conditional``).
+"""
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Project
+
+
+def version_updates():
+    """UPDATE assignments that bump the version, for combining with other updates"""
+    return {'content_version': F('content_version') + 1, 'content_modified_at': timezone.now()}
+
+
+def bump_content_version(*project_ids):
+    project_ids = [project_id for project_id in project_ids if project_id is not None]
+    if project_ids:
+        Project.objects.filter(pk__in=project_ids).update(**version_updates())
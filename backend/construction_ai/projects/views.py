@@ -1,45 +1,22 @@
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
 from rest_framework.response import Response
+from . import bulk, conditional, materials, risk_summary, schedule, workspace
 from .models import (
     Project, ProjectWorker, ProjectUpdate, ProjectSupplier, 
     ProjectTimeline, RiskAnalysis
 )
 from .serializers import (
-    ProjectSerializer, ProjectWorkerSerializer, ProjectUpdateSerializer,
+    ProjectSerializer, ProjectSummarySerializer, ProjectWorkerSerializer, ProjectUpdateSerializer,
     ProjectSupplierSerializer, ProjectTimelineSerializer, RiskAnalysisSerializer
 )
+from .membership import get_membership
+from .mixins import ProjectScopedMixin
+from .permissions import IsSupervisor, ProjectMemberPermission
 from accounts.models import User
-from django.shortcuts import get_object_or_404
-
-class IsSupervisor(permissions.BasePermission):
-    """Permission to only allow supervisors to create/edit projects"""
-    def has_permission(self, request, view):
-        return request.user.role == 'supervisor'
-
-class IsProjectSupervisor(permissions.BasePermission):
-    """Permission to only allow the project supervisor to make changes"""
-    def has_object_permission(self, request, view, obj):
-        # For ProjectWorker, ProjectSupplier, etc., we need to check the project's supervisor
-        if hasattr(obj, 'project'):
-            return obj.project.supervisor == request.user
-        # For Project model
-        return obj.supervisor == request.user
-
-class ProjectMemberPermission(permissions.BasePermission):
-    """Permission to allow both supervisors and assigned workers to access"""
-    def has_object_permission(self, request, view, obj):
-        user = request.user
-        
-        # Supervisors have full access
-        if user.role == 'supervisor' and obj.supervisor == user:
-            return True
-            
-        # Workers have read-only access if they're assigned to the project
-        if user.role == 'worker' and request.method in permissions.SAFE_METHODS:
-            return ProjectWorker.objects.filter(project=obj, worker=user).exists()
-            
-        return False
+from django.db.models import Prefetch
+from django.http import Http404, StreamingHttpResponse
 
 class ProjectViewSet(viewsets.ModelViewSet):
     queryset = Project.objects.all()
@@ -47,25 +24,76 @@ class ProjectViewSet(viewsets.ModelViewSet):
     
     def get_permissions(self):
         """Different permissions for different actions"""
-        if self.action in ['create']:
+        if self.action in ['create', 'import_projects', 'risk_heatmap']:
             return [permissions.IsAuthenticated(), IsSupervisor()]
-        elif self.action in ['update', 'partial_update', 'destroy']:
-            return [permissions.IsAuthenticated(), IsProjectSupervisor()]
         return [permissions.IsAuthenticated(), ProjectMemberPermission()]
     
+    def get_serializer_class(self):
+        """Use the lightweight summary representation for the project grid"""
+        if self.action == 'list':
+            return ProjectSummarySerializer
+        return ProjectSerializer
+    
     def get_queryset(self):
-        """Filter projects based on user role"""
-        user = self.request.user
-        if user.role == 'supervisor':
-            return Project.objects.filter(supervisor=user)
-        else:  # worker
-            return Project.objects.filter(project_workers__worker=user)
+        """Filter projects to the ones the user supervises or is assigned to"""
+        membership = get_membership(self.request)
+        queryset = Project.objects.filter(pk__in=membership.viewable)
+        if self.action not in ['list', 'retrieve', 'update', 'partial_update']:
+            return queryset
+        # Only join and prefetch what the serializer will render (?fields= / ?expand=)
+        fields = self.get_serializer().fields
+        if 'supervisor' in fields:
+            queryset = queryset.select_related('supervisor')
+        if self.action == 'list':
+            # Headline counts are denormalized on the row (see projects.counters)
+            return queryset.order_by('-created_at')
+        return self.with_nested_rows(queryset, fields)
+    
+    @staticmethod
+    def with_nested_rows(queryset, fields):
+        """Prefetch the rendered nested relations so the query count stays flat as rows grow"""
+        def nested(name):
+            return fields[name].child.fields
+        
+        prefetches = []
+        if 'workers' in fields:
+            workers = ProjectWorker.objects.all()
+            if 'worker' in nested('workers'):
+                workers = workers.select_related('worker')
+            prefetches.append(Prefetch('project_workers', queryset=workers))
+        if 'suppliers' in fields:
+            prefetches.append('suppliers')
+        if 'timeline_events' in fields:
+            events = ProjectTimeline.objects.all()
+            if 'responsible_person' in nested('timeline_events'):
+                events = events.select_related('responsible_person')
+            if 'dependencies' in nested('timeline_events'):
+                events = events.prefetch_related('dependencies')
+            prefetches.append(Prefetch('timeline_events', queryset=events))
+        if 'risks' in fields:
+            prefetches.append('risks')
+        if 'updates' in fields:
+            updates = ProjectUpdate.objects.all()
+            if 'author' in nested('updates'):
+                updates = updates.select_related('author')
+            prefetches.append(Prefetch('updates', queryset=updates))
+        return queryset.prefetch_related(*prefetches)
+    
+    def retrieve(self, request, *args, **kwargs):
+        """Project detail, or a 304 without loading any rows when the client's copy is current"""
+        if conditional.is_conditional(request) and get_membership(request).can_view(kwargs['pk']):
+            cached = conditional.not_modified(request, conditional.project_validators(kwargs['pk']))
+            if cached is not None:
+                return cached
+        project = self.get_object()
+        response = Response(self.get_serializer(project).data)
+        return conditional.add_validators(response, conditional.Validators.of(project))
     
     def perform_create(self, serializer):
         """Set the supervisor to the current user"""
         serializer.save(supervisor=self.request.user)
     
-    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated, IsProjectSupervisor])
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated, ProjectMemberPermission])
     def add_worker(self, request, pk=None):
         """Add a worker to a project via email"""
         project = self.get_object()
@@ -92,152 +120,117 @@ class ProjectViewSet(viewsets.ModelViewSet):
             role_description=request.data.get('role_description', '')
         )
         
-        # Update current worker count
-        project.current_worker_count = ProjectWorker.objects.filter(project=project).count()
-        project.save(update_fields=['current_worker_count'])
-        
         serializer = ProjectWorkerSerializer(project_worker)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
-
-class ProjectWorkerViewSet(viewsets.ModelViewSet):
-    queryset = ProjectWorker.objects.all()
-    serializer_class = ProjectWorkerSerializer
     
-    def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
-            return [permissions.IsAuthenticated(), IsSupervisor()]
-        return [permissions.IsAuthenticated()]
+    @action(detail=True, methods=['get'], url_path='critical-path')
+    def critical_path(self, request, pk=None):
+        """Earliest/latest dates, slack and the critical path of the project's timeline"""
+        project = self.get_object()
+        try:
+            return Response(schedule.critical_path(project))
+        except schedule.ScheduleCycleError as exc:
+            return Response(
+                {"detail": "Timeline dependencies contain a cycle", "cycle": exc.event_ids},
+                status=status.HTTP_409_CONFLICT
+            )
     
-    def get_queryset(self):
-        """Filter by project and user permissions"""
-        user = self.request.user
-        project_id = self.request.query_params.get('project_id')
+    @action(detail=True, methods=['get'], url_path='workspace', url_name='workspace')
+    def workspace_snapshot(self, request, pk=None):
+        """The project page in one response: project, every section (?limit= rows each) and recent chat"""
+        # The only permission check: membership comes from the cached resolver
+        if not get_membership(request).can_view(pk):
+            raise Http404
+        limit = workspace.section_limit(request.query_params.get('limit'))
+        data = workspace.build(pk, self.get_serializer_context(), limit)
+        if data is None:
+            raise Http404
+        return Response(data)
+    
+    @action(detail=False, methods=['get'], url_path='risk-heatmap')
+    def risk_heatmap(self, request):
+        """Open risks by category and level across the supervisor's projects, with top exposures (?top=)"""
+        try:
+            top = min(max(int(request.query_params.get('top', risk_summary.DEFAULT_TOP)), 1), risk_summary.MAX_TOP)
+        except ValueError:
+            return Response({"detail": "top must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(risk_summary.heatmap(get_membership(request).manageable, top))
+    
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[JSONParser, MultiPartParser, FormParser])
+    def import_projects(self, request):
+        """Bulk-create projects (with suppliers, risks and timeline) from JSON or a CSV/JSON upload"""
+        upload = request.FILES.get('file')
+        if upload:
+            # Not ?format=, which DRF reserves for content negotiation
+            fmt = request.query_params.get('file_format') or ('csv' if upload.name.lower().endswith('.csv') else 'json')
+            payload = upload.read()
+        else:
+            fmt = 'json'
+            payload = request.data
         
-        if not project_id:
-            return ProjectWorker.objects.none()
-            
-        project = get_object_or_404(Project, id=project_id)
+        try:
+            projects = bulk.import_projects(bulk.parse(payload, fmt), request.user)
+        except bulk.BulkImportError as exc:
+            return Response({"detail": "Import failed", "errors": exc.messages}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Supervisor sees all workers in their projects
-        if user.role == 'supervisor' and project.supervisor == user:
-            return ProjectWorker.objects.filter(project_id=project_id)
-            
-        # Workers see other workers in projects they're assigned to
-        if user.role == 'worker' and ProjectWorker.objects.filter(project=project, worker=user).exists():
-            return ProjectWorker.objects.filter(project_id=project_id)
-            
-        return ProjectWorker.objects.none()
+        return Response({"created": len(projects), "ids": [project.pk for project in projects]}, status=status.HTTP_201_CREATED)
     
-    def perform_create(self, serializer):
-        """Update project worker count after creating"""
-        project_worker = serializer.save()
-        project = project_worker.project
-        project.current_worker_count = ProjectWorker.objects.filter(project=project).count()
-        project.save(update_fields=['current_worker_count'])
+    @action(detail=False, methods=['get'], url_path='export')
+    def export_projects(self, request):
+        """Stream the user's projects in the import format (?file_format=json|csv)"""
+        fmt = request.query_params.get('file_format', 'json')
+        if fmt not in bulk.EXPORTERS:
+            return Response({"detail": "file_format must be 'json' or 'csv'"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        exporter, content_type = bulk.EXPORTERS[fmt]
+        queryset = Project.objects.filter(pk__in=get_membership(request).viewable)
+        response = StreamingHttpResponse(exporter(queryset), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="projects.{fmt}"'
+        return response
 
-    def perform_destroy(self, instance):
-        """Update project worker count after deleting"""
-        project = instance.project
-        super().perform_destroy(instance)
-        project.current_worker_count = ProjectWorker.objects.filter(project=project).count()
-        project.save(update_fields=['current_worker_count'])
+class ProjectWorkerViewSet(ProjectScopedMixin, viewsets.ModelViewSet):
+    queryset = ProjectWorker.objects.all()
+    serializer_class = ProjectWorkerSerializer
+    joined_fields = ('worker',)
 
-class ProjectUpdateViewSet(viewsets.ModelViewSet):
+class ProjectUpdateViewSet(ProjectScopedMixin, viewsets.ModelViewSet):
     queryset = ProjectUpdate.objects.all()
     serializer_class = ProjectUpdateSerializer
-    
-    def get_queryset(self):
-        """Filter updates by project_id and user permissions"""
-        user = self.request.user
-        project_id = self.request.query_params.get('project_id')
-        
-        if not project_id:
-            return ProjectUpdate.objects.none()
-            
-        project = get_object_or_404(Project, id=project_id)
-        
-        # Both supervisors and assigned workers can see updates
-        if (user.role == 'supervisor' and project.supervisor == user) or \
-           (user.role == 'worker' and ProjectWorker.objects.filter(project=project, worker=user).exists()):
-            return ProjectUpdate.objects.filter(project_id=project_id)
-            
-        return ProjectUpdate.objects.none()
+    joined_fields = ('author',)
+    # Both supervisors and assigned workers can post updates
+    member_writable = True
     
     def perform_create(self, serializer):
         """Set the author to the current user"""
         serializer.save(author=self.request.user)
 
-class ProjectSupplierViewSet(viewsets.ModelViewSet):
+class ProjectSupplierViewSet(ProjectScopedMixin, viewsets.ModelViewSet):
     queryset = ProjectSupplier.objects.all()
     serializer_class = ProjectSupplierSerializer
     
     def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
+        if self.action == 'by_material':
             return [permissions.IsAuthenticated(), IsSupervisor()]
-        return [permissions.IsAuthenticated()]
+        return super().get_permissions()
     
-    def get_queryset(self):
-        user = self.request.user
-        project_id = self.request.query_params.get('project_id')
-        
-        if not project_id:
-            return ProjectSupplier.objects.none()
-            
-        project = get_object_or_404(Project, id=project_id)
-        
-        # Both supervisors and assigned workers can see suppliers
-        if (user.role == 'supervisor' and project.supervisor == user) or \
-           (user.role == 'worker' and ProjectWorker.objects.filter(project=project, worker=user).exists()):
-            return ProjectSupplier.objects.filter(project_id=project_id)
-            
-        return ProjectSupplier.objects.none()
+    @action(detail=False, methods=['get'], url_path='by-material')
+    def by_material(self, request):
+        """Suppliers of ?material= across the supervisor's projects, best first (?top=)"""
+        material = request.query_params.get('material', '')
+        if not materials.normalize(material):
+            return Response({"detail": "material is required"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            top = min(max(int(request.query_params.get('top', materials.DEFAULT_TOP)), 1), materials.MAX_TOP)
+        except ValueError:
+            return Response({"detail": "top must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(materials.suppliers_for(request.user.pk, material, top))
 
-class ProjectTimelineViewSet(viewsets.ModelViewSet):
+class ProjectTimelineViewSet(ProjectScopedMixin, viewsets.ModelViewSet):
     queryset = ProjectTimeline.objects.all()
     serializer_class = ProjectTimelineSerializer
-    
-    def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
-            return [permissions.IsAuthenticated(), IsSupervisor()]
-        return [permissions.IsAuthenticated()]
-    
-    def get_queryset(self):
-        user = self.request.user
-        project_id = self.request.query_params.get('project_id')
-        
-        if not project_id:
-            return ProjectTimeline.objects.none()
-            
-        project = get_object_or_404(Project, id=project_id)
-        
-        # Both supervisors and assigned workers can see timeline
-        if (user.role == 'supervisor' and project.supervisor == user) or \
-           (user.role == 'worker' and ProjectWorker.objects.filter(project=project, worker=user).exists()):
-            return ProjectTimeline.objects.filter(project_id=project_id)
-            
-        return ProjectTimeline.objects.none()
+    joined_fields = ('responsible_person',)
+    prefetched_fields = ('dependencies',)
 
-class RiskAnalysisViewSet(viewsets.ModelViewSet):
+class RiskAnalysisViewSet(ProjectScopedMixin, viewsets.ModelViewSet):
     queryset = RiskAnalysis.objects.all()
     serializer_class = RiskAnalysisSerializer
-    
-    def get_permissions(self):
-        if self.action in ['create', 'update', 'partial_update', 'destroy']:
-            return [permissions.IsAuthenticated(), IsSupervisor()]
-        return [permissions.IsAuthenticated()]
-    
-    def get_queryset(self):
-        user = self.request.user
-        project_id = self.request.query_params.get('project_id')
-        
-        if not project_id:
-            return RiskAnalysis.objects.none()
-            
-        project = get_object_or_404(Project, id=project_id)
-        
-        # Both supervisors and assigned workers can see risks
-        if (user.role == 'supervisor' and project.supervisor == user) or \
-           (user.role == 'worker' and ProjectWorker.objects.filter(project=project, worker=user).exists()):
-            return RiskAnalysis.objects.filter(project_id=project_id)
-            
-        return RiskAnalysis.objects.none()
\ No newline at end of file
@@ -0,0 +1,140 @@
+"""
+Project workspace: everything the project page shows, in one response.
+
+The project row, its timeline, workers, suppliers, risks and updates, its chat
+room and the newest chat messages are loaded with one query per section (the
+sections are sliced prefetches on the project query) after a single
+membership check. Each section is capped (``?limit=``, see
+``PROJECT_WORKSPACE``) and reports whether more rows exist; the full lists stay
+available from the sub-resource endpoints, and older messages from the
+messages endpoint using the returned ``before`` cursor.
+
+Sections are read in several statements, so the snapshot is validated against
+``content_version`` afterwards: if the project changed while it was being read,
+it is read again. Chat messages are append-only and come with an ``after``
+cursor, so clients continue from exactly where the snapshot ends.
+"""
+from django.conf import settings
+from django.db.models import Prefetch
+
+from .models import Project, ProjectSupplier, ProjectTimeline, ProjectUpdate, ProjectWorker, RiskAnalysis
+from .serializers import (
+    ProjectSerializer, ProjectSupplierSerializer, ProjectTimelineSerializer,
+    ProjectUpdateSerializer, ProjectWorkerSerializer, RiskAnalysisSerializer
+)
+
+DEFAULTS = {
+    'SECTION_LIMIT': 50,
+    'MAX_SECTION_LIMIT': 200,
+    'SNAPSHOT_ATTEMPTS': 3,
+}
+
+# section -> (related name on Project, queryset, serializer)
+SECTIONS = {
+    'timeline_events': (
+        'timeline_events',
+        lambda: ProjectTimeline.objects.select_related('responsible_person')
+        .prefetch_related('dependencies').order_by('start_date', 'id'),
+        ProjectTimelineSerializer,
+    ),
+    'workers': (
+        'project_workers',
+        lambda: ProjectWorker.objects.select_related('worker').order_by('assigned_at', 'id'),
+        ProjectWorkerSerializer,
+    ),
+    'suppliers': ('suppliers', lambda: ProjectSupplier.objects.order_by('name', 'id'), ProjectSupplierSerializer),
+    # Open risks first, most recent first within each group
+    'risks': ('risks', lambda: RiskAnalysis.objects.order_by('is_resolved', '-created_at', '-id'), RiskAnalysisSerializer),
+    'updates': (
+        'updates',
+        lambda: ProjectUpdate.objects.select_related('author').order_by('-created_at', '-id'),
+        ProjectUpdateSerializer,
+    ),
+}
+
+
+def workspace_setting(name):
+    return getattr(settings, 'PROJECT_WORKSPACE', {}).get(name, DEFAULTS[name])
+
+
+def section_limit(value):
+    """Rows per section from ?limit=, clamped to MAX_SECTION_LIMIT"""
+    try:
+        limit = int(value) if value is not None else workspace_setting('SECTION_LIMIT')
+    except (TypeError, ValueError):
+        limit = workspace_setting('SECTION_LIMIT')
+    return max(1, min(limit, workspace_setting('MAX_SECTION_LIMIT')))
+
+
+def load_project(project_id, limit):
+    """The project with every section prefetched; each holds up to limit + 1 rows"""
+    prefetches = [
+        Prefetch(related_name, queryset=queryset()[:limit + 1], to_attr=f'workspace_{section}')
+        for section, (related_name, queryset, _) in SECTIONS.items()
+    ]
+    return (
+        Project.objects.select_related('supervisor', 'chat_room')
+        .prefetch_related(*prefetches)
+        .filter(pk=project_id)
+        .first()
+    )
+
+
+def load_messages(chat_room, limit):
+    """The newest `limit` messages oldest-first, and whether older ones exist"""
+    from chat.models import Message
+
+    if chat_room is None:
+        return [], False
+    rows = list(
+        Message.objects.filter(chat_room=chat_room).select_related('sender')
+        .order_by('-created_at', '-pk')[:limit + 1]
+    )
+    return rows[:limit][::-1], len(rows) > limit
+
+
+def read_snapshot(project_id, limit):
+    """Load the project and its messages, re-reading if the project changed meanwhile"""
+    for _ in range(workspace_setting('SNAPSHOT_ATTEMPTS')):
+        project = load_project(project_id, limit)
+        if project is None:
+            return None, [], False
+        chat_room = getattr(project, 'chat_room', None)
+        messages, has_older = load_messages(chat_room, limit)
+        current = Project.objects.filter(pk=project_id).values_list('content_version', flat=True).first()
+        if current == project.content_version:
+            break
+    return project, messages, has_older
+
+
+def build(project_id, context, limit):
+    """The serialized workspace, or None if the project doesn't exist"""
+    from chat.pagination import encode_cursor
+    from chat.serializers import ChatRoomSerializer, MessageSerializer
+
+    project, messages, has_older = read_snapshot(project_id, limit)
+    if project is None:
+        return None
+
+    data = {
+        'project': ProjectSerializer(project, expand=[], context=context).data,
+        'content_version': project.content_version,
+        'limit': limit,
+    }
+    for section, (_, _, serializer_class) in SECTIONS.items():
+        rows = getattr(project, f'workspace_{section}')
+        data[section] = {
+            'results': serializer_class(rows[:limit], many=True, context=context).data,
+            'has_more': len(rows) > limit,
+        }
+
+    chat_room = getattr(project, 'chat_room', None)
+    data['chat_room'] = ChatRoomSerializer(chat_room, context=context).data if chat_room else None
+    data['messages'] = {
+        'results': MessageSerializer(messages, many=True, context=context).data,
+        # Same cursors as the messages endpoint: page back with ?before=, poll with ?after=
+        'before': encode_cursor(messages[0]) if messages and has_older else None,
+        'after': encode_cursor(messages[-1]) if messages else None,
+        'has_older': has_older,
+    }
+    return data
@@ -0,0 +1,216 @@
+"""
+Full-text search backends, chosen by database vendor.
+
+Both real backends index ``SearchDocument.title`` (weighted higher) and
+``SearchDocument.body`` inside the database, so the rows written by
+``search.indexing`` are all that has to be kept up to date:
+
+* SQLite: an external-content FTS5 table kept in sync by triggers on the
+  document table, ranked with ``bm25()``.
+* PostgreSQL: a GIN index over the weighted ``tsvector`` expression below,
+  queried with ``websearch_to_tsquery`` and ranked with ``ts_rank_cd``.
+
+Other databases fall back to ``icontains`` matching ordered by recency.
+"""
+import re
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import SearchDocument
+
+TABLE = SearchDocument._meta.db_table
+COLUMNS = 'd.id, d.kind, d.object_id, d.project_id, d.title, d.created_at'
+# Matched terms in snippets are wrapped in these markers (plain text; never rendered as HTML)
+HIGHLIGHT = ('**', '**')
+
+
+def terms(query):
+    return re.findall(r'\w+', query or '')
+
+
+def in_clause(column, values):
+    return f"{column} IN ({', '.join(['%s'] * len(values))})", list(values)
+
+
+def filters(project_ids, kinds):
+    """WHERE fragments and params restricting documents to `project_ids` (and `kinds`)"""
+    if not project_ids:
+        return ['1 = 0'], []
+    clauses, params = [], []
+    for column, values in (('d.project_id', project_ids), ('d.kind', kinds)):
+        if values:
+            clause, values = in_clause(column, values)
+            clauses.append(clause)
+            params.extend(values)
+    return clauses, params
+
+
+def fetch(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        names = [column[0] for column in cursor.description]
+        rows = [dict(zip(names, row)) for row in cursor.fetchall()]
+    for row in rows:
+        # Raw SQLite cursors return datetimes as text
+        if isinstance(row.get('created_at'), str):
+            created_at = parse_datetime(row['created_at'])
+            if settings.USE_TZ and timezone.is_naive(created_at):
+                created_at = timezone.make_aware(created_at, dt_timezone.utc)
+            row['created_at'] = created_at
+    return rows
+
+
+class SQLiteFTSBackend:
+    fts_table = 'search_document_fts'
+
+    def create_index(self, schema_editor):
+        fts = self.fts_table
+        for statement in [
+            f"CREATE VIRTUAL TABLE {fts} USING fts5(title, body, content='{TABLE}', content_rowid='id', "
+            f"tokenize='porter unicode61 remove_diacritics 2')",
+            f"CREATE TRIGGER {fts}_insert AFTER INSERT ON {TABLE} BEGIN "
+            f"INSERT INTO {fts}(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+            f"CREATE TRIGGER {fts}_delete AFTER DELETE ON {TABLE} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); END",
+            f"CREATE TRIGGER {fts}_update AFTER UPDATE ON {TABLE} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); "
+            f"INSERT INTO {fts}(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+            # Index any documents that already exist
+            f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+        ]:
+            schema_editor.execute(statement)
+
+    def drop_index(self, schema_editor):
+        for trigger in ('insert', 'delete', 'update'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {self.fts_table}_{trigger}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {self.fts_table}")
+
+    def match_expression(self, query):
+        """Quote every term (so user input can't use FTS syntax) and prefix-match the last one"""
+        words = terms(query)
+        if not words:
+            return None
+        return ' '.join(f'"{word}"' for word in words) + '*'
+
+    def where(self, match, project_ids, kinds):
+        clauses, params = filters(project_ids, kinds)
+        where = ' AND '.join([f"{self.fts_table} MATCH %s"] + clauses)
+        return (
+            f"FROM {self.fts_table} JOIN {TABLE} d ON d.id = {self.fts_table}.rowid WHERE {where}",
+            [match] + params,
+        )
+
+    def count(self, query, project_ids, kinds):
+        match = self.match_expression(query)
+        if match is None:
+            return 0
+        sql, params = self.where(match, project_ids, kinds)
+        return fetch(f"SELECT COUNT(*) AS total {sql}", params)[0]['total']
+
+    def search(self, query, project_ids, kinds, limit, offset):
+        match = self.match_expression(query)
+        if match is None:
+            return []
+        sql, params = self.where(match, project_ids, kinds)
+        start, end = HIGHLIGHT
+        rows = fetch(
+            f"SELECT {COLUMNS}, "
+            f"snippet({self.fts_table}, -1, %s, %s, '…', 16) AS snippet, "
+            f"bm25({self.fts_table}, 5.0, 1.0) AS score "
+            f"{sql} ORDER BY score, d.id LIMIT %s OFFSET %s",
+            [start, end] + params + [limit, offset],
+        )
+        for row in rows:
+            # bm25() is lower-is-better; expose higher-is-better like PostgreSQL
+            row['rank'] = -row.pop('score')
+        return rows
+
+
+class PostgresFTSBackend:
+    index_name = 'search_document_vector_idx'
+    # The index is built over this expression (unqualified); queries must use the same one
+    vector = (
+        "(setweight(to_tsvector('english'::regconfig, coalesce(d.title, '')), 'A') || "
+        "setweight(to_tsvector('english'::regconfig, coalesce(d.body, '')), 'B'))"
+    )
+
+    def create_index(self, schema_editor):
+        schema_editor.execute(
+            f"CREATE INDEX {self.index_name} ON {TABLE} USING GIN ({self.vector.replace('d.', '')})"
+        )
+
+    def drop_index(self, schema_editor):
+        schema_editor.execute(f"DROP INDEX IF EXISTS {self.index_name}")
+
+    def where(self, query, project_ids, kinds):
+        clauses, params = filters(project_ids, kinds)
+        where = ' AND '.join([f"{self.vector} @@ q"] + clauses)
+        return (
+            f"FROM {TABLE} d, websearch_to_tsquery('english'::regconfig, %s) q WHERE {where}",
+            [query] + params,
+        )
+
+    def count(self, query, project_ids, kinds):
+        if not terms(query):
+            return 0
+        sql, params = self.where(query, project_ids, kinds)
+        return fetch(f"SELECT COUNT(*) AS total {sql}", params)[0]['total']
+
+    def search(self, query, project_ids, kinds, limit, offset):
+        if not terms(query):
+            return []
+        sql, params = self.where(query, project_ids, kinds)
+        start, end = HIGHLIGHT
+        return fetch(
+            f"SELECT {COLUMNS}, "
+            f"ts_headline('english'::regconfig, d.body, q, %s) AS snippet, "
+            f"ts_rank_cd({self.vector}, q) AS rank "
+            f"{sql} ORDER BY rank DESC, d.id LIMIT %s OFFSET %s",
+            [f'StartSel="{start}", StopSel="{end}", MaxWords=24, MinWords=8'] + params + [limit, offset],
+        )
+
+
+class BasicSearchBackend:
+    """Unindexed fallback: every term must appear in the title or body"""
+
+    def create_index(self, schema_editor):
+        pass
+
+    def drop_index(self, schema_editor):
+        pass
+
+    def queryset(self, query, project_ids, kinds):
+        queryset = SearchDocument.objects.filter(project_id__in=project_ids)
+        if kinds:
+            queryset = queryset.filter(kind__in=kinds)
+        for word in terms(query):
+            queryset = queryset.filter(Q(title__icontains=word) | Q(body__icontains=word))
+        return queryset
+
+    def count(self, query, project_ids, kinds):
+        return self.queryset(query, project_ids, kinds).count() if terms(query) else 0
+
+    def search(self, query, project_ids, kinds, limit, offset):
+        if not terms(query):
+            return []
+        rows = (
+            self.queryset(query, project_ids, kinds)
+            .order_by('-created_at', '-id')
+            .values('id', 'kind', 'object_id', 'project_id', 'title', 'created_at', 'body')[offset:offset + limit]
+        )
+        return [dict(row, snippet=row.pop('body')[:200], rank=0.0) for row in rows]
+
+
+BACKENDS = {
+    'sqlite': SQLiteFTSBackend,
+    'postgresql': PostgresFTSBackend,
+}
+
+
+def get_backend(conn=None):
+    return BACKENDS.get((conn or connection).vendor, BasicSearchBackend)()
@@ -0,0 +1,49 @@
+"""
+Text embedders for the vector index (see ``search.vectors``).
+
+An embedder has a ``dim`` and an ``embed(texts)`` method returning a float32
+array of shape ``(len(texts), dim)`` whose rows are L2-normalized, so a dot
+product is the cosine similarity. ``VECTOR_INDEX['EMBEDDER']`` names the class
+and ``VECTOR_INDEX['EMBEDDER_OPTIONS']`` its keyword arguments; a model-backed
+embedder only has to follow the same interface.
+
+``HashingEmbedder`` is the default: a deterministic, dependency-free embedding
+that hashes words and word pairs into signed buckets. It needs no model or
+network and gives the same vectors in every process, which keeps indexes
+portable and tests offline; it matches shared vocabulary, not synonyms.
+"""
+import functools
+import hashlib
+import re
+
+import numpy as np
+
+WORD = re.compile(r'\w+')
+
+
+@functools.lru_cache(maxsize=65536)
+def bucket(feature, dim):
+    """(index, sign) of a feature; blake2b rather than hash() so every process agrees"""
+    value = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), 'little')
+    return value % dim, 1.0 if value >> 63 else -1.0
+
+
+class HashingEmbedder:
+    """Signed feature hashing of words and adjacent word pairs, log-scaled and normalized"""
+
+    def __init__(self, dim=256):
+        self.dim = dim
+
+    def features(self, text):
+        words = WORD.findall((text or '').casefold())
+        return words + [f'{first} {second}' for first, second in zip(words, words[1:])]
+
+    def embed(self, texts):
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self.features(text):
+                index, sign = bucket(feature, self.dim)
+                vectors[row, index] += sign
+        vectors = np.sign(vectors) * np.log1p(np.abs(vectors))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return (vectors / np.where(norms == 0, 1, norms)).astype(np.float32)
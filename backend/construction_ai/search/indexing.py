@@ -0,0 +1,110 @@
+"""
+Keep ``SearchDocument`` rows in step with the indexed models.
+
+Each indexed model maps to a document kind and a function producing the
+document's fields. Saves upsert the document in one statement, deletes remove
+it, and bulk paths (project imports, ``rebuild``) write documents in batches.
+The database-side full-text index follows the document table (see
+``search.backends``).
+"""
+from chat.models import Message
+from projects.models import Project, ProjectUpdate, RiskAnalysis
+from .models import SearchDocument
+
+DOCUMENT_FIELDS = ['project', 'title', 'body', 'created_at']
+
+
+def join(*parts):
+    return '\n'.join(part for part in parts if part)
+
+
+def project_document(project):
+    return {
+        'project_id': project.pk,
+        'title': project.title,
+        'body': join(
+            project.description, project.detailed_description, project.risk_assessment,
+            project.mitigation_strategies, project.supply_chain_requirements,
+            project.resource_allocation, project.equipment_requirements, project.location,
+        ),
+        'created_at': project.created_at,
+    }
+
+
+def update_document(update):
+    return {
+        'project_id': update.project_id,
+        'title': update.title,
+        'body': update.content,
+        'created_at': update.created_at,
+    }
+
+
+def risk_document(risk):
+    return {
+        'project_id': risk.project_id,
+        'title': risk.title,
+        'body': join(risk.description, risk.mitigation_plan, risk.contingency_plan),
+        'created_at': risk.created_at,
+    }
+
+
+def message_document(message):
+    return {
+        'project_id': message.chat_room.project_id,
+        'title': '',
+        'body': message.content,
+        'created_at': message.created_at,
+    }
+
+
+# model -> (document kind, document fields, queryset used when rebuilding)
+SOURCES = {
+    Project: ('project', project_document, lambda: Project.objects.all()),
+    ProjectUpdate: ('update', update_document, lambda: ProjectUpdate.objects.all()),
+    RiskAnalysis: ('risk', risk_document, lambda: RiskAnalysis.objects.all()),
+    Message: ('message', message_document, lambda: Message.objects.select_related('chat_room')),
+}
+
+
+def document_for(instance):
+    kind, fields, _ = SOURCES[type(instance)]
+    return SearchDocument(kind=kind, object_id=instance.pk, **fields(instance))
+
+
+def write(documents, batch_size=500):
+    """Insert or replace documents, keyed on (kind, object_id)"""
+    SearchDocument.objects.bulk_create(
+        documents, batch_size=batch_size, update_conflicts=True,
+        unique_fields=['kind', 'object_id'], update_fields=DOCUMENT_FIELDS,
+    )
+
+
+def index(instance):
+    write([document_for(instance)])
+
+
+def index_many(instances, batch_size=500):
+    write([document_for(instance) for instance in instances], batch_size)
+
+
+def unindex(instance):
+    kind = SOURCES[type(instance)][0]
+    SearchDocument.objects.filter(kind=kind, object_id=instance.pk).delete()
+
+
+def rebuild(batch_size=500):
+    """Re-create every document from the source tables; returns the number indexed"""
+    SearchDocument.objects.all().delete()
+    total = 0
+    for _, _, queryset in SOURCES.values():
+        batch = []
+        for instance in queryset().order_by('pk').iterator(chunk_size=batch_size):
+            batch.append(document_for(instance))
+            if len(batch) >= batch_size:
+                write(batch, batch_size)
+                total += len(batch)
+                batch = []
+        write(batch, batch_size)
+        total += len(batch)
+    return total
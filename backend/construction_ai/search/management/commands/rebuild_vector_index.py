@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from search.vectors import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-create the per-project vector indexes from updates, risks, suppliers and chat messages. "
+        "Run it after changing the embedder and after writes that bypassed signals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--project', type=int, action='append', dest='projects',
+                            help="Only rebuild this project (repeatable)")
+
+    def handle(self, *args, **options):
+        total = rebuild(options['projects'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} passage(s)"))
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 16:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_search_index(apps, schema_editor):
+    from search.backends import get_backend
+    get_backend(schema_editor.connection).create_index(schema_editor)
+
+
+def drop_search_index(apps, schema_editor):
+    from search.backends import get_backend
+    get_backend(schema_editor.connection).drop_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('projects', '0007_risk_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('project', 'Project'), ('update', 'Project Update'), ('risk', 'Risk'), ('message', 'Chat Message')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('title', models.CharField(blank=True, max_length=255)),
+                ('body', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(help_text='Creation time of the indexed object')),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_documents', to='projects.project')),
+            ],
+            options={
+                'unique_together': {('kind', 'object_id')},
+            },
+        ),
+        # Existing rows are indexed by `manage.py rebuild_search_index`
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
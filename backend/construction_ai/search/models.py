@@ -0,0 +1,27 @@
+from django.db import models
+from projects.models import Project
+
+class SearchDocument(models.Model):
+    """
+    One searchable row per indexed object. The full-text index itself lives in the
+    database (an FTS5 table on SQLite, a GIN expression index on PostgreSQL; see search.backends).
+    """
+    KIND_CHOICES = (
+        ('project', 'Project'),
+        ('update', 'Project Update'),
+        ('risk', 'Risk'),
+        ('message', 'Chat Message'),
+    )
+    
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='search_documents')
+    title = models.CharField(max_length=255, blank=True)
+    body = models.TextField(blank=True)
+    created_at = models.DateTimeField(help_text="Creation time of the indexed object")
+    
+    class Meta:
+        unique_together = ('kind', 'object_id')
+    
+    def __str__(self):
+        return f"{self.kind} {self.object_id}"
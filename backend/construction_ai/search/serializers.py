@@ -0,0 +1,10 @@
+from rest_framework import serializers
+
+class SearchResultSerializer(serializers.Serializer):
+    kind = serializers.CharField()
+    id = serializers.IntegerField(source='object_id')
+    project = serializers.IntegerField(source='project_id')
+    title = serializers.CharField()
+    snippet = serializers.CharField()
+    rank = serializers.FloatField()
+    created_at = serializers.DateTimeField()
@@ -0,0 +1,49 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from chat.models import Message
+from projects.models import Project, ProjectSupplier, ProjectUpdate, RiskAnalysis
+from projects.signals import projects_imported
+from . import indexing, vectors
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=ProjectUpdate)
+@receiver(post_save, sender=RiskAnalysis)
+@receiver(post_save, sender=Message)
+def index_saved(sender, instance, raw=False, **kwargs):
+    # Fixtures are loaded as stored; rebuild_search_index indexes them afterwards
+    if not raw:
+        indexing.index(instance)
+
+# Project documents go with the project (the document's foreign key cascades)
+@receiver(post_delete, sender=ProjectUpdate)
+@receiver(post_delete, sender=RiskAnalysis)
+@receiver(post_delete, sender=Message)
+def unindex_deleted(sender, instance, **kwargs):
+    indexing.unindex(instance)
+
+@receiver(projects_imported)
+def index_imported(sender, projects, children, **kwargs):
+    """Imported rows were bulk-created without post_save"""
+    indexing.index_many(list(projects) + children['risks'])
+    vectors.index_many(children['risks'] + children['suppliers'])
+
+# The vector index keeps passages per project, written once the transaction commits
+@receiver(post_save, sender=ProjectUpdate)
+@receiver(post_save, sender=RiskAnalysis)
+@receiver(post_save, sender=ProjectSupplier)
+@receiver(post_save, sender=Message)
+def embed_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        vectors.index(instance)
+
+@receiver(post_delete, sender=ProjectUpdate)
+@receiver(post_delete, sender=RiskAnalysis)
+@receiver(post_delete, sender=ProjectSupplier)
+@receiver(post_delete, sender=Message)
+def unembed_deleted(sender, instance, **kwargs):
+    vectors.unindex(instance)
+
+@receiver(post_delete, sender=Project)
+def remove_vector_index(sender, instance, **kwargs):
+    vectors.remove_project(instance.pk)
@@ -0,0 +1,242 @@
+import shutil
+import tempfile
+from datetime import date
+
+import numpy as np
+from django.core import serializers
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from accounts.models import User
+from chat.ai import build_prompt
+from chat.models import Message
+from projects.models import Project, ProjectSupplier, ProjectUpdate, ProjectWorker, RiskAnalysis
+from . import vectors
+from .embeddings import HashingEmbedder
+from .indexing import rebuild
+from .models import SearchDocument
+
+
+def make_user(username, role):
+    return User.objects.create_user(username=username, email=f'{username}@example.com', role=role)
+
+
+def make_project(supervisor, title):
+    return Project.objects.create(
+        title=title, description='Test project', location='Site A',
+        start_date=date(2025, 1, 1), end_date=date(2025, 12, 31), supervisor=supervisor
+    )
+
+
+class SearchTests(APITestCase):
+    def setUp(self):
+        self.supervisor = make_user('supervisor', 'supervisor')
+        self.worker = make_user('worker', 'worker')
+        self.bridge = make_project(self.supervisor, 'Bridge')
+        self.tower = make_project(self.supervisor, 'Tower')
+        ProjectWorker.objects.create(project=self.bridge, worker=self.worker)
+
+    def search(self, user, **params):
+        self.client.force_authenticate(user)
+        return self.client.get(reverse('search'), params)
+
+    def test_finds_every_kind_ranked_by_relevance(self):
+        risk = RiskAnalysis.objects.create(
+            project=self.bridge, title='Scaffolding collapse', description='Wind loads on scaffolding',
+            risk_level='high', mitigation_plan='Brace the scaffolding'
+        )
+        update = ProjectUpdate.objects.create(
+            project=self.bridge, author=self.worker, title='Deck poured', content='Scaffolding struck on the east side'
+        )
+        message = Message.objects.create(chat_room=self.bridge.chat_room, sender=self.worker, content='Is the scaffold safe?')
+
+        response = self.search(self.supervisor, q='scaffolding')
+
+        self.assertEqual(response.status_code, 200)
+        results = response.data['results']
+        # Porter stemming matches "scaffold" too; the risk mentions it most, and in its title
+        self.assertEqual((results[0]['kind'], results[0]['id']), ('risk', risk.pk))
+        self.assertEqual({(row['kind'], row['id']) for row in results[1:]}, {('update', update.pk), ('message', message.pk)})
+        self.assertGreater(results[0]['rank'], results[1]['rank'])
+        self.assertIn('**', results[0]['snippet'])
+        # The last term is prefix-matched
+        self.assertEqual(self.search(self.supervisor, q='scaff').data['count'], 3)
+        self.assertEqual(self.search(self.supervisor, q='scaffold', kind='message').data['count'], 1)
+
+    def test_results_follow_edits_and_deletes(self):
+        update = ProjectUpdate.objects.create(project=self.bridge, author=self.worker, title='Crane', content='Crane arrived')
+        self.assertEqual(self.search(self.supervisor, q='crane').data['count'], 1)
+
+        update.content = 'Excavator arrived'
+        update.title = 'Excavator'
+        update.save()
+        self.assertEqual(self.search(self.supervisor, q='crane').data['count'], 0)
+        self.assertEqual(self.search(self.supervisor, q='excavator').data['count'], 1)
+
+        update.delete()
+        self.assertEqual(self.search(self.supervisor, q='excavator').data['count'], 0)
+
+    def test_scoped_to_membership(self):
+        for project in (self.bridge, self.tower):
+            ProjectUpdate.objects.create(project=project, author=self.supervisor, title='Concrete', content='Pour')
+
+        self.assertEqual(self.search(self.supervisor, q='concrete').data['count'], 2)
+        self.assertEqual(self.search(self.worker, q='concrete').data['count'], 1)
+        self.assertEqual(self.search(self.worker, q='concrete', project_id=self.tower.pk).data['count'], 0)
+        self.assertEqual(self.search(make_user('stranger', 'worker'), q='concrete').data['count'], 0)
+
+    def test_paginates(self):
+        for i in range(5):
+            ProjectUpdate.objects.create(project=self.bridge, author=self.worker, title=f'Rebar {i}', content='')
+
+        page = self.search(self.supervisor, q='rebar', limit=2, offset=2).data
+
+        self.assertEqual(page['count'], 5)
+        self.assertEqual(len(page['results']), 2)
+        self.assertIsNotNone(page['next'])
+
+    def test_user_input_is_not_fts_syntax(self):
+        response = self.search(self.supervisor, q='"bridge" OR NEAR(')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.search(self.supervisor, q='').status_code, 400)
+
+    def test_rebuild_restores_documents(self):
+        ProjectUpdate.objects.create(project=self.bridge, author=self.worker, title='Piling', content='')
+        SearchDocument.objects.all().delete()
+
+        self.assertEqual(rebuild(), 3)
+        self.assertEqual(self.search(self.supervisor, q='piling').data['count'], 1)
+
+    def test_fixture_loads_are_not_indexed(self):
+        update = ProjectUpdate.objects.create(project=self.bridge, author=self.worker, title='Piling', content='')
+        fixture = serializers.serialize('json', [update])
+        SearchDocument.objects.all().delete()
+
+        for obj in serializers.deserialize('json', fixture):
+            obj.save()  # What loaddata does: post_save with raw=True
+
+        self.assertFalse(SearchDocument.objects.exists())
+
+
+class VectorIndexTests(TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        self.configure(ROOT=root)
+        self.supervisor = make_user('supervisor', 'supervisor')
+        self.bridge = make_project(self.supervisor, 'Bridge')
+
+    def configure(self, **options):
+        self.options = {**getattr(self, 'options', {}), **options}
+        override = self.settings(VECTOR_INDEX=self.options)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def create(self, model, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            return model.objects.create(**fields)
+
+    def keys(self, query, **kwargs):
+        return [(passage.kind, passage.object_id) for passage in vectors.retrieve(self.bridge, query, **kwargs)]
+
+    def rows(self):
+        snapshot = vectors.ProjectIndex(self.bridge.pk).snapshot()
+        return len(snapshot), int(snapshot.live.sum())
+
+    def test_embedder_is_deterministic_and_normalized(self):
+        first, second = HashingEmbedder(dim=64).embed(['Concrete pour delayed', 'concrete POUR delayed!'])
+        self.assertEqual(first.dtype, np.float32)
+        np.testing.assert_allclose(first, second)
+        self.assertAlmostEqual(float(np.linalg.norm(first)), 1.0, places=5)
+        self.assertFalse(HashingEmbedder(dim=64).embed(['']).any())
+
+    def test_retrieves_closest_records_after_commit(self):
+        supplier = self.create(
+            ProjectSupplier, project=self.bridge, name='Northern Steel',
+            materials_provided='Rebar and structural steel beams', lead_time_days=21,
+        )
+        risk = self.create(
+            RiskAnalysis, project=self.bridge, title='Flooding', description='River flooding of the site',
+            risk_level='high', mitigation_plan='Pump station and sandbags',
+        )
+        update = self.create(
+            ProjectUpdate, project=self.bridge, author=self.supervisor, title='Deck',
+            content='The concrete deck pour finished ahead of schedule',
+        )
+        self.create(Message, chat_room=self.bridge.chat_room, sender=self.supervisor,
+                    content='When does the steel beams delivery arrive?')
+        self.create(Message, chat_room=self.bridge.chat_room, sender=self.supervisor,
+                    content='Steel beams arrive in three weeks', is_ai_response=True)
+        # Uncommitted rows are not indexed
+        ProjectUpdate.objects.create(project=self.bridge, author=self.supervisor, title='Rolled back', content='Flooding')
+
+        self.assertEqual(self.keys('flooding risk')[0], ('risk', risk.pk))
+        self.assertEqual(self.keys('concrete deck pour')[0], ('update', update.pk))
+        steel = self.keys('who supplies structural steel beams')
+        self.assertEqual(steel[0], ('supplier', supplier.pk))
+        self.assertEqual([kind for kind, _ in steel].count('message'), 1)
+        self.assertEqual(len(self.keys('flooding steel concrete', k=2)), 2)
+        self.assertEqual(self.keys('   '), [])
+        self.assertEqual(vectors.retrieve(make_project(self.supervisor, 'Tower'), 'flooding'), [])
+
+    def test_edits_replace_and_deletes_remove_passages(self):
+        update = self.create(ProjectUpdate, project=self.bridge, author=self.supervisor, title='Plant', content='Crane arrived')
+        self.assertEqual(self.keys('crane arrived'), [('update', update.pk)])
+        with self.captureOnCommitCallbacks(execute=True):
+            update.content = 'Excavator hired for the trenches'
+            update.save()
+        self.assertEqual(self.keys('crane arrived'), [])
+        self.assertIn('Excavator', vectors.retrieve(self.bridge, 'excavator')[0].text)
+        self.assertEqual(self.rows(), (2, 1))
+        # Saving unchanged content appends nothing
+        with self.captureOnCommitCallbacks(execute=True):
+            update.save()
+        self.assertEqual(self.rows(), (2, 1))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            update.delete()
+        self.assertEqual(self.keys('excavator'), [])
+        self.assertEqual(self.rows(), (3, 0))
+
+    def test_long_records_are_chunked_and_dead_rows_compacted(self):
+        self.configure(CHUNK_WORDS=5, COMPACT_SLACK=0)
+        update = self.create(
+            ProjectUpdate, project=self.bridge, author=self.supervisor, title='Log',
+            content='one two three four five six seven eight nine ten eleven',
+        )
+        self.assertEqual(self.rows(), (3, 3))
+        self.assertTrue(all(text.startswith('Update ') for text in vectors.ProjectIndex(self.bridge.pk).snapshot().texts))
+        with self.captureOnCommitCallbacks(execute=True):
+            update.content = 'alpha'
+            update.save()
+        # Three dead rows against one live: rewritten into a new segment holding only the live row
+        self.assertEqual(self.rows(), (1, 1))
+        self.assertEqual(vectors.ProjectIndex(self.bridge.pk).read_meta()['segment'], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            update.content = 'beta'
+            update.save()
+        self.assertEqual(self.rows(), (2, 1))
+        self.assertIn('beta', vectors.retrieve(self.bridge, 'beta')[0].text)
+
+    def test_prompt_includes_retrieved_records(self):
+        self.create(ProjectSupplier, project=self.bridge, name='Harbour Timber', materials_provided='Glulam timber')
+        prompt = build_prompt('Which supplier provides glulam timber?', self.bridge).render()
+        self.assertIn('Relevant project records:\n- Supplier Harbour Timber: Provides Glulam timber.', prompt)
+
+    def test_rebuild_restores_index_and_replaces_other_embedders(self):
+        risk = self.create(
+            RiskAnalysis, project=self.bridge, title='Crane failure', description='Tower crane hydraulics',
+            risk_level='medium', mitigation_plan='Weekly inspection',
+        )
+        self.configure(EMBEDDER_OPTIONS={'dim': 32})
+        # Files written by another embedder are ignored until rebuilt
+        self.assertEqual(self.keys('crane'), [])
+
+        self.assertEqual(vectors.rebuild(), 1)
+        self.assertEqual(self.keys('crane'), [('risk', risk.pk)])
+        self.assertEqual(vectors.ProjectIndex(self.bridge.pk).snapshot().vectors.shape, (1, 32))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bridge.delete()
+        self.assertFalse(vectors.ProjectIndex(self.bridge.pk).directory.exists())
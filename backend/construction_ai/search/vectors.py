@@ -0,0 +1,431 @@
+"""
+Per-project vector index for retrieval-augmented chat answers.
+
+Project updates, risk analyses, suppliers and chat messages (not the
+assistant's own replies) are split into passages of at most ``CHUNK_WORDS``
+words, embedded (see ``search.embeddings``) and stored per project under
+``VECTOR_INDEX['ROOT']/<project id>/``:
+
+* ``vectors-<segment>.f32``: one float32 row per passage, appended in place
+  and memory-mapped at query time, so every worker process shares the same
+  pages through the OS cache instead of holding its own copy;
+* ``rows-<segment>.jsonl``: one line per vector row with the source record's
+  key (``update:12``), the write it came from and the passage text;
+* ``meta.json``: the current segment and the embedder that produced it.
+
+Writes only append. Re-indexing a record appends its new passages, which
+makes the record's older rows dead; deleting it appends an empty tombstone
+row. Once dead rows outnumber live ones by ``COMPACT_SLACK`` the live rows are
+copied into a new segment and ``meta.json`` is swapped to it atomically, so a
+reader never pairs vectors with the wrong rows. Writers hold a per-project
+file lock. Records are indexed after the saving transaction commits (see
+``search.signals``); ``manage.py rebuild_vector_index`` re-creates indexes
+from the database, and is needed after changing the embedder, since files
+written by another embedder are ignored.
+
+``retrieve(project, query)`` scores the query against all of the project's
+rows with one matrix-vector product and returns the best ``TOP_K`` passages
+scoring at least ``MIN_SCORE``. Parsed rows are cached per process and
+re-read only when the files change, so a query costs one embedding, two
+``stat`` calls and the product. ``fingerprint()`` digests what a retrieval
+returned, for caches of anything built from it.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from chat.models import ChatRoom, Message
+from projects.models import Project, ProjectSupplier, ProjectUpdate, RiskAnalysis
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers within a process still serialize on _write_lock
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': True,
+    # Defaults to BASE_DIR / 'vector_index'
+    'ROOT': None,
+    'EMBEDDER': 'search.embeddings.HashingEmbedder',
+    'EMBEDDER_OPTIONS': {},
+    'CHUNK_WORDS': 80,
+    'TOP_K': 5,
+    'MIN_SCORE': 0.15,
+    'COMPACT_SLACK': 64,
+}
+
+Passage = namedtuple('Passage', 'kind object_id text score')
+
+_embedders = {}
+_snapshots = {}
+_write_lock = threading.Lock()
+
+
+def vector_setting(name):
+    return getattr(settings, 'VECTOR_INDEX', {}).get(name, DEFAULTS[name])
+
+
+def index_root():
+    return Path(vector_setting('ROOT') or Path(settings.BASE_DIR) / 'vector_index')
+
+
+def embedder_id():
+    return f"{vector_setting('EMBEDDER')}:{sorted(vector_setting('EMBEDDER_OPTIONS').items())!r}"
+
+
+def get_embedder():
+    """The configured embedder, created once per configuration"""
+    key = embedder_id()
+    if key not in _embedders:
+        _embedders[key] = import_string(vector_setting('EMBEDDER'))(**vector_setting('EMBEDDER_OPTIONS'))
+    return _embedders[key]
+
+
+def day(value):
+    return f'{value:%Y-%m-%d}' if value else ''
+
+
+def join(*parts):
+    return ' '.join(part for part in parts if part)
+
+
+def update_text(update):
+    return f"Update {day(update.created_at)} {update.title}", update.content
+
+
+def risk_text(risk):
+    state = 'resolved' if risk.is_resolved else 'open'
+    return (
+        f"Risk ({risk.risk_level} {risk.risk_category}, {state}) {risk.title}",
+        join(risk.description, f"Mitigation: {risk.mitigation_plan}",
+             risk.contingency_plan and f"Contingency: {risk.contingency_plan}"),
+    )
+
+
+def supplier_text(supplier):
+    return (
+        f"Supplier {supplier.name}",
+        join(f"Provides {supplier.materials_provided}.",
+             f"Reliability {supplier.reliability_score:g}, lead time {supplier.lead_time_days} days.",
+             supplier.contact_person and f"Contact: {supplier.contact_person}."),
+    )
+
+
+CHAT_UPDATE_LABEL = 'Chat update'
+
+
+def message_text(message):
+    if message.is_ai_response:
+        return None
+    label = CHAT_UPDATE_LABEL if message.is_update else 'Chat'
+    return f"{label} {day(message.created_at)} {message.sender.username}", message.content
+
+
+# model -> (key prefix, (header, body) or None to leave the record out, queryset used when rebuilding)
+SOURCES = {
+    ProjectUpdate: ('update', update_text, lambda: ProjectUpdate.objects.all()),
+    RiskAnalysis: ('risk', risk_text, lambda: RiskAnalysis.objects.all()),
+    ProjectSupplier: ('supplier', supplier_text, lambda: ProjectSupplier.objects.all()),
+    Message: (
+        'message', message_text,
+        lambda: Message.objects.filter(is_ai_response=False).select_related('chat_room', 'sender'),
+    ),
+}
+
+
+def passages(header, body):
+    """'<header>: <words>' passages of at most CHUNK_WORDS words each"""
+    words = (body or '').split()
+    size = vector_setting('CHUNK_WORDS')
+    if not words:
+        return [header]
+    return [f"{header}: {' '.join(words[start:start + size])}" for start in range(0, len(words), size)]
+
+
+def record_key(instance):
+    return f"{SOURCES[type(instance)][0]}:{instance.pk}"
+
+
+def entry_for(instance):
+    """(key, passage texts) for a saved record; no texts for records left out of the index"""
+    text = SOURCES[type(instance)][1](instance)
+    return record_key(instance), passages(*text) if text else []
+
+
+def owners(instances):
+    """Each instance's project id; uncached message rooms are resolved in one query"""
+    room_field = Message._meta.get_field('chat_room')
+    room_ids = {
+        instance.chat_room_id for instance in instances
+        if isinstance(instance, Message) and not room_field.is_cached(instance)
+    }
+    rooms = dict(ChatRoom.objects.filter(pk__in=room_ids).values_list('pk', 'project_id')) if room_ids else {}
+    return [
+        (instance.chat_room.project_id if room_field.is_cached(instance) else rooms[instance.chat_room_id])
+        if isinstance(instance, Message) else instance.project_id
+        for instance in instances
+    ]
+
+
+class Snapshot:
+    """A project's index as read at one point: vectors, row keys, passage texts and the live-row mask"""
+
+    def __init__(self, stamp, meta, vectors, keys, generations, texts):
+        self.stamp = stamp
+        self.meta = meta
+        self.vectors = vectors
+        self.keys = keys
+        self.texts = texts
+        latest = {}
+        for key, generation in zip(keys, generations):
+            latest[key] = generation
+        self.live = np.array(
+            [bool(text) and generation == latest[key] for key, generation, text in zip(keys, generations, texts)],
+            dtype=bool,
+        )
+        # Plain chat messages (not updates): each question adds one, see retrieve(chatter=False)
+        self.chatter = np.array(
+            [key.startswith('message:') and not text.startswith(CHAT_UPDATE_LABEL) for key, text in zip(keys, texts)],
+            dtype=bool,
+        )
+        self.current = {}
+        for row in np.flatnonzero(self.live):
+            self.current.setdefault(keys[row], []).append(texts[row])
+
+    def __len__(self):
+        return len(self.keys)
+
+
+class ProjectIndex:
+    """The files of one project's index"""
+
+    def __init__(self, project_id):
+        self.project_id = project_id
+        self.directory = index_root() / str(project_id)
+
+    def path(self, name):
+        return self.directory / name
+
+    def segment_paths(self, segment):
+        return self.path(f'vectors-{segment}.f32'), self.path(f'rows-{segment}.jsonl')
+
+    def read_meta(self):
+        try:
+            return json.loads(self.path('meta.json').read_text())
+        except FileNotFoundError:
+            return None
+
+    def snapshot(self):
+        """The current rows, cached per process until the files change; None without an index"""
+        try:
+            stat = os.stat(self.path('meta.json'))
+            cached = _snapshots.get(self.directory)
+            meta_stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            meta = cached.meta if cached and cached.stamp[0] == meta_stamp else self.read_meta()
+            if meta is None:
+                return None
+            vectors_path, rows_path = self.segment_paths(meta['segment'])
+            stamp = (meta_stamp, os.stat(rows_path).st_size)
+            if cached and cached.stamp == stamp:
+                return cached
+            with open(rows_path, 'rb') as handle:
+                data = handle.read(stamp[1])
+            # Only complete lines: a writer may be appending
+            rows = [json.loads(line) for line in data.split(b'\n')[:-1]]
+            vectors = (
+                np.memmap(vectors_path, dtype=np.float32, mode='r', shape=(len(rows), meta['dim']))
+                if rows else np.zeros((0, meta['dim']), dtype=np.float32)
+            )
+        except FileNotFoundError:
+            # No index yet, or it was compacted or removed while we read it
+            return None
+        snapshot = Snapshot(
+            stamp, meta, vectors,
+            [row['key'] for row in rows], [row['gen'] for row in rows], [row.get('text', '') for row in rows],
+        )
+        _snapshots[self.directory] = snapshot
+        return snapshot
+
+    @contextmanager
+    def locked(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with _write_lock, open(self.path('lock'), 'a') as handle:
+            if fcntl is not None:
+                fcntl.flock(handle, fcntl.LOCK_EX)
+            yield  # Closing the file releases the lock
+
+    def write_segment(self, vectors, rows, previous=None):
+        """Write a complete new segment and switch meta.json to it; returns the new meta"""
+        segment = previous['segment'] + 1 if previous else 0
+        vectors_path, rows_path = self.segment_paths(segment)
+        np.ascontiguousarray(vectors, dtype=np.float32).tofile(vectors_path)
+        with open(rows_path, 'w') as handle:
+            handle.writelines(json.dumps(row) + '\n' for row in rows)
+        meta = {'segment': segment, 'embedder': embedder_id(), 'dim': get_embedder().dim}
+        temporary = self.path('meta.json.tmp')
+        temporary.write_text(json.dumps(meta))
+        os.replace(temporary, self.path('meta.json'))
+        if previous:
+            for path in self.segment_paths(previous['segment']):
+                path.unlink(missing_ok=True)
+        return meta
+
+    def current_meta(self):
+        """meta.json, starting an empty segment when there is none or another embedder wrote it"""
+        meta = self.read_meta()
+        if meta is not None and meta['embedder'] == embedder_id():
+            return meta
+        if meta is not None:
+            logger.warning(
+                "Vector index of project %s was built with %s; starting over (run rebuild_vector_index)",
+                self.project_id, meta['embedder'],
+            )
+        return self.write_segment(np.zeros((0, get_embedder().dim)), [], meta)
+
+    def write(self, entries):
+        """Replace the passages of each (key, texts) entry; empty texts remove the record"""
+        if not entries or (not self.directory.exists() and not any(texts for _, texts in entries)):
+            return
+        with self.locked():
+            meta = self.current_meta()
+            snapshot = self.snapshot()
+            current = snapshot.current if snapshot else {}
+            entries = [(key, texts) for key, texts in entries if current.get(key, []) != texts]
+            if not entries:
+                return
+            texts = [text for _, record_texts in entries for text in record_texts]
+            embedded = iter(get_embedder().embed(texts)) if texts else iter(())
+            generation = len(snapshot) if snapshot else 0
+            rows, vectors = [], []
+            for key, record_texts in entries:
+                for text in record_texts:
+                    rows.append({'key': key, 'gen': generation, 'text': text})
+                    vectors.append(next(embedded))
+                if not record_texts:
+                    rows.append({'key': key, 'gen': generation})
+                    vectors.append(np.zeros(meta['dim'], dtype=np.float32))
+            vectors_path, rows_path = self.segment_paths(meta['segment'])
+            # Vectors first: readers size the vector map from the rows they can see
+            with open(vectors_path, 'ab') as handle:
+                handle.write(np.asarray(vectors, dtype=np.float32).tobytes())
+            with open(rows_path, 'a') as handle:
+                handle.writelines(json.dumps(row) + '\n' for row in rows)
+            self.compact_if_needed(meta)
+
+    def compact_if_needed(self, meta):
+        snapshot = self.snapshot()
+        live = int(snapshot.live.sum())
+        if len(snapshot) - live <= live + vector_setting('COMPACT_SLACK'):
+            return
+        rows = np.flatnonzero(snapshot.live)
+        self.write_segment(
+            snapshot.vectors[rows],
+            [{'key': snapshot.keys[row], 'gen': 0, 'text': snapshot.texts[row]} for row in rows],
+            meta,
+        )
+
+    def replace_all(self, entries):
+        """Rebuild the index from (key, texts) entries in one new segment"""
+        with self.locked():
+            texts = [text for _, record_texts in entries for text in record_texts]
+            dim = get_embedder().dim
+            vectors = get_embedder().embed(texts) if texts else np.zeros((0, dim), dtype=np.float32)
+            rows = [{'key': key, 'gen': 0, 'text': text} for key, record_texts in entries for text in record_texts]
+            self.write_segment(vectors, rows, self.read_meta())
+        return len(rows)
+
+    def remove(self):
+        _snapshots.pop(self.directory, None)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def write_after_commit(grouped):
+    """Apply {project id: [(key, texts)]} once the current transaction commits"""
+    def apply():
+        for project_id, entries in grouped.items():
+            ProjectIndex(project_id).write(entries)
+    transaction.on_commit(apply, robust=True)
+
+
+def group(instances, entry):
+    grouped = {}
+    for instance, project_id in zip(instances, owners(instances)):
+        grouped.setdefault(project_id, []).append(entry(instance))
+    return grouped
+
+
+def index_many(instances):
+    """Index saved records (of any SOURCES model) after commit"""
+    if vector_setting('ENABLED') and instances:
+        write_after_commit(group(instances, entry_for))
+
+
+def index(instance):
+    index_many([instance])
+
+
+def unindex(instance):
+    if vector_setting('ENABLED'):
+        write_after_commit(group([instance], lambda instance: (record_key(instance), [])))
+
+
+def remove_project(project_id):
+    transaction.on_commit(lambda: ProjectIndex(project_id).remove(), robust=True)
+
+
+def retrieve(project, query, k=None, chatter=True):
+    """The project's passages most similar to `query`, best first; chatter=False leaves plain chat messages out"""
+    if not vector_setting('ENABLED') or not (query or '').strip():
+        return []
+    snapshot = ProjectIndex(project.pk).snapshot()
+    if snapshot is None or snapshot.meta['embedder'] != embedder_id():
+        return []
+    candidates = snapshot.live if chatter else snapshot.live & ~snapshot.chatter
+    if not candidates.any():
+        return []
+    scores = np.asarray(snapshot.vectors @ get_embedder().embed([query])[0])
+    scores[~candidates] = -np.inf
+    k = min(k or vector_setting('TOP_K'), int(candidates.sum()))
+    best = np.argpartition(-scores, k - 1)[:k]
+    results = []
+    for row in best[np.argsort(-scores[best])]:
+        if scores[row] < vector_setting('MIN_SCORE'):
+            break
+        kind, object_id = snapshot.keys[row].split(':')
+        results.append(Passage(kind, int(object_id), snapshot.texts[row], float(scores[row])))
+    return results
+
+
+def fingerprint(passages):
+    """Short digest of the passages' texts, for caching whatever was built from them"""
+    return hashlib.sha256('\n'.join(passage.text for passage in passages).encode()).hexdigest()[:16]
+
+
+def rebuild(project_ids=None):
+    """Re-create the indexes of `project_ids` (default: all projects) from the database; returns passages written"""
+    projects = Project.objects.all() if project_ids is None else Project.objects.filter(pk__in=project_ids)
+    grouped = {project_id: [] for project_id in projects.values_list('pk', flat=True)}
+    for model, (_, _, queryset) in SOURCES.items():
+        project_field = 'chat_room__project_id' if model is Message else 'project_id'
+        rows = queryset().filter(**{f'{project_field}__in': list(grouped)}).order_by('pk')
+        for instance, project_id in zip(rows, owners(list(rows))):
+            grouped[project_id].append(entry_for(instance))
+    if project_ids is None and index_root().exists():
+        # Indexes of deleted projects
+        for directory in index_root().iterdir():
+            if directory.is_dir() and not (directory.name.isdigit() and int(directory.name) in grouped):
+                shutil.rmtree(directory, ignore_errors=True)
+    return sum(ProjectIndex(project_id).replace_all(entries) for project_id, entries in grouped.items())
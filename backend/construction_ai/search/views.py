@@ -0,0 +1,62 @@
+from rest_framework import generics, permissions
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import LimitOffsetPagination
+
+from projects.membership import get_membership
+from .backends import get_backend
+from .models import SearchDocument
+from .serializers import SearchResultSerializer
+
+class SearchResults:
+    """Lazily evaluated, sliceable search results, as LimitOffsetPagination expects of a queryset"""
+    def __init__(self, backend, query, project_ids, kinds):
+        self.backend = backend
+        self.query = query
+        self.project_ids = sorted(project_ids)
+        self.kinds = kinds
+        self._count = None
+    
+    def count(self):
+        if self._count is None:
+            self._count = self.backend.count(self.query, self.project_ids, self.kinds)
+        return self._count
+    
+    def __len__(self):
+        return self.count()
+    
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            raise TypeError("Search results only support slicing")
+        start = item.start or 0
+        return self.backend.search(self.query, self.project_ids, self.kinds, item.stop - start, start)
+
+class SearchPagination(LimitOffsetPagination):
+    default_limit = 20
+    max_limit = 100
+
+class SearchView(generics.ListAPIView):
+    """
+    Ranked full-text search over projects, updates, risks and chat messages the user can see.
+    ?q= is required; ?kind= (comma-separated) and ?project_id= narrow the results.
+    """
+    serializer_class = SearchResultSerializer
+    pagination_class = SearchPagination
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        params = self.request.query_params
+        query = params.get('q', '').strip()
+        if not query:
+            raise ValidationError({"q": "A search query is required"})
+        
+        kinds = [kind for kind in params.get('kind', '').split(',') if kind]
+        allowed = {key for key, _ in SearchDocument.KIND_CHOICES}
+        if not set(kinds) <= allowed:
+            raise ValidationError({"kind": f"Choose from {', '.join(sorted(allowed))}"})
+        
+        membership = get_membership(self.request)
+        project_ids = membership.viewable
+        project_id = params.get('project_id')
+        if project_id:
+            project_ids = {int(project_id)} if membership.can_view(project_id) else set()
+        return SearchResults(get_backend(), query, project_ids, kinds)
@@ -1,6 +1,6 @@
 import React, { useState, useEffect, useRef } from 'react';
 import { useAuth } from '../../context/AuthContext';
-import { getMessages, sendMessage } from '../../services/projectService';
+import { getMessagesPage, getMessageStreamUrl, streamMessage } from '../../services/projectService';
 import { 
   IconSend, 
   IconLoader2,
@@ -19,26 +19,64 @@ export default function ProjectChat({ chatRoomId, projectId, projectTitle, userR
   const [error, setError] = useState(null);
   const [input, setInput] = useState('');
   const [markAsUpdate, setMarkAsUpdate] = useState(false);
+  // The AI reply while it is being generated; the saved message replaces it
+  const [draftReply, setDraftReply] = useState(null);
+  // Cursor of the oldest loaded page, while older history remains
+  const [olderCursor, setOlderCursor] = useState(null);
+  const [loadingOlder, setLoadingOlder] = useState(false);
+  // Set while prepending older history so the reader keeps their place
+  const keepScrollRef = useRef(false);
+  // Newest message id fetched or streamed; the stream resumes after it
+  const lastIdRef = useRef(null);
   const messagesEndRef = useRef(null);
   const chatContainerRef = useRef(null);
 
   useEffect(() => {
-    if (chatRoomId) {
-      fetchMessages();
-      // Set up polling for new messages
-      const intervalId = setInterval(fetchMessages, 10000); // Poll every 10 seconds
-      
-      return () => clearInterval(intervalId);
-    }
+    if (!chatRoomId) return;
+    let source = null;
+    let retry = null;
+    let closed = false;
+
+    // New messages are pushed over Server-Sent Events, resuming after the newest
+    // message seen so nothing posted since the initial page load is missed
+    const connect = async () => {
+      try {
+        const url = await getMessageStreamUrl(chatRoomId, lastIdRef.current);
+        if (closed) return;
+        source = new EventSource(url);
+        source.addEventListener('message', (event) => {
+          const message = JSON.parse(event.data);
+          lastIdRef.current = Math.max(lastIdRef.current ?? 0, message.id);
+          setMessages((current) =>
+            current.some((m) => m.id === message.id) ? current : [...current, message]
+          );
+        });
+        // Tickets are single-use, so the browser's own reconnect is refused; reconnect with a new one
+        source.addEventListener('error', () => {
+          if (source.readyState === EventSource.CLOSED && !closed) retry = setTimeout(connect, 3000);
+        });
+      } catch (err) {
+        if (!closed) retry = setTimeout(connect, 3000);
+      }
+    };
+    fetchMessages().then(connect);
+
+    return () => {
+      closed = true;
+      clearTimeout(retry);
+      source?.close();
+    };
   }, [chatRoomId]);
 
   const fetchMessages = async () => {
     try {
       setError(null);
       console.log('Fetching messages for chat room:', chatRoomId);
-      const data = await getMessages(chatRoomId);
-      console.log('Messages retrieved:', data);
-      setMessages(data);
+      const page = await getMessagesPage(chatRoomId);
+      console.log('Messages retrieved:', page.results);
+      setMessages(page.results);
+      lastIdRef.current = page.results.length ? page.results[page.results.length - 1].id : 0;
+      setOlderCursor(page.has_older ? page.before : null);
       if (loading) setLoading(false);
     } catch (err) {
       console.error('Error fetching messages:', err);
@@ -47,9 +85,31 @@ export default function ProjectChat({ chatRoomId, projectId, projectTitle, userR
     }
   };
 
+  const loadOlder = async () => {
+    try {
+      setLoadingOlder(true);
+      const page = await getMessagesPage(chatRoomId, { before: olderCursor });
+      keepScrollRef.current = true;
+      setMessages((current) => [
+        ...page.results.filter((message) => !current.some((m) => m.id === message.id)),
+        ...current
+      ]);
+      setOlderCursor(page.has_older ? page.before : null);
+    } catch (err) {
+      console.error('Error loading older messages:', err);
+      setError(err.detail || 'Failed to load older messages');
+    } finally {
+      setLoadingOlder(false);
+    }
+  };
+
   useEffect(() => {
+    if (keepScrollRef.current) {
+      keepScrollRef.current = false;
+      return;
+    }
     scrollToBottom();
-  }, [messages]);
+  }, [messages, draftReply]);
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
@@ -67,19 +127,24 @@ export default function ProjectChat({ chatRoomId, projectId, projectTitle, userR
       console.log('Message content:', input);
       console.log('Is update:', markAsUpdate);
       
-      // Send the message
-      await sendMessage(chatRoomId, input, markAsUpdate);
-      
-      // Immediately fetch messages to show the response
-      await fetchMessages();
-      
-      // Clear input and reset UI state
+      // Send the message and show the reply as it streams in
+      const content = input;
       setInput('');
       setMarkAsUpdate(false);
+      setDraftReply('');
+      const reply = await streamMessage(chatRoomId, content, markAsUpdate, (token) =>
+        setDraftReply((current) => (current || '') + token)
+      );
+      if (reply?.id) {
+        setMessages((current) =>
+          current.some((m) => m.id === reply.id) ? current : [...current, reply]
+        );
+      }
     } catch (err) {
       console.error('Error sending message:', err);
       setError(err.detail || 'Failed to send message');
     } finally {
+      setDraftReply(null);
       setSending(false);
     }
   };
@@ -128,6 +193,19 @@ export default function ProjectChat({ chatRoomId, projectId, projectTitle, userR
           </div>
         ) : (
           <div className="space-y-4">
+            {olderCursor && (
+              <div className="flex justify-center">
+                <button
+                  type="button"
+                  onClick={loadOlder}
+                  disabled={loadingOlder}
+                  className="inline-flex items-center text-xs text-indigo-600 dark:text-indigo-400 hover:underline disabled:opacity-50"
+                >
+                  {loadingOlder && <IconLoader2 className="animate-spin h-3 w-3 mr-1" />}
+                  Load older messages
+                </button>
+              </div>
+            )}
             {messages.map((message) => (
               <div key={message.id} className={`flex ${message.is_ai_response ? 'justify-start' : 'justify-end'}`}>
                 <div className={`max-w-[80%] ${message.is_ai_response ? 
@@ -175,6 +253,20 @@ export default function ProjectChat({ chatRoomId, projectId, projectTitle, userR
                 </div>
               </div>
             ))}
+            {draftReply !== null && (
+              <div className="flex justify-start">
+                <div className="max-w-[80%] bg-white dark:bg-neutral-800 border border-gray-200 dark:border-gray-700 rounded-lg p-3">
+                  <div className="flex items-center mb-1">
+                    <IconRobot className="h-4 w-4 text-gray-500 dark:text-gray-400 mr-2" />
+                    <span className="text-xs font-medium text-gray-700 dark:text-gray-300">AI Assistant</span>
+                    {!draftReply && <IconLoader2 className="ml-2 h-3 w-3 animate-spin text-gray-400" />}
+                  </div>
+                  <div className="text-sm whitespace-pre-wrap text-gray-700 dark:text-gray-300">
+                    {draftReply}
+                  </div>
+                </div>
+              </div>
+            )}
             <div ref={messagesEndRef} />
           </div>
         )}
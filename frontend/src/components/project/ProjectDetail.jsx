@@ -21,7 +21,7 @@ import {
   IconPackage,
   IconAlertTriangle
 } from '@tabler/icons-react';
-import { getProject, getChatRooms } from '../../services/projectService';
+import { getProjectWorkspace } from '../../services/projectService';
 import {
   Navbar,
   NavBody,
@@ -44,6 +44,8 @@ export default function ProjectDetail() {
   const [mainSection, setMainSection] = useState('details');
   const [subSection, setSubSection] = useState('basic');
   const [chatRoom, setChatRoom] = useState(null);
+  // Workspace sections seed the tabs, which only fetch when a section was cut off or changes
+  const [sections, setSections] = useState(null);
   const [isMobileMenuOpen, setIsMobileMenuOpen] = useState(false);
   
   // Keep track of manually selected section
@@ -55,23 +57,14 @@ export default function ProjectDetail() {
         setLoading(true);
         setError(null);
         
-        // Fetch project details
-        console.log('Fetching project with ID:', projectId);
-        const projectData = await getProject(projectId);
-        setProject(projectData);
+        // Project and its chat room in one round trip
+        console.log('Fetching workspace for project ID:', projectId);
+        const workspace = await getProjectWorkspace(projectId);
+        setProject(workspace.project);
+        setSections(workspace);
         
-        // Fetch chat rooms to find the one for this project
-        const chatRoomsData = await getChatRooms();
-        console.log('Chat rooms received:', chatRoomsData);
-        
-        // Try both string and number comparison
-        const projectChatRoom = chatRoomsData.find(
-          room => room.project === parseInt(projectId) || room.project === projectId
-        );
-        
-        if (projectChatRoom) {
-          console.log('Found chat room:', projectChatRoom);
-          setChatRoom(projectChatRoom);
+        if (workspace.chat_room) {
+          setChatRoom(workspace.chat_room);
         } else {
           console.warn('No chat room found for this project. Creating fallback.');
           // Create a fallback chat room object so UI doesn't break
@@ -91,6 +84,11 @@ export default function ProjectDetail() {
     fetchProject();
   }, [projectId]);
 
+  // A tab re-read its full list; keep it so switching back doesn't show the older snapshot
+  const handleSectionLoaded = useCallback((section, results) => {
+    setSections(prev => ({ ...prev, [section]: { results, has_more: false } }));
+  }, []);
+
   // The main section navigation items
   const navItems = [
     { name: 'Project Details', link: '#details', id: 'details' },
@@ -362,6 +360,8 @@ export default function ProjectDetail() {
                       setProject={setProject}
                       activeSection={subSection}
                       readOnly={user.role !== 'supervisor'} 
+                      sections={sections}
+                      onSectionLoaded={handleSectionLoaded}
                     />
                   </div>
                   
@@ -416,6 +416,7 @@ export default function ProjectDetail() {
                         chatRoomId={chatRoom.id}
                         projectTitle={project.title}
                         userRole = {user.role}
+                        initialMessages={sections?.messages}
                       />
                     ) : (
                       <div className="p-6 text-center">
@@ -430,7 +430,7 @@ const ResourcesSection = React.memo(function ResourcesSection({ formData, handle
   );
 });
 
-function ProjectDetailForm({ project, setProject, activeSection, readOnly }) {
+function ProjectDetailForm({ project, setProject, activeSection, readOnly, sections, onSectionLoaded }) {
   const [formData, setFormData] = useState({
     title: '',
     description: '',
@@ -646,6 +646,8 @@ function ProjectDetailForm({ project, setProject, activeSection, readOnly }) {
         return project && (
           <ProjectTimeline 
             projectId={project.id} 
+            initialData={sections?.timeline_events}
+            onLoaded={(results) => onSectionLoaded?.('timeline_events', results)}
             readOnly={readOnly} 
           />
         );
@@ -653,6 +655,8 @@ function ProjectDetailForm({ project, setProject, activeSection, readOnly }) {
         return project && (
           <ProjectWorkers 
             projectId={project.id} 
+            initialData={sections?.workers}
+            onLoaded={(results) => onSectionLoaded?.('workers', results)}
             supervisor={project.supervisor}
             readOnly={readOnly} 
           />
@@ -661,6 +665,8 @@ function ProjectDetailForm({ project, setProject, activeSection, readOnly }) {
         return project && (
           <ProjectSuppliers 
             projectId={project.id} 
+            initialData={sections?.suppliers}
+            onLoaded={(results) => onSectionLoaded?.('suppliers', results)}
             readOnly={readOnly} 
           />
         );
@@ -668,6 +674,8 @@ function ProjectDetailForm({ project, setProject, activeSection, readOnly }) {
         return project && (
           <ProjectRisks 
             projectId={project.id} 
+            initialData={sections?.risks}
+            onLoaded={(results) => onSectionLoaded?.('risks', results)}
             readOnly={readOnly} 
           />
         );
@@ -680,6 +688,8 @@ function ProjectDetailForm({ project, setProject, activeSection, readOnly }) {
     formData, 
     isEditing, 
     readOnly, 
+    sections,
+    onSectionLoaded,
     error,
     isSaving,
     handleChange,
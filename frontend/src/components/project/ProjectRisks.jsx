@@ -10,9 +10,10 @@ import {
   IconShieldCheckFilled
 } from '@tabler/icons-react';
 
-export default function ProjectRisks({ projectId, readOnly }) {
-  const [risks, setRisks] = useState([]);
-  const [loading, setLoading] = useState(true);
+export default function ProjectRisks({ projectId, readOnly, initialData, onLoaded }) {
+  // Seeded from the project workspace; only fetched when it was cut off or after a change
+  const [risks, setRisks] = useState(initialData?.results || []);
+  const [loading, setLoading] = useState(!initialData || initialData.has_more);
   const [error, setError] = useState(null);
   const [isAddingRisk, setIsAddingRisk] = useState(false);
   const [formData, setFormData] = useState({
@@ -28,7 +29,7 @@ export default function ProjectRisks({ projectId, readOnly }) {
   });
 
   useEffect(() => {
-    if (projectId) {
+    if (projectId && (!initialData || initialData.has_more)) {
       fetchRisks();
     }
   }, [projectId]);
@@ -39,6 +40,7 @@ export default function ProjectRisks({ projectId, readOnly }) {
       setError(null);
       const data = await getProjectRisks(projectId);
       setRisks(data);
+      onLoaded?.(data);
     } catch (err) {
       setError(err.detail || 'Failed to load risks');
     } finally {
@@ -12,9 +12,10 @@ import {
   IconStar
 } from '@tabler/icons-react';
 
-export default function ProjectSuppliers({ projectId, readOnly }) {
-  const [suppliers, setSuppliers] = useState([]);
-  const [loading, setLoading] = useState(true);
+export default function ProjectSuppliers({ projectId, readOnly, initialData, onLoaded }) {
+  // Seeded from the project workspace; only fetched when it was cut off or after a change
+  const [suppliers, setSuppliers] = useState(initialData?.results || []);
+  const [loading, setLoading] = useState(!initialData || initialData.has_more);
   const [error, setError] = useState(null);
   const [isAddingSupplier, setIsAddingSupplier] = useState(false);
   const [formData, setFormData] = useState({
@@ -29,7 +30,7 @@ export default function ProjectSuppliers({ projectId, readOnly }) {
   });
 
   useEffect(() => {
-    if (projectId) {
+    if (projectId && (!initialData || initialData.has_more)) {
       fetchSuppliers();
     }
   }, [projectId]);
@@ -40,6 +41,7 @@ export default function ProjectSuppliers({ projectId, readOnly }) {
       setError(null);
       const data = await getProjectSuppliers(projectId);
       setSuppliers(data);
+      onLoaded?.(data);
     } catch (err) {
       setError(err.detail || 'Failed to load suppliers');
     } finally {
@@ -13,9 +13,10 @@ import {
   IconFlag
 } from '@tabler/icons-react';
 
-export default function ProjectTimeline({ projectId, readOnly }) {
-  const [timelineEvents, setTimelineEvents] = useState([]);
-  const [loading, setLoading] = useState(true);
+export default function ProjectTimeline({ projectId, readOnly, initialData, onLoaded }) {
+  // Seeded from the project workspace; only fetched when it was cut off or after a change
+  const [timelineEvents, setTimelineEvents] = useState(initialData?.results || []);
+  const [loading, setLoading] = useState(!initialData || initialData.has_more);
   const [error, setError] = useState(null);
   const [isAddingEvent, setIsAddingEvent] = useState(false);
   const [editingEventId, setEditingEventId] = useState(null);
@@ -30,7 +31,9 @@ export default function ProjectTimeline({ projectId, readOnly }) {
   });
 
   useEffect(() => {
-    fetchTimelineEvents();
+    if (projectId && (!initialData || initialData.has_more)) {
+      fetchTimelineEvents();
+    }
   }, [projectId]);
 
   const fetchTimelineEvents = async () => {
@@ -41,6 +44,7 @@ export default function ProjectTimeline({ projectId, readOnly }) {
       // Sort by start date
       const sortedEvents = events.sort((a, b) => new Date(a.start_date) - new Date(b.start_date));
       setTimelineEvents(sortedEvents);
+      onLoaded?.(sortedEvents);
     } catch (err) {
       setError(err.detail || 'Failed to load timeline events');
     } finally {
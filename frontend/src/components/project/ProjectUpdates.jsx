@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import { getMessages } from '../../services/projectService';
+import { getUpdateMessages } from '../../services/projectService';
 import { 
   IconLoader2,
   IconUserCircle,
@@ -18,9 +18,10 @@ import {
 } from '@tabler/icons-react';
 import { GlowingEffect } from '../ui/glowing-effect';
 
-export default function ProjectUpdates({ chatRoomId, projectTitle, userRole }) {
-  const [updates, setUpdates] = useState([]);
-  const [loading, setLoading] = useState(true);
+export default function ProjectUpdates({ chatRoomId, projectTitle, userRole, initialMessages }) {
+  // The workspace's newest messages hold the latest updates; older ones are fetched only if it has more
+  const [updates, setUpdates] = useState(() => (initialMessages?.results || []).filter(message => message.is_update));
+  const [loading, setLoading] = useState(!initialMessages || initialMessages.has_older);
   const [error, setError] = useState(null);
   const [weather, setWeather] = useState(null);
   const [forecast, setForecast] = useState(null);
@@ -45,8 +46,10 @@ export default function ProjectUpdates({ chatRoomId, projectTitle, userRole }) {
   ];
 
   useEffect(() => {
-    if (chatRoomId) {
+    if (chatRoomId && !initialMessages) {
       fetchUpdates();
+    } else if (chatRoomId && initialMessages.has_older) {
+      fetchOlderUpdates(initialMessages.before);
     }
     
     // Fetch weather data
@@ -79,10 +82,8 @@ export default function ProjectUpdates({ chatRoomId, projectTitle, userRole }) {
       setLoading(true);
       setError(null);
       console.log('Fetching messages for updates from chat room:', chatRoomId);
-      const messages = await getMessages(chatRoomId);
-      
-      // Filter for messages flagged as updates
-      const projectUpdates = messages.filter(msg => msg.is_update);
+      // Filtered on the server and paged back through the whole history
+      const projectUpdates = await getUpdateMessages(chatRoomId);
       console.log('Found updates:', projectUpdates.length);
       setUpdates(projectUpdates);
     } catch (err) {
@@ -93,6 +94,20 @@ export default function ProjectUpdates({ chatRoomId, projectTitle, userRole }) {
     }
   };
 
+  const fetchOlderUpdates = async (before) => {
+    try {
+      setLoading(true);
+      setError(null);
+      const older = await getUpdateMessages(chatRoomId, before);
+      setUpdates(prev => [...older, ...prev]);
+    } catch (err) {
+      console.error('Error fetching older updates:', err);
+      setError(err.detail || 'Failed to load updates');
+    } finally {
+      setLoading(false);
+    }
+  };
+
   const fetchWeather = async () => {
     try {
       setWeatherLoading(true);
@@ -12,9 +12,10 @@ import {
   IconUserX
 } from '@tabler/icons-react';
 
-export default function ProjectWorkers({ projectId, supervisor, readOnly }) {
-  const [workers, setWorkers] = useState([]);
-  const [loading, setLoading] = useState(true);
+export default function ProjectWorkers({ projectId, supervisor, readOnly, initialData, onLoaded }) {
+  // Seeded from the project workspace; only fetched when it was cut off or after a change
+  const [workers, setWorkers] = useState(initialData?.results || []);
+  const [loading, setLoading] = useState(!initialData || initialData.has_more);
   const [error, setError] = useState(null);
   const [isAddingWorker, setIsAddingWorker] = useState(false);
   const [formData, setFormData] = useState({
@@ -23,7 +24,9 @@ export default function ProjectWorkers({ projectId, supervisor, readOnly }) {
   });
 
   useEffect(() => {
-    fetchWorkers();
+    if (projectId && (!initialData || initialData.has_more)) {
+      fetchWorkers();
+    }
   }, [projectId]);
 
   const fetchWorkers = async () => {
@@ -32,6 +35,7 @@ export default function ProjectWorkers({ projectId, supervisor, readOnly }) {
       setError(null);
       const data = await getProjectWorkers(projectId);
       setWorkers(data);
+      onLoaded?.(data);
     } catch (err) {
       setError(err.detail || 'Failed to load workers');
     } finally {
@@ -171,7 +175,7 @@ export default function ProjectWorkers({ projectId, supervisor, readOnly }) {
             <div className="flex-shrink-0">
               {supervisor?.profile_picture ? (
                 <img 
-                  src={supervisor.profile_picture} 
+                  src={supervisor.profile_picture_variants?.thumb || supervisor.profile_picture} 
                   alt={`${supervisor.first_name} ${supervisor.last_name}`}
                   className="h-10 w-10 rounded-full"
                 />
@@ -218,7 +222,7 @@ export default function ProjectWorkers({ projectId, supervisor, readOnly }) {
                   <div className="flex-shrink-0">
                     {workerData.worker.profile_picture ? (
                       <img 
-                        src={workerData.worker.profile_picture} 
+                        src={workerData.worker.profile_picture_variants?.thumb || workerData.worker.profile_picture} 
                         alt={`${workerData.worker.first_name} ${workerData.worker.last_name}`}
                         className="h-10 w-10 rounded-full"
                       />
@@ -20,10 +20,25 @@ export const getProjects = async () => {
   }
 };
 
-export const getProject = async (projectId) => {
+// `params` may hold `fields` / `expand` to limit the representation, e.g. { expand: '' } for no nested lists
+export const getProject = async (projectId, params = {}) => {
   try {
     const response = await axios.get(`${API_URL}/api/projects/${projectId}/`, {
-      headers: authHeader()
+      headers: authHeader(),
+      params
+    });
+    return response.data;
+  } catch (error) {
+    throw error.response?.data || error.message;
+  }
+};
+
+// Project, every section (up to `limit` rows each), its chat room and recent messages in one request
+export const getProjectWorkspace = async (projectId, limit) => {
+  try {
+    const response = await axios.get(`${API_URL}/api/projects/${projectId}/workspace/`, {
+      headers: authHeader(),
+      params: limit ? { limit } : {}
     });
     return response.data;
   } catch (error) {
@@ -150,6 +165,19 @@ export const createSupplier = async (supplierData) => {
   }
 };
 
+// Full-text search across the user's projects, updates, risks and chat messages
+export const search = async (query, { kind, projectId, limit = 20, offset = 0 } = {}) => {
+  try {
+    const response = await axios.get(`${API_URL}/api/search/`, {
+      params: { q: query, kind, project_id: projectId, limit, offset },
+      headers: authHeader()
+    });
+    return response.data;
+  } catch (error) {
+    throw error.response?.data || error.message;
+  }
+};
+
 // Risk analysis
 export const getProjectRisks = async (projectId) => {
   try {
@@ -163,6 +191,19 @@ export const getProjectRisks = async (projectId) => {
   }
 };
 
+// Open risks by category and level across all supervised projects, with top exposures per project
+export const getRiskHeatmap = async (top = 5) => {
+  try {
+    const response = await axios.get(`${API_URL}/api/projects/risk-heatmap/`, {
+      params: { top },
+      headers: authHeader()
+    });
+    return response.data;
+  } catch (error) {
+    throw error.response?.data || error.message;
+  }
+};
+
 export const createRisk = async (riskData) => {
   try {
     const response = await axios.post(`${API_URL}/api/project-risks/`, riskData, {
@@ -186,10 +227,12 @@ export const getChatRooms = async () => {
   }
 };
 
-export const getMessages = async (chatRoomId) => {
+// Returns one page of messages (oldest first); pass { before } / { after } cursors to page
+// and { is_update: true } for project updates only
+export const getMessagesPage = async (chatRoomId, params = {}) => {
   try {
     const response = await axios.get(`${API_URL}/api/messages/`, {
-      params: { chat_room_id: chatRoomId },
+      params: { chat_room_id: chatRoomId, ...params },
       headers: authHeader()
     });
     return response.data;
@@ -198,6 +241,39 @@ export const getMessages = async (chatRoomId) => {
   }
 };
 
+// The newest page of messages only; use getMessagesPage with its `before` cursor for older history
+export const getMessages = async (chatRoomId) => {
+  const page = await getMessagesPage(chatRoomId);
+  return page.results;
+};
+
+// Every message flagged as a project update (oldest first), following the cursors back through history;
+// pass a `before` cursor (e.g. the workspace's) to fetch only the updates older than it
+export const getUpdateMessages = async (chatRoomId, before) => {
+  let page = await getMessagesPage(chatRoomId, { is_update: true, limit: 200, ...(before ? { before } : {}) });
+  let updates = page.results;
+  while (page.has_older && page.before) {
+    page = await getMessagesPage(chatRoomId, { is_update: true, limit: 200, before: page.before });
+    updates = [...page.results, ...updates];
+  }
+  return updates;
+};
+
+// EventSource can't send headers and tokens don't belong in URLs, so each stream opens with
+// a short-lived single-use ticket; lastEventId replays anything posted after that message
+export const getMessageStreamUrl = async (chatRoomId, lastEventId) => {
+  try {
+    const response = await axios.post(`${API_URL}/api/chat-rooms/${chatRoomId}/stream-ticket/`, {}, {
+      headers: authHeader()
+    });
+    const params = new URLSearchParams({ ticket: response.data.ticket });
+    if (lastEventId != null) params.set('last_event_id', lastEventId);
+    return `${API_URL}/api/chat-rooms/${chatRoomId}/stream/?${params}`;
+  } catch (error) {
+    throw error.response?.data || error.message;
+  }
+};
+
 export const sendMessage = async (chatRoomId, content, isUpdate = false) => {
   try {
     const response = await axios.post(`${API_URL}/api/messages/`, {
@@ -213,6 +289,40 @@ export const sendMessage = async (chatRoomId, content, isUpdate = false) => {
   }
 };
 
+// Posts a message and reads the AI reply as it is generated (Server-Sent Events over
+// a POST, so fetch rather than EventSource). onToken receives each chunk; resolves
+// with the saved reply, or with { pending_reply } when the server fell back to the queue.
+export const streamMessage = async (chatRoomId, content, isUpdate = false, onToken = () => {}) => {
+  const response = await fetch(`${API_URL}/api/messages/stream/`, {
+    method: 'POST',
+    headers: { ...authHeader(), 'Content-Type': 'application/json' },
+    body: JSON.stringify({ chat_room_id: chatRoomId, content, is_update: isUpdate })
+  });
+  if (!response.ok) {
+    throw await response.json().catch(() => response.statusText);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let result = null;
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    let end;
+    while ((end = buffer.indexOf('\n\n')) !== -1) {
+      const block = buffer.slice(0, end);
+      buffer = buffer.slice(end + 2);
+      const event = block.match(/^event: (.*)$/m)?.[1];
+      const data = JSON.parse(block.match(/^data: (.*)$/m)?.[1] || 'null');
+      if (event === 'token') onToken(data.text);
+      else if (event === 'done' || event === 'error') result = data;
+    }
+  }
+  return result;
+};
+
 // Updates
 export const getProjectUpdates = async (projectId) => {
   try {